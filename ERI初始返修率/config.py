@@ -7,6 +7,7 @@
 
 # 修改 config.py
 """项目配置参数"""
+import os
 
 # 数据库配置（合并连接参数和表名）
 DB_CONFIG = {
@@ -30,4 +31,31 @@ EXCEL_CONFIG = {
     "path": r"C:\Users\admin\Desktop\三江\核心产品返修率-20250611外发wqt.xlsx",
     "material_sheet": "改善统计",  # 物料数据所在工作表
     "repair_sheet": "返修"  # 返修数据所在工作表
-}
\ No newline at end of file
+}
+
+# 返修批次归因配置
+LOT_CONFIG = {
+    "stock_table": "material_stock",  # 入库（出货）批次表
+    # 返修表 → 归因结果表（返修id只在各自的返修表内唯一，每个返修表单独一张结果表）
+    "attribution_tables": {
+        "repair_stats_eri": "repair_lot_attribution",  # ERI（计算.py 关联使用）
+        "repair_stats": "repair_lot_attribution_tl",  # TL9000（月返修率TL9000算法物料描述（板返修率）目录的返修表）
+    },
+    "methods": ["asof", "fifo"],  # 需要计算的归因算法
+    # 热表 → 归档明细表（TL9000 目录的 archive.py 将早期明细移入归档表），归因时合并读取，
+    # 早期批次和返修仍参与匹配和先进先出的消耗
+    "archive_tables": {
+        "material_stock": "material_stock_archive",
+        "repair_stats": "repair_stats_archive",
+    },
+}
+
+# 查询记录配置（db_utils.run_query）
+QUERY_LOG_CONFIG = {
+    "enabled": True,  # 是否记录每条查询的耗时和行数
+    "bytes": False,  # 是否同时记录传输字节数（每条查询前后各多一次 SHOW SESSION STATUS 往返，排查传输量时再开启）
+    "slow_ms": 1000,  # 耗时超过该值（毫秒）的查询写入慢查询日志
+    "explain": True,  # 慢查询是否同时记录执行计划（EXPLAIN）
+    "max_param_chars": 200,  # 日志中查询参数最多保留的字符数
+    "slow_log": os.path.join(os.path.expanduser("~"), ".report_cache", "slow_queries.jsonl")  # 慢查询日志，每行一条JSON
+}
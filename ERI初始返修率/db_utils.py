@@ -5,8 +5,30 @@
 # @File : db_utils.py
 # @Description : 
 
+import os
+import sys
 import pymysql
 from pymysql import MySQLError
+from config import QUERY_LOG_CONFIG
+
+# 仓库根目录加入搜索路径：各目录共用的 common 包按包名导入（from common.code_dict import ...），
+# 不会与本目录的同名模块混淆；脚本先导入本模块再导入 common
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from common.query_log import QueryLog, bytes_sent, explain_query  # noqa: E402
+
+# SQL执行器（按本目录的 QUERY_LOG_CONFIG 记录查询，实现见仓库根目录 common/query_log.py）
+_query_log = QueryLog(QUERY_LOG_CONFIG)
+# 本次运行执行过的查询记录（按执行顺序；常驻进程只保留最近的记录）
+QUERY_LOG = _query_log.records
+log_slow_query = _query_log.log_slow_query
+run_query = _query_log.run_query
+execute_query = _query_log.execute_query
+read_sql = _query_log.read_sql
+read_sql_chunks = _query_log.read_sql_chunks
+
 
 def create_db_connection(host, user, password, database):
     """
@@ -37,26 +59,6 @@ def create_db_connection(host, user, password, database):
     
 
 
-def execute_query(conn, query):
-    """
-    执行SQL查询并返回游标（用于获取查询结果）
-    参数:
-        conn: 数据库连接对象（已建立的连接）
-        query (str): 要执行的SQL查询语句
-    返回:
-        cursor: 执行查询后的游标对象（含查询结果），若失败则返回None
-    """
-    try:
-        # 创建游标对象（用于执行查询和获取结果）
-        cursor = conn.cursor()
-        # 执行SQL查询
-        cursor.execute(query)
-        # 返回游标（后续可通过cursor.fetchall()获取数据）
-        return cursor
-    except Exception as e:
-        print(f"查询执行失败: {e}")
-        return None
-
 def close_db_connection(conn):
     """
     关闭数据库连接
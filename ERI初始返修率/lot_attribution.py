@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : lot_attribution.py
+# @Description :
+
+"""返修批次归因程序
+将每条返修记录归属到它所来自的入库（出货）批次，结果写入归因表，供ERI和TL9000报表复用：
+LOT_CONFIG["attribution_tables"] 中每个返修表（ERI 的 repair_stats_eri、TL9000 的 repair_stats）
+各自归因，写入对应的结果表（返修id只在各自的返修表内唯一）
+
+支持两种归因算法：
+    asof: 按物料匹配返修月之前最近的一个入库批次（pd.merge_asof）
+    fifo: 按入库先后顺序依次消耗各批次数量（先进先出）
+两种算法都只需排序 + 二分查找（FIFO 另加按物料分组的累计和、累计最小值），复杂度为 O(n log n)，没有逐行循环
+物料按整数代码id（common/code_dict.py）分组和匹配，单板料号只在写入归因表时取出
+入库表、返修表已归档时（archive_state，见 TL9000 目录的 archive.py）合并读取归档明细，
+热表只读归档月份及以后的数据（归档后重新导入的早期数据不重复参与归因）
+"""
+import numpy as np
+import pandas as pd
+from pymysql import MySQLError
+from db_utils import create_db_connection, close_db_connection, read_sql
+from config import DB_CONFIG, LOT_CONFIG
+from common.code_dict import code_names
+from common.instrumentation import timed_stage, set_rows
+
+
+def archived_cutoff(conn, table):
+    """
+    表已归档到的月份键（年×12+月-1，记录在 archive_state 中）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        table (str): 热表名
+
+    返回:
+        int: 月份键，未配置归档表或尚未归档时返回None
+    """
+    if table not in LOT_CONFIG["archive_tables"]:
+        return None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT cutoff_key FROM archive_state WHERE table_name = %s", (table,))
+            row = cursor.fetchone()
+    except MySQLError:
+        return None  # 状态表不存在：从未归档
+    return int(row[0]) if row else None
+
+
+def stock_sql(stock_table, archived):
+    """
+    读取入库批次的查询（material_id, date, quantity），已归档时合并归档明细（归档表同样带 material_id 列）
+
+    参数:
+        stock_table (str): 入库表名
+        archived (int): 已归档的月份键，None 表示未归档
+
+    返回:
+        str: 查询语句
+    """
+    sql = f"SELECT material_id, date, quantity FROM `{stock_table}` WHERE quantity > 0 AND material_id IS NOT NULL"
+    if archived is not None:
+        sql += (
+            f" AND date >= '{archived // 12:04d}-{archived % 12 + 1:02d}-01'"
+            f" UNION ALL SELECT material_id, date, quantity FROM `{LOT_CONFIG['archive_tables'][stock_table]}`"
+            " WHERE quantity > 0 AND material_id IS NOT NULL"
+        )
+    return sql
+
+
+def repair_sql(repair_table, archived):
+    """
+    读取返修记录的查询（id, board_id, count, year, month），已归档时合并归档明细（归档保留原返修id）
+
+    参数:
+        repair_table (str): 返修表名
+        archived (int): 已归档的月份键，None 表示未归档
+
+    返回:
+        str: 查询语句
+    """
+    sql = f"SELECT id, board_id, count, year, month FROM `{repair_table}` WHERE board_id IS NOT NULL"
+    if archived is not None:
+        sql += (
+            f" AND year * 12 + month - 1 >= {int(archived)}"
+            f" UNION ALL SELECT id, board_id, count, year, month FROM `{LOT_CONFIG['archive_tables'][repair_table]}`"
+            " WHERE board_id IS NOT NULL"
+        )
+    return sql
+
+
+@timed_stage()
+def load_lot_data(conn, stock_table, repair_table):
+    """
+    从数据库读取入库批次和返修记录（含已归档的明细）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        stock_table (str): 入库表名（material_id, date, quantity）
+        repair_table (str): 返修表名（id, board_id, count, year, month）
+
+    返回:
+        tuple: (stock_df, repair_df)，失败则返回(None, None)
+    """
+    try:
+        stock_df = read_sql(conn, stock_sql(stock_table, archived_cutoff(conn, stock_table)))
+        repair_df = read_sql(conn, repair_sql(repair_table, archived_cutoff(conn, repair_table)))
+        print(f"读取到入库记录{len(stock_df)}行，返修记录{len(repair_df)}行")
+        return stock_df, repair_df
+    except Exception as e:
+        print(f"数据读取失败: {e}")
+        return None, None
+
+
+@timed_stage()
+def prepare_lots(stock_df):
+    """
+    整理入库批次：同一物料同一天的多次入库合并为一个批次
+
+    参数:
+        stock_df (pd.DataFrame): 入库数据（material_id, date, quantity）
+
+    返回:
+        pd.DataFrame: 批次表（material_id, lot_date, lot_qty）
+    """
+    lots = pd.DataFrame({
+        'material_id': stock_df['material_id'].astype(np.int64),
+        'lot_date': pd.to_datetime(stock_df['date'], errors='coerce'),
+        'lot_qty': pd.to_numeric(stock_df['quantity'], errors='coerce'),
+    }).dropna()
+    lots = lots[lots['lot_qty'] > 0]
+    return lots.groupby(['material_id', 'lot_date'], as_index=False)['lot_qty'].sum()
+
+
+@timed_stage()
+def prepare_repairs(repair_df):
+    """
+    整理返修记录：board_id 作为物料代码id（单板料号与物料代码共用字典），返修时间取返修所在月的月末
+    （同月入库的批次也视为返修之前的批次）
+
+    参数:
+        repair_df (pd.DataFrame): 返修数据（id, board_id, count, year, month）
+
+    返回:
+        pd.DataFrame: 返修表（repair_id, material_id, count, repair_month, repair_time）
+    """
+    repairs = pd.DataFrame({
+        'repair_id': repair_df['id'],
+        'material_id': repair_df['board_id'].astype(np.int64),
+        'count': pd.to_numeric(repair_df['count'], errors='coerce').fillna(0),
+        'year': pd.to_numeric(repair_df['year'], errors='coerce'),
+        'month': pd.to_numeric(repair_df['month'], errors='coerce'),
+    })
+    repairs['repair_month'] = pd.to_datetime(
+        repairs[['year', 'month']].assign(day=1), errors='coerce'
+    )
+    repairs = repairs.dropna(subset=['repair_month']).drop(columns=['year', 'month'])
+    repairs['repair_time'] = repairs['repair_month'] + pd.offsets.MonthEnd(0)
+    return repairs
+
+
+@timed_stage()
+def attribute_repairs_asof(lots, repairs):
+    """
+    as-of 匹配：每条返修归属到同物料、返修时间之前最近的一个入库批次
+
+    参数:
+        lots (pd.DataFrame): prepare_lots 的返回值
+        repairs (pd.DataFrame): prepare_repairs 的返回值
+
+    返回:
+        pd.DataFrame: 每条返修一行，未匹配到批次的 lot_date 为 NaT
+    """
+    # merge_asof 要求两边都按时间列排序，by 参数在排序结果上按物料分组查找
+    matched = pd.merge_asof(
+        repairs.sort_values('repair_time'),
+        lots.sort_values('lot_date'),
+        left_on='repair_time',
+        right_on='lot_date',
+        by='material_id',
+        direction='backward'
+    )
+    matched['method'] = 'asof'
+    return matched
+
+
+def day_keys(material_ids, dates):
+    """
+    (物料id, 日期) 编码为单个整数，按 (物料, 日期) 排序的数组可直接二分查找
+
+    参数:
+        material_ids: 物料id（整数数组）
+        dates: 日期（datetime64数组或Series）
+
+    返回:
+        np.ndarray: 物料id × 10^6 + 日期距1970-01-01的天数（加偏移保证非负）
+    """
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    return np.asarray(material_ids, dtype=np.int64) * 1_000_000 + days + 500_000
+
+
+@timed_stage()
+def attribute_repairs_fifo(lots, repairs):
+    """
+    FIFO 消耗：同一物料的返修按时间顺序依次消耗最早入库批次的数量
+    （一条返修含多个数量时，按其第一个数量所在批次归属）。
+    返修时点该物料已入库的数量已被消耗完（或尚无入库批次）时无法归因，且不参与消耗；
+    一条返修最多消耗到返修时点已入库的数量为止（尚未入库的数量不能被消耗）
+
+    消耗位置的递推 x[i+1] = min(x[i] + count[i], available[i]) 可写成闭式：
+    x[i] = S[i] - count[i] + min(base, min_{k<i}(available[k] - S[k]))，S 为同物料返修数量的累计和，
+    因此按物料分组做累计和与累计最小值即可，不需要逐行扫描
+
+    参数:
+        lots (pd.DataFrame): prepare_lots 的返回值
+        repairs (pd.DataFrame): prepare_repairs 的返回值
+
+    返回:
+        pd.DataFrame: 每条返修一行，无法归因时 lot_date 为 NaT
+    """
+    repairs = repairs.sort_values(['material_id', 'repair_time', 'repair_id'], ignore_index=True)
+    matched = repairs.copy()
+    matched['method'] = 'fifo'
+    if lots.empty:
+        matched['lot_date'] = pd.NaT
+        matched['lot_qty'] = np.nan
+        return matched
+    lots = lots.sort_values(['material_id', 'lot_date'], ignore_index=True)
+
+    # 所有物料的批次首尾相接后做全局累计，累计值单调递增，可以直接二分查找
+    lot_end = lots['lot_qty'].to_numpy(dtype=np.float64).cumsum()
+    lot_start = lot_end - lots['lot_qty'].to_numpy(dtype=np.float64)
+    material_base = pd.Series(lot_start, index=lots['material_id']).groupby(level=0).min()
+    base = repairs['material_id'].map(material_base).to_numpy(dtype=np.float64)
+
+    # 返修时点该物料已入库的累计数量（全局累计坐标）：返修时间之前最后一个批次的累计结束位置，
+    # 没有更早的批次时等于该物料的起始位置
+    lot_keys = day_keys(lots['material_id'], lots['lot_date'])
+    repair_keys = day_keys(repairs['material_id'], repairs['repair_time'])
+    available = np.concatenate([[0.0], lot_end])[np.searchsorted(lot_keys, repair_keys, side='right')]
+
+    # 消耗位置：同物料之前的返修数量累计 + 起始位置（返修超出已入库数量时按已入库数量截断，
+    # 截断量为之前各返修时点 已入库累计 - 返修累计 的最小值）；
+    # 没有批次的物料 base 为 NaN，位置为 NaN，比较结果为 False，不会归因
+    materials = repairs['material_id'].to_numpy()
+    counts = repairs['count'].to_numpy(dtype=np.float64)
+    consumed = pd.Series(counts).groupby(materials).cumsum().to_numpy()
+    headroom = pd.Series(available - consumed).groupby(materials).cummin()
+    headroom = headroom.groupby(materials).shift().to_numpy()
+    start = np.where(np.isnan(headroom), base, np.minimum(base, headroom))
+    position = consumed - counts + start
+    valid = position < available
+
+    lot_idx = np.searchsorted(lot_end, np.where(valid, position, 0), side='right')
+    lot_idx = np.minimum(lot_idx, len(lots) - 1)
+    matched['lot_date'] = lots['lot_date'].to_numpy()[lot_idx]
+    matched['lot_qty'] = lots['lot_qty'].to_numpy()[lot_idx]
+    matched.loc[~valid, 'lot_date'] = pd.NaT
+    matched.loc[~valid, 'lot_qty'] = np.nan
+    return matched
+
+
+ATTRIBUTION_METHODS = {
+    'asof': attribute_repairs_asof,
+    'fifo': attribute_repairs_fifo,
+}
+
+
+def create_attribution_table(conn, table_name):
+    """
+    创建返修批次归因表（主键为返修ID + 归因算法）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        table_name (str): 表名
+    """
+    create_sql = f"""
+    CREATE TABLE IF NOT EXISTS `{table_name}` (
+        `repair_id` INT NOT NULL COMMENT '返修表自增主键',
+        `method` VARCHAR(10) NOT NULL COMMENT '归因算法（asof/fifo）',
+        `board_code` VARCHAR(255) COMMENT '单板料号',
+        `repair_month` DATE COMMENT '返修所在月（月初）',
+        `lot_date` DATE COMMENT '归属入库批次日期，无法归因为NULL',
+        `lot_quantity` INT COMMENT '归属入库批次数量',
+        `lag_days` INT COMMENT '批次入库到返修月初的天数',
+        import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (`repair_id`, `method`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(create_sql)
+        print(f"表 `{table_name}` 已创建（若不存在）")
+    except MySQLError as e:
+        print(f"建表失败: {e}")
+
+
+@timed_stage()
+def save_attribution(conn, table_name, matched):
+    """
+    将归因结果写入归因表（同一返修同一算法重复计算时覆盖旧结果）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        table_name (str): 归因表名
+        matched (pd.DataFrame): attribute_repairs_* 的返回值
+    """
+    lag_days = (matched['repair_month'] - matched['lot_date']).dt.days
+    out = pd.DataFrame({
+        'repair_id': matched['repair_id'].astype(int),
+        'method': matched['method'],
+        'board_code': matched['material_id'].map(code_names(conn, matched['material_id'].unique())),
+        'repair_month': matched['repair_month'].dt.date,
+        'lot_date': matched['lot_date'].dt.date,
+        'lot_quantity': matched['lot_qty'],
+        'lag_days': lag_days,
+    })
+    # NaN/NaT 转为 None，写入数据库为 NULL
+    out = out.astype(object).where(out.notna(), None)
+    records = list(out.itertuples(index=False, name=None))
+
+    insert_sql = f"""
+    REPLACE INTO `{table_name}`
+        (repair_id, method, board_code, repair_month, lot_date, lot_quantity, lag_days)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.executemany(insert_sql, records)
+            conn.commit()
+        set_rows(rows_out=len(records))
+        attributed = int(matched['lot_date'].notna().sum())
+        print(f"{matched['method'].iat[0]}: 写入{len(records)}条归因结果，其中{attributed}条匹配到入库批次")
+    except MySQLError as e:
+        print(f"归因结果写入失败: {e}")
+        conn.rollback()
+
+
+def attribute_table(conn, repair_table, attribution_table):
+    """
+    对一个返修表归因：读取入库和返修数据→按配置的算法归因→写入归因表
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        repair_table (str): 返修表名
+        attribution_table (str): 归因结果表名
+    """
+    stock_df, repair_df = load_lot_data(conn, LOT_CONFIG["stock_table"], repair_table)
+    if stock_df is None or repair_df is None or repair_df.empty:
+        print(f"`{repair_table}` 无可归因的返修数据")
+        return
+
+    lots = prepare_lots(stock_df)
+    repairs = prepare_repairs(repair_df)
+    create_attribution_table(conn, attribution_table)
+    for method in LOT_CONFIG["methods"]:
+        matched = ATTRIBUTION_METHODS[method](lots, repairs)
+        if not matched.empty:
+            save_attribution(conn, attribution_table, matched)
+
+
+def main(repair_tables=None):
+    """
+    主函数：对配置的各返修表依次归因
+
+    参数:
+        repair_tables (list): 要归因的返修表，默认为 LOT_CONFIG["attribution_tables"] 中的全部
+    """
+    conn = create_db_connection(
+        DB_CONFIG["host"],
+        DB_CONFIG["user"],
+        DB_CONFIG["password"],
+        DB_CONFIG["database"]
+    )
+    if not conn:
+        return
+
+    try:
+        for repair_table in repair_tables or LOT_CONFIG["attribution_tables"]:
+            attribute_table(conn, repair_table, LOT_CONFIG["attribution_tables"][repair_table])
+    finally:
+        close_db_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
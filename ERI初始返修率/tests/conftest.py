@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : conftest.py
+# @Description :
+
+"""测试公共夹具
+本目录与 TL9000 目录都有 config、db_utils 模块（代码字典是仓库根目录 common 包中的共用模块，按包名导入，不受影响），
+两个目录的测试在同一进程中运行时（在仓库根目录执行 pytest），
+导入本目录模块期间临时移走已加载的同名模块，导入完成后恢复
+"""
+import os
+import sys
+import importlib
+import pytest
+
+ERI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SHARED_NAMES = ["config", "db_utils"]
+
+
+def import_eri_module(name):
+    """
+    以本目录的 config/db_utils 导入本目录的模块
+
+    参数:
+        name (str): 模块名
+
+    返回:
+        module: 导入的模块
+    """
+    saved = {key: sys.modules.pop(key) for key in SHARED_NAMES + [name] if key in sys.modules}
+    sys.path.insert(0, ERI_DIR)
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(ERI_DIR)
+        for key in SHARED_NAMES + [name]:
+            sys.modules.pop(key, None)
+        sys.modules.update(saved)
+
+
+@pytest.fixture(scope="session")
+def lot_attribution():
+    module = import_eri_module("lot_attribution")
+    # 测试进程不写出阶段耗时 JSON（本目录的 config 没有 INSTRUMENT_CONFIG 时为共用模块的默认配置）
+    sys.modules["common.instrumentation"].INSTRUMENT_CONFIG["enabled"] = False
+    return module
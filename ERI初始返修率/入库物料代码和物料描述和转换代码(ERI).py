@@ -9,6 +9,7 @@ import pandas as pd
 from pymysql import MySQLError
 from db_utils import create_db_connection, close_db_connection
 from config import DB_CONFIG, EXCEL_CONFIG
+from common.code_dict import ensure_code_columns, sync_code_ids
 
 def create_material_table(conn, table_name):
     """
@@ -32,6 +33,7 @@ def create_material_table(conn, table_name):
         print(f"表 `{table_name}` 已创建（若不存在）")
     except MySQLError as e:
         print(f"建表失败: {e}")
+    ensure_code_columns(conn, table_name)
 
 def insert_material_data(conn, table_name, excel_path, sheet_name):
     """
@@ -86,8 +88,16 @@ def insert_material_data(conn, table_name, excel_path, sheet_name):
     except Exception as e:
         print(f"Excel处理失败: {e}")
 
-def main():
-    """物料数据处理主函数"""
+def main(excel_path=None):
+    """
+    物料数据处理主函数
+
+    参数:
+        excel_path (str): Excel文件路径，默认使用EXCEL_CONFIG["path"]
+
+    返回:
+        bool: 是否成功（连接失败、代码id回填失败时为False）
+    """
     # 建立数据库连接
     conn = create_db_connection(
     DB_CONFIG["host"],
@@ -97,7 +107,7 @@ def main():
 )
 
     if not conn:
-        return
+        return False
     
     try:
         # 创建物料表
@@ -106,9 +116,11 @@ def main():
         insert_material_data(
             conn,
             DB_CONFIG["material_table"],
-            EXCEL_CONFIG["path"],
+            excel_path or EXCEL_CONFIG["path"],
             EXCEL_CONFIG["material_sheet"]
         )
+        # 新代码分配整数id并回填（失败时批次归因会漏掉未回填的行，本次导入视为失败）
+        return sync_code_ids(conn, DB_CONFIG["material_table"]) is not None
     finally:
         # 关闭连接
         close_db_connection(conn)
@@ -3,8 +3,9 @@
 import pandas as pd
 from datetime import datetime, timedelta
 from pymysql import MySQLError
-from db_utils import create_db_connection, close_db_connection
+from db_utils import create_db_connection, close_db_connection, run_query
 from config import DB_CONFIG, EXCEL_CONFIG
+from common.code_dict import ensure_code_columns, sync_code_ids
 
 def create_repair_table(conn, table_name):
     """创建返修数据表（包含repair_date和result字段）"""
@@ -24,12 +25,12 @@ def create_repair_table(conn, table_name):
             cursor.execute(create_sql)
     except MySQLError as e:
         print(f"建表失败: {e}")
+    ensure_code_columns(conn, table_name)
 
 def get_valid_board_codes(conn):
     """从物料表获取有效board_code列表"""
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT board_code FROM material_stats_eri")
+        with run_query(conn, "SELECT board_code FROM material_stats_eri") as cursor:
             valid_codes = [str(row[0]).strip() for row in cursor.fetchall() if row[0] is not None]
             print(f"从物料表获取到{len(valid_codes)}个有效board_code")
             return valid_codes
@@ -127,8 +128,16 @@ def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes):
     except Exception as e:
         print(f"数据处理错误: {e}")
 
-def main():
-    """主函数：建表→读取数据→入库"""
+def main(excel_path=None):
+    """
+    主函数：建表→读取数据→入库
+
+    参数:
+        excel_path (str): Excel文件路径，默认使用EXCEL_CONFIG["path"]
+
+    返回:
+        bool: 是否成功（连接失败、物料表为空、代码id回填失败时为False）
+    """
     conn = create_db_connection(
         DB_CONFIG["host"],
         DB_CONFIG["user"],
@@ -136,22 +145,24 @@ def main():
         DB_CONFIG["database"]
     )
     if not conn:
-        return
+        return False
     
     try:
         create_repair_table(conn, DB_CONFIG["repair_table"])
         valid_codes = get_valid_board_codes(conn)
         if not valid_codes:
             print("物料表无有效数据，无法继续")
-            return
+            return False
 
         insert_repair_data(
             conn,
             DB_CONFIG["repair_table"],
-            EXCEL_CONFIG["path"],
+            excel_path or EXCEL_CONFIG["path"],
             EXCEL_CONFIG["repair_sheet"],
             valid_codes
         )
+        # 新代码分配整数id并回填（批次归因按 board_id 匹配入库批次，失败时本次导入视为失败）
+        return sync_code_ids(conn, DB_CONFIG["repair_table"]) is not None
     finally:
         close_db_connection(conn)
 
@@ -1,5 +1,7 @@
 import pymysql
 from datetime import datetime, timedelta
+from db_utils import run_query
+from common.instrumentation import timed_stage, set_rows
 
 # 数据库连接配置（原数据库，包含 repair_stats_eri 表）
 src_db_config = {
@@ -21,13 +23,14 @@ dest_db_config = {
 create_table_sql = """
 CREATE TABLE IF NOT EXISTS new_repair_stats (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    board_code VARCHAR(255),
+    board_id INT UNSIGNED COMMENT '单板料号的代码id（common/code_dict.py）',
     time_calculated DATETIME,  -- 这里的“后面定义的时间”，你可根据实际需求调整字段名和类型
     diff_result VARCHAR(255)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 """
 
 # 连接原数据库，查询数据并处理
+@timed_stage()
 def process_and_create_new_table():
     # 连接原数据库
     src_conn = pymysql.connect(**src_db_config)
@@ -42,17 +45,25 @@ def process_and_create_new_table():
         dest_cursor.execute(create_table_sql)
         dest_conn.commit()
         
-        # 查询原表数据
-        query_sql = "SELECT id, board_code, year, month, repair_date FROM repair_stats_eri;"
-        src_cursor.execute(query_sql)
+        # 查询原表数据（关联批次归因结果，lot_attribution.py 生成）
+        query_sql = """
+        SELECT r.id, r.board_id, r.year, r.month, r.repair_date, a.lot_date
+        FROM repair_stats_eri r
+        LEFT JOIN repair_lot_attribution a ON a.repair_id = r.id AND a.method = 'asof';
+        """
+        run_query(src_conn, query_sql, cursor=src_cursor)
         rows = src_cursor.fetchall()
+        set_rows(rows_in=len(rows))
         
         for row in rows:
             id_val = row["id"]
-            board_code = row["board_code"]
+            board_id = row["board_id"]
             year = row["year"]
             month = row["month"]
             repair_date = row["repair_date"]
+            # 优先使用归属的入库批次日期作为出货时间
+            if row["lot_date"] is not None:
+                repair_date = datetime.combine(row["lot_date"], datetime.min.time())
             
             # 构造 year 和 month 对应的当月 1 号的日期
             
@@ -79,7 +90,7 @@ def process_and_create_new_table():
             
             # 插入新数据库表
             insert_sql = """
-            INSERT INTO new_repair_stats (id, board_code, time_calculated, diff_result)
+            INSERT INTO new_repair_stats (id, board_id, time_calculated, diff_result)
             VALUES (%s, %s, %s, %s);
             """
 
@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : __init__.py
+# @Description :
+
+"""各目录共用的模块
+月返修率TL9000、ERI初始返修率、物料描述（生产入库数据）三个目录各自保留 config/db_utils，
+共用的实现放在本包中，按包名导入（from common.code_dict import ...），不会与各目录的同名模块混淆。
+各目录的 db_utils 在导入时将仓库根目录加入 sys.path，脚本先导入本目录的 db_utils 再导入本包。
+
+    code_dict       物料/单板代码字典（整数id）
+    query_log       SQL执行器：查询记录、慢查询日志和执行计划（各目录 db_utils 按本目录配置创建）
+    instrumentation 分阶段耗时统计（使用运行目录 config 中的 INSTRUMENT_CONFIG，没有时使用默认配置）
+"""
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : code_dict.py
+# @Description :
+
+"""物料/单板代码字典模块
+单板料号和物料代码共用一套编码（返修的 board_code 即入库的 material_code），
+字典表 code_dict 为每个代码分配一个整数id（INT UNSIGNED，4字节）。
+各明细表在代码字段旁增加对应的 *_id 列（带索引，外键指向 code_dict.id），
+导入脚本写入数据后调用 sync_code_ids 为新代码分配id并回填，报表的关联和分组改用整数id，
+代码字符串只在最后显示时从字典或物料表取出。回填失败时导入脚本返回失败（未回填的行在报表按id关联时会被漏掉），
+下次导入或运行 backfill_code_ids.py 时补齐。
+
+三个目录的导入脚本和报表共用本模块（按 common.code_dict 导入）；本模块只依赖 pymysql，
+不加载任何目录的 config/db_utils，连接由调用方传入。
+"""
+from pymysql import MySQLError
+
+CODE_DICT_TABLE = "code_dict"
+# 表名 → [(代码字段, id字段), ...]
+CODE_COLUMNS = {
+    "material_stats": [("material_code", "material_id"), ("board_code", "board_id")],
+    "material_stats_eri": [("material_code", "material_id"), ("board_code", "board_id")],
+    "material_info": [("material_code", "material_id")],
+    "material_stock": [("material_code", "material_id")],
+    "repair_stats": [("board_code", "board_id")],
+    "repair_stats_eri": [("board_code", "board_id")],
+    # 归档明细（TL9000 目录 archive.py）
+    "material_stock_archive": [("material_code", "material_id")],
+    "repair_stats_archive": [("board_code", "board_id")],
+}
+
+
+def create_code_dict(conn):
+    """
+    创建代码字典表（若不存在）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{CODE_DICT_TABLE}` (
+            `id` INT UNSIGNED AUTO_INCREMENT PRIMARY KEY COMMENT '代码id',
+            `code` VARCHAR(255) NOT NULL COMMENT '物料代码/单板料号',
+            UNIQUE KEY `uk_code` (`code`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """)
+
+
+def ensure_code_columns(conn, table):
+    """
+    为表补充代码id列、索引和指向 code_dict 的外键（已有则跳过；全量重载替换表后外键需重新添加）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        table (str): 表名（CODE_COLUMNS 的键）
+
+    返回:
+        bool: 是否成功
+    """
+    try:
+        create_code_dict(conn)
+        add_code_columns(conn, table)
+        return True
+    except MySQLError as e:
+        print(f"表 `{table}` 添加代码id列失败: {e}")
+        return False
+
+
+def add_code_columns(conn, table):
+    """ensure_code_columns 的实现：查询已有的列和外键，一条 ALTER TABLE 补齐缺少的部分"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        columns = {row[0] for row in cursor.fetchall()}
+        cursor.execute(
+            "SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME = %s",
+            (table, CODE_DICT_TABLE)
+        )
+        linked = {row[0] for row in cursor.fetchall()}
+        clauses = []
+        for code_col, id_col in CODE_COLUMNS[table]:
+            if id_col not in columns:
+                clauses.append(f"ADD COLUMN `{id_col}` INT UNSIGNED NULL COMMENT '{code_col} 的代码id' AFTER `{code_col}`")
+                clauses.append(f"ADD INDEX `idx_{id_col}` (`{id_col}`)")
+            if id_col not in linked:
+                clauses.append(
+                    f"ADD CONSTRAINT `fk_{table}_{id_col}` FOREIGN KEY (`{id_col}`) REFERENCES `{CODE_DICT_TABLE}` (`id`)"
+                )
+        if clauses:
+            cursor.execute(f"ALTER TABLE `{table}` {', '.join(clauses)}")
+            print(f"表 `{table}` 已添加代码id列/外键")
+
+
+def sync_code_ids(conn, table, base=None):
+    """
+    为表中尚无id的代码分配id（新代码写入字典）并回填 *_id 列，导入脚本写入数据后调用
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        table (str): 要回填的表名（可以是全量重载时的影子表）
+        base (str): 字段声明所用的表名（CODE_COLUMNS 的键），默认同 table
+
+    返回:
+        int: 回填的行数，失败返回None（导入脚本据此判断导入失败）
+    """
+    filled = 0
+    # 只用标准 SQL（不用 INSERT IGNORE、多表 UPDATE），MySQL 和 sqlite 上均可执行；sqlite 游标不支持 with 语句
+    cursor = conn.cursor()
+    try:
+        for code_col, id_col in CODE_COLUMNS[base or table]:
+            # 只扫描尚未回填的行（id 列上有索引），新代码批量写入字典
+            cursor.execute(f"""
+            INSERT INTO `{CODE_DICT_TABLE}` (code)
+            SELECT DISTINCT t.`{code_col}` FROM `{table}` t
+            WHERE t.`{id_col}` IS NULL AND t.`{code_col}` IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM `{CODE_DICT_TABLE}` d WHERE d.code = t.`{code_col}`)
+            """)
+            cursor.execute(f"""
+            UPDATE `{table}`
+            SET `{id_col}` = (SELECT d.id FROM `{CODE_DICT_TABLE}` d WHERE d.code = `{table}`.`{code_col}`)
+            WHERE `{id_col}` IS NULL AND `{code_col}` IS NOT NULL
+            """)
+            filled += cursor.rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"`{table}` 代码id回填失败: {e}")
+        return None
+    finally:
+        cursor.close()
+    if filled:
+        print(f"`{table}` 已回填代码id {filled} 处")
+    return filled
+
+
+def code_names(conn, ids):
+    """
+    代码id转为代码字符串（仅用于最后显示/写出）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        ids: 代码id（可迭代）
+
+    返回:
+        dict: 代码id → 代码
+    """
+    ids = tuple({int(i) for i in ids})
+    if not ids:
+        return {}
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT id, code FROM `{CODE_DICT_TABLE}` WHERE id IN %s", (ids,))
+        return dict(cursor.fetchall())
+
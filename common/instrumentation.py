@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : instrumentation.py
+# @Description :
+
+"""分阶段耗时统计模块
+记录每个阶段（Excel解析、清洗、SQL、透视、导出等）的墙钟时间、CPU时间、输入/输出行数和每秒行数，
+程序退出时打印汇总表并写出一份JSON（INSTRUMENT_CONFIG["dir"] 下，每次运行一个文件），
+夜间任务变慢时可直接对比各阶段耗时找到瓶颈。三个目录的脚本共用本模块（from common.instrumentation import ...），
+配置取运行目录 config.py 中的 INSTRUMENT_CONFIG（导入本模块时已加载的 config 模块），
+没有时（ERI、入库数据目录）使用 DEFAULT_CONFIG。用法：
+
+    @timed_stage()                      # 装饰器：行数取自 DataFrame 参数和返回值，阶段名为函数名
+    def load_data(): ...
+
+    with stage("写入数据库", rows_in=len(df)) as record:   # 上下文管理器
+        ...
+        record["rows_out"] = inserted
+
+    set_rows(rows_in=total_rows)        # 在阶段内部补充行数
+    note_frame("merged", merged_df)     # 记录关键中间结果占用的内存
+
+内存统计默认关闭（tracemalloc 会使程序变慢数倍），INSTRUMENT_CONFIG["memory"] 为 True
+或设置环境变量 REPORT_TRACE_MEMORY=1 时启用，每个阶段额外记录：
+    peak_mb          阶段内 Python 分配内存的峰值（含嵌套阶段）
+    rss_peak_mb      阶段结束时进程 RSS 历史最高值（Windows 不支持，为空）
+    output_mb        返回值中 DataFrame/数组/稠密矩阵的内存占用（memory_usage(deep=True)）
+    frames           note_frame 记录的中间结果内存占用
+    top_allocations  阶段结束时相对阶段开始新增内存最多的代码行（前 memory_top 个，
+                     只统计嵌套深度小于 memory_depth 的阶段）；pandas/numpy 内部的分配
+                     归到调用它的本项目代码行，便于定位是哪一步 merge/透视占用内存
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# 默认配置（运行目录的 config.py 没有 INSTRUMENT_CONFIG 时使用），各项含义见 TL9000 目录的 config.py
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "memory": False,
+    "memory_top": 10,
+    "memory_frames": 25,
+    "memory_depth": 2,
+    # 不放在报表缓存目录（~/.report_cache）下，避免被缓存清理删除
+    "dir": os.path.join(os.path.expanduser("~"), ".report_runs"),
+}
+# 本次运行的配置：脚本先导入本目录的 config/db_utils 再导入本模块，此时 sys.modules 中的 config 即运行目录的配置
+INSTRUMENT_CONFIG = getattr(sys.modules.get("config"), "INSTRUMENT_CONFIG", DEFAULT_CONFIG)
+
+# 本次运行已完成的阶段记录（按完成顺序；常驻进程只保留最近的记录），各线程共用，由 _lock 保护
+_records = deque(maxlen=10000)
+# 已完成的阶段总数（不受 _records 长度上限影响，用于取某时刻之后完成的阶段）
+_completed = 0
+_lock = threading.Lock()
+# 每个线程各自的阶段栈：active 为正在执行的阶段（支持嵌套），peaks 为各阶段目前为止的
+# tracemalloc 峰值（与 active 一一对应）；多线程同时执行阶段时嵌套关系互不干扰
+_local = threading.local()
+_run_started = datetime.now()
+# 是否统计内存（tracemalloc 的峰值是整个进程的，多线程并行时各阶段峰值包含其他线程的分配）
+_memory = INSTRUMENT_CONFIG["memory"] or os.environ.get("REPORT_TRACE_MEMORY") == "1"
+if _memory and not tracemalloc.is_tracing():
+    tracemalloc.start(INSTRUMENT_CONFIG["memory_frames"])
+# 本项目代码所在目录（仓库根目录），用于将第三方库内的分配归到项目代码行
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import resource  # 仅 Linux/macOS
+except ImportError:
+    resource = None
+
+
+def row_count(obj):
+    """
+    对象的行数：稠密矩阵取物料行数，DataFrame/Series/数组取第一维长度，
+    元组取其中各DataFrame/稠密矩阵行数之和，其他返回None
+
+    参数:
+        obj: 任意对象
+
+    返回:
+        int: 行数，无法判断时返回None
+    """
+    if hasattr(obj, "n_rows"):
+        return int(obj.n_rows)
+    if hasattr(obj, "shape") and len(getattr(obj, "shape", ())) > 0:
+        return int(obj.shape[0])
+    if isinstance(obj, tuple):
+        # 只统计表格和稠密矩阵，忽略元组中的按月数组等辅助结果
+        counts = [row_count(item) for item in obj if hasattr(item, "columns") or hasattr(item, "n_rows")]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def _active():
+    """当前线程正在执行的阶段栈"""
+    if not hasattr(_local, "active"):
+        _local.active = []
+        _local.peaks = []
+    return _local.active
+
+
+def _peaks():
+    """当前线程各阶段的 tracemalloc 峰值栈（与 _active() 一一对应）"""
+    _active()
+    return _local.peaks
+
+
+def frame_bytes(obj):
+    """
+    对象中 DataFrame/Series（memory_usage(deep=True)）、数组和稠密矩阵占用的字节数，
+    元组/列表/字典取各元素之和
+
+    参数:
+        obj: 任意对象
+
+    返回:
+        int: 字节数，不含上述对象时返回None
+    """
+    if hasattr(obj, "memory_usage"):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    if hasattr(obj, "n_rows"):
+        return frame_bytes((*obj.labels.values(), *obj.data.values()))
+    if isinstance(obj, dict):
+        return frame_bytes(tuple(obj.values()))
+    if isinstance(obj, (tuple, list)):
+        sizes = [frame_bytes(item) for item in obj]
+        sizes = [size for size in sizes if size is not None]
+        return sum(sizes) if sizes else None
+    return None
+
+
+def to_mb(size):
+    """字节数转为MB（保留1位小数），None原样返回"""
+    return round(size / (1024 * 1024), 1) if size is not None else None
+
+
+def rss_high_water_mb():
+    """进程 RSS 历史最高值（MB），不支持的平台返回None"""
+    if resource is None:
+        return None
+    # ru_maxrss：Linux 单位为KB，macOS 为字节
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return to_mb(maxrss * (1 if sys.platform == "darwin" else 1024))
+
+
+def top_allocations(before, after, limit):
+    """
+    两次 tracemalloc 快照之间新增内存最多的代码行
+
+    参数:
+        before: 阶段开始时的快照
+        after: 阶段结束时的快照
+        limit (int): 返回条数
+
+    返回:
+        list: [{"site": 文件:行号, "size_mb": 新增MB, "count": 新增对象数}, ...]
+    """
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "traceback")
+    sites = {}
+    for stat in stats:
+        # 调用栈从外到内排列，取最内层的项目代码行，调用栈中没有项目代码时取分配发生的位置
+        project = [frame for frame in stat.traceback if frame.filename.startswith(PROJECT_DIR)
+                   and "site-packages" not in frame.filename and frame.filename != __file__]
+        frame = project[-1] if project else stat.traceback[-1]
+        site = f"{os.path.relpath(frame.filename, PROJECT_DIR) if project else frame.filename}:{frame.lineno}"
+        size, count = sites.get(site, (0, 0))
+        sites[site] = (size + stat.size_diff, count + stat.count_diff)
+    ranked = sorted((item for item in sites.items() if item[1][0] > 0), key=lambda item: item[1][0], reverse=True)
+    return [{"site": site, "size_mb": to_mb(size), "count": count} for site, (size, count) in ranked[:limit]]
+
+
+def note_frame(name, obj):
+    """
+    记录当前（最内层）阶段中一个关键中间结果的内存占用，未启用内存统计或不在任何阶段内时忽略
+
+    参数:
+        name (str): 中间结果名
+        obj: DataFrame/数组/稠密矩阵等
+    """
+    active = _active()
+    if _memory and active:
+        active[-1].setdefault("frames", {})[name] = to_mb(frame_bytes(obj))
+
+
+def _memory_enter(record):
+    """阶段开始：将目前的峰值计入外层阶段后重置峰值，按需拍快照"""
+    _, peak = tracemalloc.get_traced_memory()
+    peaks = _peaks()
+    if peaks:
+        peaks[-1] = max(peaks[-1], peak)
+    tracemalloc.reset_peak()
+    peaks.append(0)
+    return tracemalloc.take_snapshot() if record["depth"] < INSTRUMENT_CONFIG["memory_depth"] else None
+
+
+def _memory_exit(record, snapshot):
+    """阶段结束：记录本阶段峰值（同时计入外层阶段）、RSS 最高值和新增内存最多的代码行"""
+    _, peak = tracemalloc.get_traced_memory()
+    peaks = _peaks()
+    stage_peak = max(peaks.pop(), peak)
+    if peaks:
+        peaks[-1] = max(peaks[-1], stage_peak)
+    tracemalloc.reset_peak()
+    record["peak_mb"] = to_mb(stage_peak)
+    record["rss_peak_mb"] = rss_high_water_mb()
+    if snapshot is not None:
+        record["top_allocations"] = top_allocations(
+            snapshot, tracemalloc.take_snapshot(), INSTRUMENT_CONFIG["memory_top"]
+        )
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    记录一个阶段的耗时和行数
+
+    参数:
+        name (str): 阶段名
+        rows_in (int): 输入行数，可在阶段内通过 record["rows_in"] 或 set_rows 补充
+
+    返回:
+        dict: 阶段记录，可在 with 块内设置 rows_in/rows_out
+    """
+    global _completed
+    active = _active()
+    record = {"stage": name, "depth": len(active), "rows_in": rows_in, "rows_out": None}
+    active.append(record)
+    snapshot = _memory_enter(record) if _memory else None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    except BaseException:
+        record["error"] = True
+        raise
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall_start, 4)
+        record["cpu_s"] = round(time.process_time() - cpu_start, 4)
+        rows = record["rows_out"] if record["rows_out"] is not None else record["rows_in"]
+        record["rows_per_s"] = round(rows / record["wall_s"], 1) if rows and record["wall_s"] > 0 else None
+        if _memory:
+            _memory_exit(record, snapshot)
+        active.pop()
+        with _lock:
+            _records.append(record)
+            _completed += 1
+
+
+def set_rows(rows_in=None, rows_out=None):
+    """
+    补充当前（最内层）阶段的输入/输出行数，不在任何阶段内时忽略
+
+    参数:
+        rows_in (int): 输入行数
+        rows_out (int): 输出行数
+    """
+    active = _active()
+    if not active:
+        return
+    if rows_in is not None:
+        active[-1]["rows_in"] = int(rows_in)
+    if rows_out is not None:
+        active[-1]["rows_out"] = int(rows_out)
+
+
+def timed_stage(name=None):
+    """
+    装饰器：将函数调用记录为一个阶段；输入行数为各参数中DataFrame的行数之和，输出行数为返回值的行数
+
+    参数:
+        name (str): 阶段名，默认为函数名
+
+    返回:
+        装饰后的函数
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            counts = [row_count(arg) for arg in (*args, *kwargs.values())]
+            counts = [c for c in counts if c is not None]
+            with stage(stage_name, rows_in=sum(counts) if counts else None) as record:
+                result = func(*args, **kwargs)
+                if record["rows_out"] is None:
+                    record["rows_out"] = row_count(result)
+                if _memory:
+                    record["output_mb"] = to_mb(frame_bytes(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def stage_mark():
+    """当前已完成的阶段数，配合 records_since 取之后完成的阶段（常驻进程按任务统计耗时）"""
+    return _completed
+
+
+def records_since(mark):
+    """
+    某时刻之后完成的阶段记录
+
+    参数:
+        mark (int): 当时 stage_mark 的返回值
+
+    返回:
+        list: 阶段记录（按完成顺序）
+    """
+    with _lock:
+        count = min(_completed - mark, len(_records))
+        return list(_records)[len(_records) - count:] if count > 0 else []
+
+
+def summary():
+    """
+    本次运行的汇总
+
+    返回:
+        dict: 脚本名、开始时间、总耗时、各阶段记录及查询记录（db_utils.run_query）
+    """
+    # db_utils 依赖本模块所在目录的配置，不在模块顶部导入，只读取已加载模块的查询记录
+    db_utils = sys.modules.get("db_utils")
+    with _lock:
+        stages = list(_records)
+    return {
+        "script": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "",
+        "started_at": _run_started.strftime("%Y-%m-%d %H:%M:%S"),
+        "total_wall_s": round((datetime.now() - _run_started).total_seconds(), 4),
+        "memory": _memory,
+        "rss_peak_mb": rss_high_water_mb() if _memory else None,
+        "stages": stages,
+        "queries": list(getattr(db_utils, "QUERY_LOG", [])),
+    }
+
+
+def print_summary(run):
+    """按阶段完成顺序打印耗时汇总表（嵌套阶段缩进显示），启用内存统计时追加内存列和新增内存最多的代码行"""
+    memory_header = f"{'峰值(MB)':>12}{'RSS峰值(MB)':>14}" if run["memory"] else ""
+    print(f"\n{'阶段':<48}{'墙钟(s)':>10}{'CPU(s)':>10}{'输入行':>12}{'输出行':>12}{'行/秒':>14}{memory_header}")
+    for record in run["stages"]:
+        label = "  " * record["depth"] + record["stage"]
+        memory_cols = (f"{record['peak_mb']:>12}"
+                       f"{record['rss_peak_mb'] if record['rss_peak_mb'] is not None else '-':>14}") if run["memory"] else ""
+        print(f"{label:<48}{record['wall_s']:>10.3f}{record['cpu_s']:>10.3f}"
+              f"{record['rows_in'] if record['rows_in'] is not None else '-':>12}"
+              f"{record['rows_out'] if record['rows_out'] is not None else '-':>12}"
+              f"{record['rows_per_s'] if record['rows_per_s'] is not None else '-':>14}{memory_cols}")
+    slowest = sorted(run["queries"], key=lambda query: query["duration_ms"], reverse=True)[:5]
+    if slowest:
+        print(f"\n最慢的查询（共{len(run['queries'])}条）：")
+        for query in slowest:
+            print(f"    {query['duration_ms']:>10.1f} ms{query['rows'] if query['rows'] is not None else '-':>10} 行  "
+                  f"{query['sql'][:80]}")
+    if not run["memory"]:
+        return
+    for record in run["stages"]:
+        if record.get("top_allocations"):
+            print(f"\n{record['stage']} 新增内存最多的代码行：")
+            for item in record["top_allocations"][:3]:
+                print(f"    {item['size_mb']:>10} MB  {item['site']}")
+
+
+def write_summary():
+    """
+    打印汇总表并写出JSON（程序退出时自动调用，没有记录任何阶段时不输出）
+
+    返回:
+        str: JSON文件路径；未启用或无记录时返回None
+    """
+    if not INSTRUMENT_CONFIG["enabled"] or not _records:
+        return None
+    run = summary()
+    print_summary(run)
+    os.makedirs(INSTRUMENT_CONFIG["dir"], exist_ok=True)
+    script = os.path.splitext(run["script"])[0] or "run"
+    file_path = os.path.join(INSTRUMENT_CONFIG["dir"], f"{script}_{_run_started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(run, f, ensure_ascii=False, indent=2)
+    print(f"阶段耗时已保存至：{file_path}")
+    return file_path
+
+
+atexit.register(write_summary)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : query_log.py
+# @Description :
+
+"""查询记录模块
+各目录 db_utils 共用的SQL执行器：记录SQL、参数、耗时、返回行数、传输字节数（仅MySQL），
+耗时超过阈值的查询连同执行计划写入本地慢查询日志。
+每个目录用本目录的 QUERY_LOG_CONFIG 创建一个 QueryLog（配置和记录互不影响），
+db_utils 将其方法导出为 run_query/execute_query/read_sql/read_sql_chunks，记录列表导出为 QUERY_LOG。
+"""
+import os
+import json
+import time
+from collections import deque
+from datetime import datetime
+import pymysql
+
+
+def bytes_sent(conn):
+    """
+    当前会话服务器已发送给客户端的字节数（MySQL 会话状态 Bytes_sent）
+
+    参数:
+        conn: MySQL 数据库连接对象
+
+    返回:
+        int: 字节数
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+        return int(cursor.fetchone()[1])
+
+
+def explain_query(conn, query, params=None):
+    """
+    获取查询的执行计划（仅 SELECT 语句）
+
+    参数:
+        conn: MySQL 数据库连接对象
+        query (str): SQL查询语句
+        params: 查询参数
+
+    返回:
+        list: 执行计划各行（字段名 → 值），非 SELECT 语句或获取失败时返回None
+    """
+    if not query.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("EXPLAIN " + query, params)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"获取执行计划失败: {e}")
+        return None
+
+
+class QueryLog:
+    """
+    记录查询信息的SQL执行器
+
+    参数:
+        config (dict): 查询记录配置（QUERY_LOG_CONFIG：enabled、bytes、slow_ms、explain、max_param_chars、slow_log），
+                       保存的是引用，运行中修改配置立即生效
+        maxlen (int): 保留的记录条数（常驻进程只保留最近的记录）
+    """
+
+    def __init__(self, config, maxlen=10000):
+        self.config = config
+        # 本次运行执行过的查询记录（按执行顺序）
+        self.records = deque(maxlen=maxlen)
+
+    def log_slow_query(self, record):
+        """慢查询追加写入本地日志（每行一条JSON）"""
+        try:
+            os.makedirs(os.path.dirname(self.config["slow_log"]), exist_ok=True)
+            with open(self.config["slow_log"], "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"写入慢查询日志失败: {e}")
+
+    def run_query(self, conn, query, params=None, cursor=None):
+        """
+        执行SQL并记录查询信息：SQL、参数、耗时、返回行数、传输字节数（仅MySQL，config["bytes"] 开启时），
+        耗时超过 config["slow_ms"] 的查询连同执行计划写入慢查询日志。
+        执行失败时抛出异常
+
+        参数:
+            conn: 数据库连接对象（MySQL 或 sqlite）
+            query (str): SQL语句
+            params: 查询参数（tuple/dict），无参数时为None
+            cursor: 在指定游标上执行（如 DictCursor），默认新建游标
+
+        返回:
+            cursor: 执行后的游标对象
+        """
+        return self.execute_logged(conn, query, params, cursor)[0]
+
+    def execute_logged(self, conn, query, params=None, cursor=None):
+        """
+        run_query 的实现，同时返回本次查询的记录：多线程共用记录列表时，
+        调用方（如 read_sql_chunks 读完后补记行数）只修改自己的记录，不能取列表末尾
+
+        参数:
+            conn: 数据库连接对象（MySQL 或 sqlite）
+            query (str): SQL语句
+            params: 查询参数（tuple/dict），无参数时为None
+            cursor: 在指定游标上执行，默认新建游标
+
+        返回:
+            tuple: (执行后的游标对象, 本次查询的记录；未开启记录时为None)
+        """
+        cursor = cursor or conn.cursor()
+        # sqlite 不接受 None 作为参数，无参数时不传
+        args = () if params is None else (params,)
+        if not self.config["enabled"]:
+            cursor.execute(query, *args)
+            return cursor, None
+
+        # 流式游标（SSCursor）的结果未读完前连接上不能执行其他语句：不统计传输字节数、不获取执行计划，
+        # 耗时为服务器开始返回数据的时间；执行后行数未知（rowcount 为 2^64-1），由 read_sql_chunks 读完后补记
+        is_mysql = isinstance(conn, pymysql.connections.Connection)
+        streaming = isinstance(cursor, pymysql.cursors.SSCursor)
+        bytes_before = bytes_sent(conn) if is_mysql and not streaming and self.config["bytes"] else None
+        start = time.perf_counter()
+        cursor.execute(query, *args)
+        duration_ms = (time.perf_counter() - start) * 1000
+        record = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "sql": " ".join(query.split()),
+            "params": repr(params)[:self.config["max_param_chars"]] if params is not None else None,
+            "duration_ms": round(duration_ms, 2),
+            "rows": cursor.rowcount if not streaming and cursor.rowcount is not None and cursor.rowcount >= 0 else None,
+            # 差值含一次状态查询自身的返回（约百余字节）
+            "bytes": bytes_sent(conn) - bytes_before if bytes_before is not None else None,
+        }
+        self.records.append(record)
+        if duration_ms >= self.config["slow_ms"]:
+            if is_mysql and not streaming and self.config["explain"]:
+                record["explain"] = explain_query(conn, query, params)
+            self.log_slow_query(record)
+        return cursor, record
+
+    def execute_query(self, conn, query, params=None):
+        """
+        执行SQL查询并返回游标（用于获取查询结果），查询信息记录方式见 run_query
+
+        参数:
+            conn: 数据库连接对象（已建立的连接）
+            query (str): 要执行的SQL查询语句
+            params: 查询参数（tuple/dict），无参数时为None
+
+        返回:
+            cursor: 执行查询后的游标对象（含查询结果），若失败则返回None
+        """
+        try:
+            return self.run_query(conn, query, params)
+        except Exception as e:
+            print(f"查询执行失败: {e}")
+            return None
+
+    def read_sql(self, conn, query, params=None):
+        """
+        执行查询并读取为DataFrame（代替 pd.read_sql，查询经 run_query 记录）。执行失败时抛出异常
+
+        参数:
+            conn: 数据库连接对象（MySQL 或 sqlite）
+            query (str): SQL查询语句
+            params: 查询参数
+
+        返回:
+            pd.DataFrame: 查询结果
+        """
+        import pandas as pd  # 只检查缓存、不读取数据时不需要加载 pandas
+        cursor = self.run_query(conn, query, params)
+        try:
+            columns = [col[0] for col in cursor.description]
+            return pd.DataFrame.from_records(list(cursor.fetchall()), columns=columns)
+        finally:
+            cursor.close()
+
+    def read_sql_chunks(self, conn, query, chunksize, params=None):
+        """
+        流式执行查询，每次取 chunksize 行转为DataFrame。MySQL 使用服务器端游标（SSCursor），
+        结果集不在客户端整体缓存，内存只与 chunksize 有关；sqlite 连接按普通游标分批读取
+
+        参数:
+            conn: 数据库连接对象（MySQL 或 sqlite）
+            query (str): SQL查询语句
+            chunksize (int): 每块行数
+            params: 查询参数
+
+        返回:
+            generator: 依次产生各块的DataFrame（无结果时不产生）
+        """
+        import pandas as pd
+        is_mysql = isinstance(conn, pymysql.connections.Connection)
+        # 读完后在本次查询自己的记录上补记实际读取的行数
+        cursor, record = self.execute_logged(
+            conn, query, params, cursor=conn.cursor(pymysql.cursors.SSCursor) if is_mysql else None
+        )
+        fetched = 0
+        try:
+            columns = [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                fetched += len(rows)
+                yield pd.DataFrame.from_records(list(rows), columns=columns)
+        finally:
+            if record is not None:
+                record["rows"] = fetched
+            # 提前结束时 SSCursor.close 会读完并丢弃剩余结果，连接随后可继续使用
+            cursor.close()
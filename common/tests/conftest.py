@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : conftest.py
+# @Description :
+
+"""测试公共夹具：仓库根目录加入搜索路径，按包名导入 common（在仓库根目录执行 python -m pytest -q）"""
+import os
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+if os.path.abspath(ROOT_DIR) not in map(os.path.abspath, sys.path):
+    sys.path.insert(0, os.path.abspath(ROOT_DIR))
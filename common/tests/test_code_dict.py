@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_code_dict.py
+# @Description :
+
+"""代码id回填（sync_code_ids 只用标准 SQL，sqlite 上可直接执行）"""
+import sqlite3
+import pytest
+from common.code_dict import CODE_DICT_TABLE, sync_code_ids
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE {CODE_DICT_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, code TEXT UNIQUE)")
+    conn.execute(f"INSERT INTO {CODE_DICT_TABLE} (code) VALUES ('M1')")
+    conn.execute("CREATE TABLE repair_stats (id INTEGER PRIMARY KEY, board_code TEXT, board_id INT)")
+    conn.executemany(
+        "INSERT INTO repair_stats (board_code, board_id) VALUES (?, ?)",
+        [("M1", None), ("M2", None), ("M2", None), ("M3", None), (None, None), ("M1", 1)],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_sync_code_ids_backfills_new_and_existing_codes(conn):
+    assert sync_code_ids(conn, "repair_stats") == 4
+    ids = dict(conn.execute(f"SELECT code, id FROM {CODE_DICT_TABLE}").fetchall())
+    assert set(ids) == {"M1", "M2", "M3"}
+    rows = conn.execute("SELECT board_code, board_id FROM repair_stats ORDER BY id").fetchall()
+    assert rows == [("M1", ids["M1"]), ("M2", ids["M2"]), ("M2", ids["M2"]), ("M3", ids["M3"]), (None, None), ("M1", ids["M1"])]
+    # 已回填的行不再处理，字典中不会出现重复代码
+    assert sync_code_ids(conn, "repair_stats") == 0
+    assert conn.execute(f"SELECT COUNT(*) FROM {CODE_DICT_TABLE}").fetchone()[0] == 3
+
+
+def test_sync_code_ids_reports_failure(conn):
+    conn.execute("CREATE TABLE repair_stats_shadow (board_code TEXT)")
+    # 影子表缺少 id 列：返回None，导入脚本据此判断失败
+    assert sync_code_ids(conn, "repair_stats_shadow", base="repair_stats") is None
+    assert conn.execute(f"SELECT COUNT(*) FROM {CODE_DICT_TABLE}").fetchone()[0] == 1
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_query_log.py
+# @Description :
+
+"""共用查询记录（sqlite）：各目录的 QueryLog 按各自配置记录，互不影响"""
+import json
+import sqlite3
+from collections import deque
+import pytest
+from common.query_log import QueryLog
+
+
+def make_config(tmp_path, name, **overrides):
+    config = {
+        "enabled": True, "bytes": True, "slow_ms": 1000, "explain": True, "max_param_chars": 8,
+        "slow_log": str(tmp_path / f"{name}.jsonl"),
+    }
+    config.update(overrides)
+    return config
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (n INT)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+    yield conn
+    conn.close()
+
+
+def test_instances_keep_separate_records_and_configs(conn, tmp_path):
+    tl = QueryLog(make_config(tmp_path, "tl", slow_ms=0))
+    eri = QueryLog(make_config(tmp_path, "eri"))
+    tl.run_query(conn, "SELECT n FROM t WHERE n > ?", (1234567890,)).close()
+    eri.read_sql(conn, "SELECT n FROM t")
+    assert [r["sql"] for r in tl.records] == ["SELECT n FROM t WHERE n > ?"]
+    assert tl.records[0]["params"] == "(1234567"  # max_param_chars 截断
+    assert [r["sql"] for r in eri.records] == ["SELECT n FROM t"]
+    # 只有阈值为0的实例写出慢查询日志
+    assert json.loads((tmp_path / "tl.jsonl").read_text(encoding="utf-8"))["sql"] == "SELECT n FROM t WHERE n > ?"
+    assert not (tmp_path / "eri.jsonl").exists()
+
+
+def test_config_changes_apply_immediately(conn, tmp_path):
+    config = make_config(tmp_path, "tl")
+    log = QueryLog(config)
+    config["enabled"] = False
+    log.run_query(conn, "SELECT 1").close()
+    assert len(log.records) == 0
+    config["enabled"] = True
+    log.run_query(conn, "SELECT 1").close()
+    assert len(log.records) == 1
+
+
+def test_bounded_records(conn, tmp_path):
+    log = QueryLog(make_config(tmp_path, "tl"), maxlen=2)
+    for n in range(3):
+        log.run_query(conn, f"SELECT {n}").close()
+    assert [r["sql"] for r in log.records] == ["SELECT 1", "SELECT 2"]
+
+
+class InterleavedRecords(deque):
+    """模拟其他线程在本线程追加记录后立即追加了一条记录"""
+
+    def append(self, record):
+        super().append(record)
+        super().append({"sql": "other thread", "rows": None})
+
+
+def test_read_sql_chunks_updates_its_own_record(conn, tmp_path):
+    log = QueryLog(make_config(tmp_path, "tl"))
+    log.records = InterleavedRecords(maxlen=10)
+    chunks = list(log.read_sql_chunks(conn, "SELECT n FROM t", 2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert [(r["sql"], r["rows"]) for r in log.records] == [("SELECT n FROM t", 3), ("other thread", None)]
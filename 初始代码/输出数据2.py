@@ -1,6 +1,7 @@
 import pandas as pd
 import pymysql
 import os
+import argparse
 from datetime import datetime
 
 # 数据库配置（需修改为实际信息）
@@ -11,25 +12,39 @@ DB_CONFIG = {
     "database": "三江"
 }
 
+def month_key(year, month):
+    """年、月转为整数月份键（年×12+月-1），相邻月份相差1，可直接比较和排序"""
+    return year * 12 + month - 1
+
+def month_key_from_label(label):
+    """ "2023-01" 格式的月份转为整数月份键"""
+    year, month = label.split('-')[:2]
+    return month_key(int(year), int(month))
+
+def month_label(key):
+    """整数月份键转为 "Jan-23" 格式标签（仅导出时使用）"""
+    return datetime(key // 12, key % 12 + 1, 1).strftime('%b-%y')
+
 def get_windows_desktop():
     """获取Windows桌面路径"""
     return os.path.join(os.environ["USERPROFILE"], "Desktop")
 
-def load_database_data():
-    """从数据库加载物料和返修数据"""
+def load_database_data(start="2023-01", end=None):
+    """从数据库加载物料和统计区间（"2023-01"格式，闭区间）内的返修数据，区间条件在数据库中过滤"""
     try:
         conn = pymysql.connect(**DB_CONFIG)
         # 读取物料主表（material_stats）
         material_sql = "SELECT material_code, material_desc, board_code FROM material_stats"
         material_df = pd.read_sql(material_sql, conn)
         
-        # 读取返修数据（repair_stats）
-        repair_sql = "SELECT board_code, count, year, month FROM repair_stats"
-        repair_df = pd.read_sql(repair_sql, conn)
+        # 读取统计区间内的返修数据（repair_stats，条件与 period_key 生成列定义相同，可走 idx_period 索引）
+        repair_sql = "SELECT board_code, count, year, month FROM repair_stats WHERE year * 12 + month - 1 BETWEEN %s AND %s"
+        first = month_key_from_label(start) if start else 0
+        last = month_key_from_label(end) if end else month_key(9999, 12)
+        repair_df = pd.read_sql(repair_sql, conn, params=(first, last))
         
-        # 转换月份格式为 "Jan-23" 格式（2023年1月）
-        repair_df['month_str'] = pd.to_datetime(repair_df[['year', 'month']].assign(DAY=1)) \
-            .dt.strftime('%b-%y')  # 格式：Jan-23（2023年1月）
+        # 年月转为整数月份键，显示用的 "Jan-23" 标签在生成报表最后一步再转换
+        repair_df['period'] = month_key(repair_df['year'], repair_df['month'])
         
         conn.close()
         return material_df, repair_df
@@ -38,47 +53,29 @@ def load_database_data():
         return None, None
 
 def generate_pivot_report(material_df, repair_df):
-    """生成数据透视表（仅含2023年及以后数据）"""
+    """生成数据透视表（返修数据已按统计区间读取）"""
     if material_df is None or repair_df is None:
         return None
     
-    # 合并物料与返修数据
+    if repair_df.empty:
+        print("统计区间内无有效月份数据")
+        return None
     merged_data = pd.merge(material_df, repair_df, on='board_code', how='left')
     
-    # 创建数据透视表
+    # 创建数据透视表（列为整数月份键，pivot_table 已按键从小到大即时间顺序排列）
+    material_cols = ['material_code', 'material_desc', 'board_code']
     pivot_table = merged_data.pivot_table(
-        index=['material_code', 'material_desc', 'board_code'],
-        columns='month_str',
+        index=material_cols,
+        columns='period',
         values='count',
         aggfunc='sum',
         fill_value=0  # 空值填充为0
     ).reset_index()
+    month_cols = [col for col in pivot_table.columns if col not in material_cols]
     
-    # 过滤2023年以前的月份（仅保留2023年及以后）
-    if len(pivot_table.columns) > 3:
-        material_cols = ['material_code', 'material_desc', 'board_code']
-        month_cols = pivot_table.columns[3:]
-        
-        # 筛选逻辑：解析月份字符串，保留2023年及以后的列
-        filtered_months = []
-        for col in month_cols:
-            try:
-                month_year = pd.to_datetime(col, format='%b-%y')  # 转为日期对象
-                if month_year.year >= 2023:  # 保留2023年及以后数据
-                    filtered_months.append(col)
-            except:
-                continue  # 忽略格式错误的列
-        
-        if not filtered_months:
-            print("无2023年及以后的有效月份数据")
-            return None
-        
-        # 重构数据框（仅保留筛选后的月份列）
-        pivot_table = pivot_table[material_cols + filtered_months]
-    
-    # 添加累计行（仅统计2023年及以后的数据）
-    if not pivot_table.empty and filtered_months:
-        total_row = pivot_table[filtered_months].sum().to_dict()  # 仅对筛选后的月份求和
+    # 添加累计行（统计区间内各月之和）
+    if not pivot_table.empty and month_cols:
+        total_row = pivot_table[month_cols].sum().to_dict()
         total_row.update({
             'material_code': '',
             'material_desc': '累计',
@@ -86,22 +83,18 @@ def generate_pivot_report(material_df, repair_df):
         })
         pivot_table = pd.concat([pivot_table, pd.DataFrame([total_row])], ignore_index=True)
     
-    # 按时间排序月份列（确保顺序正确）
-    if len(filtered_months) > 0:
-        sorted_months = sorted(filtered_months, key=lambda x: pd.to_datetime(x, format='%b-%y'))
-        pivot_table = pivot_table[material_cols + sorted_months]
-    
-    return pivot_table
+    # 导出前才把月份键转换为 "Jan-23" 格式的列名
+    return pivot_table.rename(columns={col: month_label(int(col)) for col in month_cols})
 
-def export_to_desktop(report_df):
-    """保存报表到Windows桌面（文件名带时间戳）"""
+def export_to_desktop(report_df, start="2023-01"):
+    """保存报表到Windows桌面（文件名带统计起始月份和时间戳）"""
     if report_df is None or report_df.empty:
         print("无有效数据，无法保存")
         return
     
     # 生成唯一文件名（含时间戳）
     time_tag = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"返修统计_2023及以后_{time_tag}.xlsx"
+    file_name = f"返修统计_{start or '全部'}及以后_{time_tag}.xlsx"
     desktop = get_windows_desktop()
     save_location = os.path.join(desktop, file_name)
     
@@ -112,7 +105,11 @@ def export_to_desktop(report_df):
         print(f"保存失败: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="返修统计透视表")
+    parser.add_argument("--start", default="2023-01", help="统计区间起始月份，默认 2023-01")
+    parser.add_argument("--end", help="统计区间结束月份（含），默认到最新月份")
+    args = parser.parse_args()
     # 主流程执行
-    material_data, repair_data = load_database_data()
+    material_data, repair_data = load_database_data(args.start, args.end)
     report = generate_pivot_report(material_data, repair_data)
-    export_to_desktop(report)
\ No newline at end of file
+    export_to_desktop(report, args.start)
\ No newline at end of file
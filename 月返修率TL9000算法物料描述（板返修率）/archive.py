@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : archive.py
+# @Description :
+
+"""历史数据归档模块
+报表只统计近期数据，早年的明细留在 repair_stats、material_stock 中会拖慢每次扫描和索引维护。
+归档（python archive.py 或 cli.py archive）将早于 ARCHIVE_CONFIG["cutoff"] 的明细分批移出：
+    明细原样写入压缩归档表（{表名}_archive，ROW_FORMAT=COMPRESSED），供追溯核对
+    按月汇总累加到月度汇总表：repair_stats_monthly（单板id × 年月 返修量）、
+                             material_stock_monthly（物料id × 月份 入库量）
+月度汇总表和归档明细都以整数代码id（common/code_dict.py）为键，归档前先为热表回填id；
+旧版本按代码字符串建立的月度汇总表在建表时改建为按id汇总。
+每批的 汇总、写归档、删除 在同一事务中提交，中途失败不会丢失或重复统计。
+每张热表归档完成后，归档到的月份记录在 archive_state 中（archived_cutoff）。报表读取数据时
+（repair_rows_sql/stock_rows_sql）合并月度汇总，热表只读该月及以后的明细：早于该月的数据只来自月度汇总，
+之后重新导入的早期明细不会重复统计（导入脚本也会跳过这些数据）。报表本来就按月汇总，合并后的结果与归档前相同。
+配置了归档月份但还没有运行过归档时，archive_state 不存在，报表照常只读热表。
+"""
+from pymysql import MySQLError
+from db_utils import create_db_connection, close_db_connection, run_query
+from config import DB_CONFIG1, ARCHIVE_CONFIG
+from period_utils import month_key_from_label, period_condition, date_condition
+from common.code_dict import CODE_DICT_TABLE, CODE_COLUMNS, create_code_dict, ensure_code_columns, sync_code_ids
+from common.instrumentation import timed_stage, set_rows
+
+# 热表 → (归档表, 归档条件函数(起始月份键, 结束月份键), 明细字段, 汇总语句)
+# 汇总语句将本批明细按月累加到月度汇总表，参数为本批明细的 id 列表
+ARCHIVE_TABLES = {
+    "repair_stats": (
+        "repair_stats_archive",
+        lambda start, end: period_condition("year", "month", start, end),
+        "id, board_code, board_id, count, year, month, import_time",
+        """
+        INSERT INTO repair_stats_monthly (board_id, year, month, repair_qty)
+        SELECT board_id, year, month, SUM(count) FROM repair_stats WHERE id IN %s
+        GROUP BY board_id, year, month
+        ON DUPLICATE KEY UPDATE repair_qty = repair_qty + VALUES(repair_qty)
+        """,
+    ),
+    "material_stock": (
+        "material_stock_archive",
+        lambda start, end: date_condition("date", start, end),
+        "id, material_code, material_id, date, quantity, import_time",
+        """
+        INSERT INTO material_stock_monthly (material_id, month, inbound_qty)
+        SELECT material_id, DATE_FORMAT(date, '%%Y-%%m-01'), SUM(quantity) FROM material_stock WHERE id IN %s
+        GROUP BY material_id, DATE_FORMAT(date, '%%Y-%%m-01')
+        ON DUPLICATE KEY UPDATE inbound_qty = inbound_qty + VALUES(inbound_qty)
+        """,
+    ),
+}
+
+# 归档状态表：每张热表已完成归档的月份键（首次归档进行中为0，此时热表不按月份过滤）
+STATE_TABLE = "archive_state"
+
+# 月度汇总表 → (代码字段, id字段, 其余分组字段, 数量字段)：旧版本按代码字段建表，create_archive_tables 改建为按id
+SUMMARY_KEYS = {
+    "repair_stats_monthly": ("board_code", "board_id", "year, month", "repair_qty"),
+    "material_stock_monthly": ("material_code", "material_id", "month", "inbound_qty"),
+}
+
+# 月度汇总表和归档状态表结构（import_time 随每次累加更新，供报表缓存指纹判断数据是否变化）
+SUMMARY_TABLES_SQL = {
+    "repair_stats_monthly": f"""
+    CREATE TABLE IF NOT EXISTS `repair_stats_monthly` (
+        `board_id` INT UNSIGNED NOT NULL COMMENT '单板料号的代码id',
+        `year` INT NOT NULL,
+        `month` INT NOT NULL,
+        `repair_qty` BIGINT NOT NULL DEFAULT 0 COMMENT '已归档的当月返修量',
+        import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (`board_id`, `year`, `month`),
+        FOREIGN KEY (`board_id`) REFERENCES `{CODE_DICT_TABLE}` (`id`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    "material_stock_monthly": f"""
+    CREATE TABLE IF NOT EXISTS `material_stock_monthly` (
+        `material_id` INT UNSIGNED NOT NULL COMMENT '物料代码的代码id',
+        `month` DATE NOT NULL COMMENT '月份（当月1日）',
+        `inbound_qty` BIGINT NOT NULL DEFAULT 0 COMMENT '已归档的当月入库量',
+        import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (`material_id`, `month`),
+        INDEX `idx_month` (`month`),
+        FOREIGN KEY (`material_id`) REFERENCES `{CODE_DICT_TABLE}` (`id`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    STATE_TABLE: f"""
+    CREATE TABLE IF NOT EXISTS `{STATE_TABLE}` (
+        `table_name` VARCHAR(64) NOT NULL PRIMARY KEY COMMENT '热表名',
+        `cutoff_key` INT NOT NULL COMMENT '已完成归档的月份键（早于该月的明细已移出热表）',
+        import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+}
+
+
+def cutoff_key():
+    """
+    当前配置的归档月份
+
+    返回:
+        int: 整数月份键（早于该月的明细已归档），未配置归档时返回None
+    """
+    return month_key_from_label(ARCHIVE_CONFIG["cutoff"]) if ARCHIVE_CONFIG["cutoff"] else None
+
+
+def archived_cutoff(conn, table):
+    """
+    热表已归档到的月份键（archive_state 中的记录）
+
+    参数:
+        conn: 数据库连接对象（MySQL 或 sqlite）
+        table (str): 热表名
+
+    返回:
+        int: 月份键，早于该月的数据只从月度汇总读取；不归档的表、尚未运行过归档时返回None
+    """
+    if table not in ARCHIVE_TABLES:
+        return None
+    try:
+        cursor = run_query(conn, f"SELECT cutoff_key FROM `{STATE_TABLE}` WHERE table_name = '{table}'")
+    except Exception:
+        return None  # 状态表不存在：从未归档
+    row = cursor.fetchone()
+    cursor.close()
+    return int(row[0]) if row else None
+
+
+def hot_start(start, archived):
+    """合并月度汇总时热表的起始月份键：不早于已归档的月份"""
+    if archived is None or (start is not None and start >= archived):
+        return start
+    return archived
+
+
+def repair_rows_sql(start, end, archived=None):
+    """
+    读取统计区间内返修数据的查询（字段 board_code, count, year, month），
+    热表先按整数 board_id 和年月汇总，已归档时合并 repair_stats_monthly 中按 board_id 的月度汇总
+    （热表只读归档月份及以后的明细），合并后的行再从 code_dict 取出单板料号
+
+    参数:
+        start (int): 起始月份键，None 表示不限
+        end (int): 结束月份键，None 表示不限
+        archived (int): 已归档的月份键（archived_cutoff），None 表示未归档
+
+    返回:
+        str: 查询语句
+    """
+    rows = (
+        "SELECT board_id, SUM(count) AS count, year, month FROM repair_stats "
+        f"WHERE {period_condition('year', 'month', hot_start(start, archived), end)} GROUP BY board_id, year, month"
+    )
+    if archived is not None:
+        rows += (
+            " UNION ALL SELECT board_id, repair_qty, year, month FROM repair_stats_monthly "
+            f"WHERE {period_condition('year', 'month', start, end)}"
+        )
+    return (
+        f"SELECT d.code AS board_code, r.count, r.year, r.month FROM ({rows}) r "
+        f"JOIN `{CODE_DICT_TABLE}` d ON d.id = r.board_id"
+    )
+
+
+def stock_rows_sql(start, end, archived=None):
+    """
+    读取区间内入库数据的查询（字段 material_code, material_desc, date, quantity，按整数 material_id 关联物料信息表补充描述），
+    已归档时合并 material_stock_monthly 中的月度汇总（日期为当月1日），热表只读归档月份及以后的明细
+
+    参数:
+        start (int): 起始月份键，None 表示不限
+        end (int): 结束月份键，None 表示不限
+        archived (int): 已归档的月份键（archived_cutoff），None 表示未归档
+
+    返回:
+        str: 查询语句
+    """
+    sql = f"""
+        SELECT mi.material_code, mi.material_desc, ms.date, ms.quantity
+        FROM material_stock ms
+        JOIN material_info mi ON ms.material_id = mi.material_id
+        WHERE {date_condition('ms.date', hot_start(start, archived), end)}
+    """
+    if archived is not None:
+        sql += f"""
+        UNION ALL
+        SELECT mi.material_code, mi.material_desc, sm.month, sm.inbound_qty
+        FROM material_stock_monthly sm
+        JOIN material_info mi ON sm.material_id = mi.material_id
+        WHERE {date_condition('sm.month', start, end)}
+        """
+    return sql
+
+
+def upgrade_summary_table(conn, table):
+    """
+    旧版本按代码字符串建立的月度汇总表改建为按代码id（新表建好并写入后与旧表原子交换，旧表删除）
+
+    参数:
+        conn: 数据库连接对象
+        table (str): 月度汇总表名（SUMMARY_KEYS 的键）
+    """
+    code_col, id_col, other_cols, qty_col = SUMMARY_KEYS[table]
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+            "AND COLUMN_NAME = %s",
+            (table, code_col)
+        )
+        if not cursor.fetchone():
+            return
+        cursor.execute(f"DROP TABLE IF EXISTS `{table}_new`")
+        cursor.execute(SUMMARY_TABLES_SQL[table].replace(f"`{table}`", f"`{table}_new`", 1))
+        cursor.execute(f"""
+        INSERT INTO `{CODE_DICT_TABLE}` (code)
+        SELECT DISTINCT s.`{code_col}` FROM `{table}` s
+        WHERE NOT EXISTS (SELECT 1 FROM `{CODE_DICT_TABLE}` d WHERE d.code = s.`{code_col}`)
+        """)
+        cursor.execute(f"""
+        INSERT INTO `{table}_new` ({id_col}, {other_cols}, {qty_col})
+        SELECT d.id, {other_cols}, SUM(s.{qty_col}) FROM `{table}` s
+        JOIN `{CODE_DICT_TABLE}` d ON d.code = s.`{code_col}`
+        GROUP BY d.id, {other_cols}
+        """)
+        cursor.execute(f"RENAME TABLE `{table}` TO `{table}_old`, `{table}_new` TO `{table}`")
+        cursor.execute(f"DROP TABLE `{table}_old`")
+    conn.commit()
+    print(f"月度汇总表 `{table}` 已改为按 {id_col} 汇总")
+
+
+def create_archive_tables(conn):
+    """
+    创建压缩归档表（结构同热表）、月度汇总表和归档状态表（已存在则跳过），
+    旧版本的月度汇总表改建为按代码id，归档表补充代码id列并回填（升级前已归档的明细）
+
+    参数:
+        conn: 数据库连接对象
+    """
+    with conn.cursor() as cursor:
+        for table, (archive, *_rest) in ARCHIVE_TABLES.items():
+            cursor.execute(f"SHOW TABLES LIKE '{archive}'")
+            if cursor.fetchone():
+                continue
+            cursor.execute(f"CREATE TABLE `{archive}` LIKE `{table}`")
+            # 压缩只在建表时设置一次（ALTER 会重建整张表）
+            cursor.execute(f"ALTER TABLE `{archive}` ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8")
+            print(f"已创建压缩归档表 `{archive}`")
+    create_code_dict(conn)
+    for table in SUMMARY_KEYS:
+        upgrade_summary_table(conn, table)
+    with conn.cursor() as cursor:
+        for create_sql in SUMMARY_TABLES_SQL.values():
+            cursor.execute(create_sql)
+    for archive, *_rest in ARCHIVE_TABLES.values():
+        if not ensure_code_columns(conn, archive) or sync_code_ids(conn, archive) is None:
+            raise MySQLError(f"归档表 `{archive}` 代码id回填失败")
+
+
+@timed_stage()
+def archive_table(conn, table, cutoff, batch):
+    """
+    将热表中早于归档月份的明细分批移入归档表，同时累加月度汇总，全部完成后记录归档月份。
+    早于上次归档月份的明细（归档后又导入的重复数据，报表不读取）留在热表中，不再累加到汇总
+
+    参数:
+        conn: 数据库连接对象
+        table (str): 热表名（ARCHIVE_TABLES 的键）
+        cutoff (int): 归档月份键，早于该月的明细被移出
+        batch (int): 每批移动的行数（每批一个事务）
+
+    返回:
+        int: 移出的行数，中途失败时为None（已提交的批次保留，归档月份不更新）
+    """
+    archive, build_condition, columns, summary_sql = ARCHIVE_TABLES[table]
+    # 月度汇总按代码id累加：先为热表中尚无id的行回填，仍无id的行（无代码）不归档
+    if sync_code_ids(conn, table) is None:
+        return None
+    id_col = CODE_COLUMNS[table][0][1]
+    with conn.cursor() as cursor:
+        # 首次归档时先登记（月份键0）：归档进行中报表即开始合并汇总表，已移出的批次不会从报表中消失
+        cursor.execute(
+            f"INSERT INTO `{STATE_TABLE}` (table_name, cutoff_key) VALUES (%s, 0) "
+            "ON DUPLICATE KEY UPDATE cutoff_key = cutoff_key",
+            (table,)
+        )
+    conn.commit()
+    archived = archived_cutoff(conn, table)
+    condition = build_condition(archived or None, int(cutoff) - 1)
+    moved = 0
+    while True:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT id FROM `{table}` WHERE {condition} AND `{id_col}` IS NOT NULL ORDER BY id LIMIT {int(batch)}"
+                )
+                ids = tuple(row[0] for row in cursor.fetchall())
+                if not ids:
+                    break
+                cursor.execute(summary_sql, (ids,))
+                cursor.execute(f"INSERT INTO `{archive}` ({columns}) SELECT {columns} FROM `{table}` WHERE id IN %s",
+                               (ids,))
+                cursor.execute(f"DELETE FROM `{table}` WHERE id IN %s", (ids,))
+            conn.commit()
+        except MySQLError as e:
+            conn.rollback()
+            print(f"`{table}` 归档失败（已归档 {moved} 行，本批已回滚）: {e}")
+            return None
+        moved += len(ids)
+        print(f"`{table}` 已归档 {moved} 行")
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE `{STATE_TABLE}` SET cutoff_key = GREATEST(cutoff_key, %s) WHERE table_name = %s",
+            (int(cutoff), table)
+        )
+    conn.commit()
+    set_rows(rows_out=moved)
+    return moved
+
+
+def main():
+    """
+    归档主函数：将早于 ARCHIVE_CONFIG["cutoff"] 的明细移入归档表
+    （归档月份只从配置读取：报表按同一配置判断是否需要合并月度汇总，两者不一致会漏读数据）
+    """
+    cutoff = cutoff_key()
+    if cutoff is None:
+        print("未配置归档月份（ARCHIVE_CONFIG[\"cutoff\"]），不执行归档")
+        return
+
+    conn = create_db_connection(**DB_CONFIG1)
+    if not conn:
+        return
+    try:
+        create_archive_tables(conn)
+        for table in ARCHIVE_TABLES:
+            moved = archive_table(conn, table, cutoff, ARCHIVE_CONFIG["batch"])
+            if moved is not None:
+                print(f"`{table}` 共归档 {moved} 行（{ARCHIVE_CONFIG['cutoff']} 以前）")
+    except MySQLError as e:
+        print(f"创建归档表失败: {e}")
+    finally:
+        close_db_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : backfill_code_ids.py
+# @Description :
+
+"""为已有数据补充代码id列并回填（升级后运行一次，之后由各导入脚本维护），代码字典见 common/code_dict.py
+
+    python backfill_code_ids.py
+"""
+import sys
+from pymysql import MySQLError
+from db_utils import create_db_connection, close_db_connection
+from config import DB_CONFIG1
+from common.code_dict import CODE_COLUMNS, ensure_code_columns, sync_code_ids
+
+
+def main():
+    """
+    为已存在的各表补充代码id列并回填
+
+    返回:
+        bool: 是否全部成功
+    """
+    conn = create_db_connection(**DB_CONFIG1)
+    if not conn:
+        return False
+    ok = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW TABLES")
+            existing = {row[0] for row in cursor.fetchall()}
+        for table in CODE_COLUMNS:
+            if table in existing:
+                ok = ensure_code_columns(conn, table) and sync_code_ids(conn, table) is not None and ok
+    except MySQLError as e:
+        print(f"代码字典初始化失败: {e}")
+        ok = False
+    finally:
+        close_db_connection(conn)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : benchmark_pipeline.py
+# @Description :
+
+"""全流程规模基准测试
+对每个返修行数（默认 1千、1万、10万、100万，可到1000万）：
+    1. 重建独立的测试数据库 BENCH_CONFIG["database"]（不影响正式数据；与正式库同名时拒绝运行）
+    2. 生成模拟工作簿（synthetic_workbook.py）
+    3. 依次运行导入、ERI、报表各阶段，每个阶段在独立子进程中运行，记录耗时和子进程内存峰值
+结果打印为表格并写出JSON（INSTRUMENT_CONFIG["dir"] 下），用于跟踪性能回退、对比不同实现。
+说明：
+    - 物料导入脚本固定只读前13行、入库导入脚本固定只读181行×29个月，
+      其余模拟物料和入库数量由 seed_materials 阶段直接写入数据库，使返修和报表阶段按真实规模运行
+    - 返修行数超过 Excel 单表上限（1048575行）时不生成工作簿、跳过各导入脚本，
+      返修数据由 load_repairs 阶段直接写入数据库
+    - 内存峰值通过 os.wait4 获取，仅 Linux/macOS 可用，Windows 下记为空
+新增或替换实现时在 STAGES 中增加阶段即可对比。
+
+    python benchmark_pipeline.py [返修行数 ...]
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+from datetime import datetime
+import pymysql
+from config import DB_CONFIG, DB_CONFIG1, BENCH_CONFIG, INSTRUMENT_CONFIG
+from 入库返修数据 import PERIOD_KEY_COLUMN, PERIOD_INDEX
+from common.code_dict import ensure_code_columns, sync_code_ids
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ERI_DIR = os.path.join(CURRENT_DIR, "..", "ERI初始返修率")
+STOCK_DIR = os.path.join(CURRENT_DIR, "..", "物料描述（生产入库数据）")
+
+# 各目录脚本运行前，将其数据库配置指向测试库，报表输出、缓存、快照和慢查询日志指向本次测试的目录，
+# 并关闭阶段耗时 JSON（ERI、入库数据目录没有 INSTRUMENT_CONFIG，关闭共用模块的默认配置）
+PREAMBLE = {
+    "tl": (
+        "import config\n"
+        "for c in (config.DB_CONFIG, config.DB_CONFIG1): c['database'] = {database!r}\n"
+        "config.CACHE_CONFIG['dir'] = {work_dir!r} + '/cache'\n"
+        "config.SNAPSHOT_CONFIG['dir'] = {work_dir!r} + '/snapshots'\n"
+        "config.OUTPUT_CONFIG['dir'] = {work_dir!r} + '/out'\n"
+        "config.QUERY_LOG_CONFIG['slow_log'] = {work_dir!r} + '/slow_queries.jsonl'\n"
+        "config.INSTRUMENT_CONFIG['enabled'] = False\n"
+    ),
+    "eri": (
+        "import config\n"
+        "for c in (config.DB_CONFIG, config.DB_CONFIG1): c['database'] = {database!r}\n"
+        "config.QUERY_LOG_CONFIG['slow_log'] = {work_dir!r} + '/slow_queries_eri.jsonl'\n"
+        "import db_utils\n"
+        "from common.instrumentation import INSTRUMENT_CONFIG\n"
+        "INSTRUMENT_CONFIG['enabled'] = False\n"
+    ),
+    "stock": (
+        "import db_utils\n"
+        "from common.instrumentation import INSTRUMENT_CONFIG\n"
+        "INSTRUMENT_CONFIG['enabled'] = False\n"
+    ),
+}
+
+# 阶段列表：(阶段名, 运行目录, 预处理类型, 运行条件, 代码)，代码中可使用 {path} {database} {n_repairs} {n_materials}
+# 运行条件：返修行数未超过 Excel 上限时运行 "excel" 阶段，超过时运行 "direct" 阶段，None 始终运行
+# 物料导入脚本为普通 INSERT，seed_materials 需在两个物料导入之后运行
+STAGES = [
+    ("generate_workbook", CURRENT_DIR, "tl", "excel",
+     "from synthetic_workbook import generate_frames, write_workbook\n"
+     "write_workbook({path!r}, generate_frames({n_repairs}, {n_materials}))"),
+    ("import_material", CURRENT_DIR, "tl", "excel",
+     "import 入库物料代码和物料描述和转换代码 as m\nm.main({path!r})"),
+    ("eri_import_material", ERI_DIR, "eri", "excel",
+     "import importlib\nimportlib.import_module('入库物料代码和物料描述和转换代码(ERI)').main({path!r})"),
+    ("import_stock", STOCK_DIR, "stock", "excel",
+     "import 入库入库时间和入库数量 as m\nm.DB_CONFIG['database'] = {database!r}\nm.main({path!r})"),
+    ("seed_materials", CURRENT_DIR, "tl", None,
+     "from synthetic_workbook import generate_frames\nfrom benchmark_pipeline import seed_materials\n"
+     "seed_materials(generate_frames({n_repairs}, {n_materials}), {database!r})"),
+    ("import_repair", CURRENT_DIR, "tl", "excel",
+     "import 入库返修数据 as m\nm.main({path!r})"),
+    ("eri_import_repair", ERI_DIR, "eri", "excel",
+     "import 入库返修数据_eri as m\nm.main({path!r})"),
+    ("load_repairs", CURRENT_DIR, "tl", "direct",
+     "from synthetic_workbook import generate_frames\nfrom benchmark_pipeline import load_repairs\n"
+     "load_repairs(generate_frames({n_repairs}, {n_materials}), {database!r})"),
+    ("eri_lot_attribution", ERI_DIR, "eri", None,
+     "import lot_attribution as m\nm.main()"),
+    ("eri_calculate", ERI_DIR, "eri", None,
+     "import 计算 as m\nfor c in (m.src_db_config, m.dest_db_config): c['database'] = {database!r}\n"
+     "m.process_and_create_new_table()"),
+    ("report_repair_count", CURRENT_DIR, "tl", None,
+     "import 输出数据 as m\nm.main()"),
+    ("report_repair_rate", CURRENT_DIR, "tl", None,
+     "import 月返修率 as m\nm.main()"),
+    ("report_combined", CURRENT_DIR, "tl", None,
+     "import combined_report as m\nm.main()"),
+]
+
+
+def is_production_database(database):
+    """测试库名是否与正式库（DB_CONFIG、DB_CONFIG1）相同"""
+    return database in (DB_CONFIG["database"], DB_CONFIG1["database"])
+
+
+def reset_database(database):
+    """
+    删除并重建测试数据库，与正式库同名时拒绝执行
+
+    参数:
+        database (str): 测试库名
+    """
+    if is_production_database(database):
+        raise ValueError(f"测试库 `{database}` 与正式库同名，拒绝删除重建（请修改 BENCH_CONFIG[\"database\"]）")
+    conn = pymysql.connect(**{k: DB_CONFIG1[k] for k in ("host", "user", "password")}, charset="utf8mb4")
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+            cursor.execute(f"CREATE DATABASE `{database}` DEFAULT CHARSET utf8mb4")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def bench_connection(database):
+    """连接测试库"""
+    return pymysql.connect(**{**DB_CONFIG1, "database": database}, charset="utf8mb4")
+
+
+def bulk_insert(conn, sql, records, chunk_rows=50000):
+    """分块批量插入，避免单条语句过大"""
+    with conn.cursor() as cursor:
+        for start in range(0, len(records), chunk_rows):
+            cursor.executemany(sql, records[start:start + chunk_rows])
+            conn.commit()
+
+
+def create_tables(conn, statements):
+    """按导入脚本中的表结构建表（已存在时不变）"""
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    conn.commit()
+
+
+def seed_materials(frames, database):
+    """
+    补齐导入脚本未读取的模拟数据：物料写入 material_stats、material_stats_eri、material_info（已存在的跳过），
+    入库数量写入 material_stock（只写入表中还没有入库记录的物料）
+
+    参数:
+        frames (dict): generate_frames 的返回值
+        database (str): 测试库名
+    """
+    material = frames["material"]
+    records = list(zip(material["material_code"], material["material_desc"], material["board_code"]))
+    conn = bench_connection(database)
+    try:
+        create_tables(conn, [
+            *(f"""CREATE TABLE IF NOT EXISTS `{table}` (
+                    material_code VARCHAR(255) PRIMARY KEY, material_desc VARCHAR(255), board_code VARCHAR(255),
+                    import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""" for table in ("material_stats", "material_stats_eri")),
+            """CREATE TABLE IF NOT EXISTS material_info (
+                    material_code VARCHAR(50) PRIMARY KEY, material_desc VARCHAR(255) NOT NULL,
+                    import_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+            """CREATE TABLE IF NOT EXISTS material_stock (
+                    id INT AUTO_INCREMENT PRIMARY KEY, material_code VARCHAR(50), date DATE, quantity INT,
+                    import_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, INDEX idx_date (date)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        ])
+        for table in ("material_stats", "material_stats_eri"):
+            bulk_insert(conn, f"INSERT IGNORE INTO `{table}` (material_code, material_desc, board_code) "
+                              f"VALUES (%s, %s, %s)", records)
+        bulk_insert(conn, "INSERT IGNORE INTO material_info (material_code, material_desc) VALUES (%s, %s)",
+                    [record[:2] for record in records])
+
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT material_code FROM material_stock")
+            imported = {row[0] for row in cursor.fetchall()}
+        stock = frames["stock"][~frames["stock"]["material_code"].isin(imported)]
+        stock = stock.melt(id_vars=["material_code", "material_desc"], var_name="date", value_name="quantity")
+        stock = stock[stock["quantity"] != 0]
+        bulk_insert(conn, "INSERT INTO material_stock (material_code, date, quantity) VALUES (%s, %s, %s)",
+                    list(zip(stock["material_code"], stock["date"], stock["quantity"].tolist())))
+        # 与导入脚本一致：补充代码id列并回填
+        for table in ("material_stats", "material_stats_eri", "material_info", "material_stock"):
+            ensure_code_columns(conn, table)
+            sync_code_ids(conn, table)
+    finally:
+        conn.close()
+
+
+def load_repairs(frames, database):
+    """
+    返修行数超过 Excel 上限时，直接写入 repair_stats 和 repair_stats_eri（代替两个返修导入脚本）
+
+    参数:
+        frames (dict): generate_frames 的返回值
+        database (str): 测试库名
+    """
+    repair = frames["repair"]
+    columns = [repair["board_code"].astype(str).tolist(), repair["count"].tolist(),
+               repair["year"].tolist(), repair["month"].tolist()]
+    conn = bench_connection(database)
+    try:
+        create_tables(conn, [
+            f"""CREATE TABLE IF NOT EXISTS repair_stats (
+                    id INT AUTO_INCREMENT PRIMARY KEY, board_code VARCHAR(255), count INT, year INT, month INT,
+                    {PERIOD_KEY_COLUMN}, import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, {PERIOD_INDEX}
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+            """CREATE TABLE IF NOT EXISTS repair_stats_eri (
+                    id INT AUTO_INCREMENT PRIMARY KEY, board_code VARCHAR(255), count INT, year INT, month INT,
+                    repair_date VARCHAR(255), import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        ])
+        bulk_insert(conn, "INSERT INTO repair_stats (board_code, count, year, month) VALUES (%s, %s, %s, %s)",
+                    list(zip(*columns)))
+        bulk_insert(conn, "INSERT INTO repair_stats_eri (board_code, count, year, month, repair_date) "
+                          "VALUES (%s, %s, %s, %s, %s)",
+                    list(zip(*columns, repair["repair_date"].tolist())))
+        for table in ("repair_stats", "repair_stats_eri"):
+            ensure_code_columns(conn, table)
+            sync_code_ids(conn, table)
+    finally:
+        conn.close()
+
+
+def run_stage(cwd, code, log_path):
+    """
+    在子进程中运行一个阶段
+
+    参数:
+        cwd (str): 运行目录
+        code (str): Python代码
+        log_path (str): 子进程输出日志路径
+
+    返回:
+        tuple: (墙钟耗时秒, 内存峰值MB（不支持时为None）, 退出码)
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [CURRENT_DIR, os.environ.get("PYTHONPATH")]))}
+    with open(log_path, "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-c", code], cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            # ru_maxrss：Linux 单位为KB，macOS 为字节
+            peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        else:
+            proc.wait()
+            peak_mb = None
+        return time.perf_counter() - start, peak_mb, proc.returncode
+
+
+def run_size(n_repairs, work_dir):
+    """
+    对一个返修行数运行全部阶段
+
+    参数:
+        n_repairs (int): 返修行数
+        work_dir (str): 本次测试的临时目录（工作簿、日志、报表输出）
+
+    返回:
+        list: 各阶段结果
+    """
+    from synthetic_workbook import EXCEL_MAX_ROWS, default_materials
+    database = BENCH_CONFIG["database"]
+    reset_database(database)
+    via_excel = n_repairs + 1 <= EXCEL_MAX_ROWS
+    params = {
+        "path": os.path.join(work_dir, f"synthetic_{n_repairs}.xlsx"), "database": database,
+        "n_repairs": n_repairs, "n_materials": default_materials(n_repairs), "work_dir": work_dir,
+    }
+
+    results = []
+    for name, cwd, preamble, mode, code in STAGES:
+        if (mode == "excel" and not via_excel) or (mode == "direct" and via_excel):
+            continue
+        source = PREAMBLE[preamble].format(**params) + code.format(**params)
+        log_path = os.path.join(work_dir, f"{n_repairs}_{name}.log")
+        wall_s, peak_mb, returncode = run_stage(cwd, source, log_path)
+        results.append({
+            "n_repairs": n_repairs, "stage": name, "wall_s": round(wall_s, 3),
+            "peak_mb": round(peak_mb, 1) if peak_mb is not None else None,
+            "rows_per_s": round(n_repairs / wall_s, 1) if wall_s > 0 else None,
+            "returncode": returncode, "log": log_path,
+        })
+        print(f"{n_repairs:>10} {name:<24}{wall_s:>10.2f}s"
+              f"{(f'{peak_mb:>10.1f}MB') if peak_mb is not None else '':>12}"
+              f"{'' if returncode == 0 else f'  失败（退出码{returncode}，见{log_path}）'}")
+    return results
+
+
+def main():
+    """命令行入口：依次测试各返修行数，结果写出为JSON"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or BENCH_CONFIG["sizes"]
+    if is_production_database(BENCH_CONFIG["database"]):
+        print(f"测试库 `{BENCH_CONFIG['database']}` 与正式库同名，拒绝运行（请修改 BENCH_CONFIG[\"database\"]）")
+        return
+    started = datetime.now()
+    work_dir = os.path.join(BENCH_CONFIG["work_dir"], started.strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = []
+    for n_repairs in sizes:
+        results.extend(run_size(n_repairs, work_dir))
+
+    os.makedirs(INSTRUMENT_CONFIG["dir"], exist_ok=True)
+    file_path = os.path.join(INSTRUMENT_CONFIG["dir"], f"benchmark_pipeline_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump({"started_at": started.strftime("%Y-%m-%d %H:%M:%S"), "sizes": sizes, "results": results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"基准测试结果已保存至：{file_path}")
+
+
+if __name__ == "__main__":
+    main()
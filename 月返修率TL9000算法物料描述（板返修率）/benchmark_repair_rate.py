@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : benchmark_repair_rate.py
+# @Description :
+
+"""返修率计算基准测试
+用随机生成的 物料 × 月份 数据（默认 10000 个物料 × 60 个月），对比
+逐行 apply + 按月过滤 的旧写法与 np.where 向量化 + 月份索引查找 的新写法，
+并校验两者结果一致。无需连接数据库：
+
+    python benchmark_repair_rate.py [物料数] [月份数]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from 月返修率 import calc_rate, calculate_repair_rate
+from period_utils import month_key
+
+
+def make_monthly_data(n_materials, n_months, seed=0):
+    """
+    生成与 load_data 返回值结构一致的入库/返修月度汇总
+
+    参数:
+        n_materials (int): 物料数
+        n_months (int): 月份数（从2023-01开始连续）
+        seed (int): 随机种子
+
+    返回:
+        tuple: (stock_monthly, repair_monthly)
+    """
+    rng = np.random.default_rng(seed)
+    months = month_key(2023, 1) + np.arange(n_months)
+    codes = np.array([f"M{i:06d}" for i in range(n_materials)])
+
+    stock_monthly = pd.DataFrame({
+        'material_code': np.repeat(codes, n_months),
+        'material_desc': np.repeat([f"物料{i}" for i in range(n_materials)], n_months),
+        'period': np.tile(months, n_materials),
+        'inbound_qty': rng.integers(0, 500, n_materials * n_months),
+    })
+    # 约三分之一的 物料×月份 有返修记录
+    repair_monthly = stock_monthly.sample(frac=0.3, random_state=seed)[['material_code', 'period']]
+    repair_monthly = repair_monthly.rename(columns={'material_code': 'board_code'})
+    repair_monthly['repair_qty'] = rng.integers(1, 20, len(repair_monthly))
+    return stock_monthly, repair_monthly.reset_index(drop=True)
+
+
+def legacy_rate_stage(merged_data, monthly_global, months):
+    """旧写法：逐行 apply 计算返修率，总计行逐月过滤全局表"""
+    merged_data['monthly_rate(%)'] = merged_data.apply(
+        lambda row: 0.00 if (row['inbound_qty'] == 0 or row['repair_qty'] == 0)
+        else round((row['repair_qty'] / row['inbound_qty']) * 100, 2),
+        axis=1
+    )
+    monthly_global['global_monthly_rate(%)'] = monthly_global.apply(
+        lambda x: round((x['repair_qty'] / x['inbound_qty'] * 100) if x['inbound_qty'] != 0 else 0, 2),
+        axis=1
+    )
+    total_row = {}
+    for month in months:
+        total_row[month] = monthly_global[monthly_global['period'] == month]['global_monthly_rate(%)'].values[0]
+    return merged_data['monthly_rate(%)'].to_numpy(), total_row
+
+
+def vectorized_rate_stage(merged_data, monthly_global, months):
+    """新写法：np.where 掩码除法，总计行按月份索引一次性取出"""
+    merged_data['monthly_rate(%)'] = calc_rate(merged_data['repair_qty'], merged_data['inbound_qty'])
+    monthly_global['global_monthly_rate(%)'] = calc_rate(monthly_global['repair_qty'], monthly_global['inbound_qty'])
+    global_rate = monthly_global.set_index('period')['global_monthly_rate(%)']
+    total_row = global_rate.reindex(months, fill_value=0.0).to_dict()
+    return merged_data['monthly_rate(%)'].to_numpy(), total_row
+
+
+def timed(func, *args):
+    """执行函数并返回 (结果, 耗时秒数)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """生成数据→分别计时新旧返修率计算→校验结果一致→输出加速比"""
+    n_materials = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_months = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    stock_monthly, repair_monthly = make_monthly_data(n_materials, n_months)
+    print(f"测试数据：{n_materials} 个物料 × {n_months} 个月，"
+          f"入库 {len(stock_monthly)} 行，返修 {len(repair_monthly)} 行")
+
+    merged_data = pd.merge(
+        stock_monthly,
+        repair_monthly.rename(columns={'board_code': 'material_code'}),
+        on=['material_code', 'period'],
+        how='left'
+    ).fillna({'repair_qty': 0})
+    monthly_global = merged_data.groupby('period')[['inbound_qty', 'repair_qty']].sum().reset_index()
+    months = sorted(monthly_global['period'])
+
+    (legacy_rates, legacy_total), legacy_time = timed(
+        legacy_rate_stage, merged_data.copy(), monthly_global.copy(), months
+    )
+    (new_rates, new_total), new_time = timed(
+        vectorized_rate_stage, merged_data.copy(), monthly_global.copy(), months
+    )
+    consistent = np.allclose(legacy_rates, new_rates) and all(
+        np.isclose(legacy_total[m], new_total[m]) for m in months
+    )
+
+    print(f"返修率计算（旧：逐行apply）：{legacy_time:.3f} 秒")
+    print(f"返修率计算（新：向量化）：  {new_time:.3f} 秒")
+    print(f"加速比：{legacy_time / new_time:.1f} 倍，结果一致：{consistent}")
+
+    _, total_time = timed(calculate_repair_rate, stock_monthly, repair_monthly)
+    print(f"calculate_repair_rate 全流程（含合并、透视）：{total_time:.3f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : cli.py
+# @Description :
+
+"""统一命令行入口
+    python cli.py import-material [Excel路径] [--full-reload]   导入物料（改善统计）
+    python cli.py import-repair [Excel路径] [--full-reload]     导入返修数据（--full-reload 全量重载，见 table_swap.py）
+    python cli.py import-stock [Excel路径]                      导入入库数据（板子入库）
+    python cli.py eri [Excel路径]                               ERI流程：物料、返修导入 → 批次归因 → 时间差计算
+    python cli.py archive                                     早于 ARCHIVE_CONFIG["cutoff"] 的明细移入归档表
+    python cli.py snapshot                                    重新写出报表数据快照（导入子命令完成后自动写出）
+    python cli.py report-rate [--check] [--start 年-月] [--end 年-月]       月返修率报表
+    python cli.py report-count [--check] [--start 年-月] [--end 年-月]      返修数量报表
+    python cli.py report-combined [--check] [--start 年-月] [--end 年-月]   汇总报表
+pandas/numpy/openpyxl 只在子命令真正需要时才导入：--help 和报表缓存检查只加载标准库和 pymysql，
+源表未变化时报表子命令直接恢复缓存文件后退出。--check 只检查缓存（不复制缓存文件、不改动输出目录），
+全部命中（无需重新生成）时退出码为0，否则为1，供定时任务判断是否需要运行。
+缓存检查的耗时主要是计算源表指纹：CACHE_CONFIG["checksum"] 为 True 时每张源表执行一次
+CHECKSUM TABLE（全表扫描，大表上为秒级），只需毫秒级检查时可关闭，只比较行数和最近导入时间。
+--start/--end 指定统计区间（默认见 PERIOD_CONFIG），区间条件下推到查询，只读取区间内的数据。
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# ERI 脚本所在目录（与本目录有同名的 config/db_utils 模块，在子进程中运行）
+ERI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ERI初始返修率")
+ERI_PIPELINE = (
+    "import sys, importlib\n"
+    "path = sys.argv[1] if len(sys.argv) > 1 else None\n"
+    "if not importlib.import_module('入库物料代码和物料描述和转换代码(ERI)').main(path): sys.exit(1)\n"
+    "if not importlib.import_module('入库返修数据_eri').main(path): sys.exit(1)\n"
+    "importlib.import_module('lot_attribution').main()\n"
+    "importlib.import_module('计算').process_and_create_new_table()\n"
+)
+# 报表子命令 → (report_specs 中的报表名, 报表模块名)
+REPORT_COMMANDS = {
+    "report-rate": ("rate", "月返修率"),
+    "report-count": ("count", "输出数据"),
+    "report-combined": ("combined", "combined_report"),
+}
+
+
+def run_script(command, cwd):
+    """
+    在子进程中运行脚本，输出逐行转发到当前的标准输出（在 worker.py 中运行时转发给客户端）
+
+    参数:
+        command (list): 命令行
+        cwd (str): 运行目录
+
+    返回:
+        int: 子进程退出码
+    """
+    proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            encoding="utf-8", errors="replace")
+    for line in proc.stdout:
+        print(line, end="", flush=True)
+    return proc.wait()
+
+
+def import_material(args):
+    """导入物料数据"""
+    import 入库物料代码和物料描述和转换代码 as material_import
+    if not material_import.main(args.path, full_reload=args.full_reload):
+        return 1
+    return write_snapshots(args)
+
+
+def import_repair(args):
+    """导入返修数据"""
+    import 入库返修数据 as repair_import
+    if not repair_import.main(args.path, full_reload=args.full_reload):
+        return 1
+    return write_snapshots(args)
+
+
+def import_stock(args):
+    """导入入库数据（脚本在另一个目录，在子进程中运行）"""
+    from watch_folder import STOCK_SCRIPT
+    command = [sys.executable, STOCK_SCRIPT] + ([args.path] if args.path else [])
+    returncode = run_script(command, os.path.dirname(STOCK_SCRIPT))
+    return returncode or write_snapshots(args)
+
+
+def write_snapshots(args):
+    """写出报表数据快照（见 snapshot.py）"""
+    import snapshot
+    snapshot.main()
+    return 0
+
+
+def run_eri(args):
+    """ERI流程（在 ERI 目录的子进程中依次运行）"""
+    command = [sys.executable, "-c", ERI_PIPELINE] + ([args.path] if args.path else [])
+    return run_script(command, ERI_DIR)
+
+
+def run_archive(args):
+    """历史数据归档"""
+    import archive
+    archive.main()
+    return 0
+
+
+def run_report(args):
+    """
+    生成报表：先检查缓存，源表未变化时只恢复缓存文件，不导入报表模块
+
+    返回:
+        int: 退出码（--check 时全部命中缓存为0，否则为1；统计区间有误时为2）
+    """
+    from period_utils import set_report_period, report_period
+    from report_specs import spec_fingerprint, all_cached, pending_outputs
+    name, module_name = REPORT_COMMANDS[args.command]
+    # 每次都设置（常驻进程中不沿用上一个任务的区间）
+    set_report_period(args.start, args.end)
+    try:
+        report_period()
+    except ValueError as e:
+        print(e)
+        return 2
+    fingerprint = spec_fingerprint(name)
+    if args.check:
+        return 0 if all_cached(name, fingerprint) else 1
+    if fingerprint is not None and not pending_outputs(name, fingerprint):
+        return 0
+    module = __import__(module_name)
+    module.main(fingerprint)
+    return 0
+
+
+def period_arg(label):
+    """校验 --start/--end 参数（"2023-01"格式）"""
+    from period_utils import month_key_from_label
+    try:
+        month_key_from_label(label)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"月份格式应为 年-月（如 2023-01）：{label}")
+    return label
+
+
+def build_parser():
+    """命令行参数定义"""
+    parser = argparse.ArgumentParser(description="返修数据导入与报表生成")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, handler, help_text in [
+        ("import-material", import_material, "导入物料数据（改善统计）"),
+        ("import-repair", import_repair, "导入返修数据（返修）"),
+        ("import-stock", import_stock, "导入入库数据（板子入库）"),
+        ("eri", run_eri, "ERI流程：物料、返修导入 → 批次归因 → 时间差计算"),
+    ]:
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("path", nargs="?", help="Excel文件路径，默认使用配置中的路径")
+        if command in ("import-material", "import-repair"):
+            sub.add_argument("--full-reload", action="store_true",
+                             help="全量重载：写入影子表后原子替换正式表，默认追加")
+        sub.set_defaults(handler=handler)
+    commands.add_parser("archive", help="早于归档月份的明细移入压缩归档表并保留月度汇总").set_defaults(handler=run_archive)
+    commands.add_parser("snapshot", help="重新写出报表数据快照（Arrow IPC）").set_defaults(handler=write_snapshots)
+    for command, help_text in [
+        ("report-rate", "月返修率报表"),
+        ("report-count", "返修数量报表"),
+        ("report-combined", "汇总报表"),
+    ]:
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("--check", action="store_true", help="只检查缓存：无需重新生成时退出码为0，否则为1")
+        sub.add_argument("--start", type=period_arg, help="统计区间起始月份（如 2024-01），默认使用 PERIOD_CONFIG")
+        sub.add_argument("--end", type=period_arg, help="统计区间结束月份（含），默认到最新月份")
+        sub.set_defaults(handler=run_report)
+    return parser
+
+
+def main():
+    """程序入口"""
+    args = build_parser().parse_args()
+    start = time.perf_counter()
+    returncode = args.handler(args)
+    print(f"{args.command} 完成，耗时 {time.perf_counter() - start:.2f} 秒")
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
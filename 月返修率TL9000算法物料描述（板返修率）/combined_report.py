@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : combined_report.py
+# @Description :
+
+"""汇总报表生成程序
+一次连接、一次查询读取入库、物料、返修数据并完成月度汇总，在内存中的共享汇总结果上
+生成以下视图，作为同一个工作簿的多个工作表写出：
+    返修数量：单板 × 月份返修数量（同 输出数据.py）
+    返修率：  各装机基数窗口的物料 × 月份返修率（同 月返修率.py）
+    返修统计：物料代码/描述/单板料号 × 月份（Jan-23 格式，同 初始代码/输出数据2.py）
+    入库数量：物料 × 月份入库数量（同 物料描述（生产入库数据）/输出数据.py）
+替代原先四个脚本各自 连接→查询→汇总→写文件 的流程。
+"""
+import os
+from db_utils import create_db_connection, close_db_connection
+from config import DB_CONFIG1, TL9000_CONFIG
+from data_loader import share_code_categories
+from snapshot import read_rows
+from report_matrix import build_matrix
+from period_utils import month_key, report_period
+from excel_writer import write_sheets
+from exporters import output_dir
+from report_cache import store_cached
+from report_specs import OUTPUT_FILE, spec_fingerprint, pending_outputs
+from common.instrumentation import timed_stage, stage
+from 月返修率 import summarize_monthly, calculate_repair_rate, stock_period, report_columns
+from 输出数据 import generate_pivot_report
+
+
+def read_shared_data(conn):
+    """
+    在已建立的连接上读取各报表共用的统计区间内的明细数据（MySQL 或 sqlite3 连接均可）
+
+    参数:
+        conn: 数据库连接对象
+
+    返回:
+        dict: stock（入库明细，含物料描述）、material（物料-单板对照）、repair（返修明细）
+    """
+    # 源表未变化时读取导入后写出的快照，否则查询数据库
+    stock_df = read_rows(conn, "material_stock", *stock_period())
+    material_df = read_rows(conn, "material_stats")
+    repair_df = read_rows(conn, "repair_stats", *report_period())
+    # 三张表的物料/单板代码共用同一套编码
+    share_code_categories([stock_df, material_df, repair_df])
+    return {"stock": stock_df, "material": material_df, "repair": repair_df}
+
+
+@timed_stage()
+def load_shared_data():
+    """
+    一次连接读取各报表共用的明细数据
+
+    返回:
+        dict: 同 read_shared_data；读取失败返回None
+    """
+    try:
+        conn = create_db_connection(**DB_CONFIG1)
+        data = read_shared_data(conn)
+        close_db_connection(conn)
+        return data
+    except Exception as e:
+        print(f"数据加载失败: {e}")
+        return None
+
+
+def stock_pivot(stock_monthly):
+    """
+    物料 × 月份入库数量（统计区间内的月份），末尾追加月度合计行
+
+    参数:
+        stock_monthly (pd.DataFrame): 入库月度汇总（summarize_monthly 的第一个返回值）
+
+    返回:
+        pd.DataFrame: 入库数量宽表；无数据返回None
+    """
+    matrix = build_matrix(stock_monthly, ['material_code', 'material_desc'], 'period', ['inbound_qty'])
+    if matrix is None:
+        return None
+    return matrix.to_frame(
+        matrix.data['inbound_qty'], total_label=('月度合计', ''), total_values=matrix.totals('inbound_qty'),
+        cols=report_columns(matrix)
+    )
+
+
+def board_pivot(material_df, repair_df):
+    """
+    物料代码/描述/单板料号 × 月份返修数量（月份列为 Jan-23 格式），末尾追加累计行
+
+    参数:
+        material_df (pd.DataFrame): 物料-单板对照
+        repair_df (pd.DataFrame): 返修明细（已含 period，只含统计区间内的月份）
+
+    返回:
+        pd.DataFrame: 返修统计宽表；无数据返回None
+    """
+    merged = material_df.merge(repair_df[['board_code', 'period', 'count']], on='board_code', how='inner')
+    matrix = build_matrix(merged, ['material_code', 'material_desc', 'board_code'], 'period', ['count'])
+    if matrix is None:
+        return None
+    return matrix.to_frame(
+        matrix.data['count'], total_label=('', '累计', '累计'), total_values=matrix.totals('count'),
+        fmt='%b-%y'
+    )
+
+
+@timed_stage()
+def build_report_sheets(data):
+    """
+    在共享的月度汇总上生成各视图
+
+    参数:
+        data (dict): load_shared_data 的返回值
+
+    返回:
+        list: write_sheets 使用的工作表列表 (工作表名, 报表, 选项)，跳过无数据的视图
+    """
+    stock_monthly, repair_monthly = summarize_monthly(data["stock"], data["repair"])
+    # 返修统计视图按月份键汇总返修明细
+    repair_df = data["repair"].assign(period=month_key(data["repair"]['year'], data["repair"]['month']))
+
+    sheets = [("返修数量", generate_pivot_report(data["material"], repair_df), {})]
+    highlight = (TL9000_CONFIG["highlight_font"], TL9000_CONFIG["highlight_fill"])
+    for window in TL9000_CONFIG["windows"]:
+        sheet_name = "返修率" if window <= 1 else f"返修率_{window}个月窗口"
+        sheets.append((sheet_name, calculate_repair_rate(stock_monthly, repair_monthly, window),
+                       {"highlight": highlight}))
+    sheets.append(("返修统计", board_pivot(data["material"], repair_df), {"label_cols": 3}))
+    sheets.append(("入库数量", stock_pivot(stock_monthly), {}))
+    return [(name, df, options) for name, df, options in sheets if df is not None and not df.empty]
+
+
+def main(fingerprint=None):
+    """
+    一次加载→生成全部视图→写出一个多工作表的工作簿（源表指纹未变化时直接使用缓存）
+
+    参数:
+        fingerprint: 已计算的源表指纹（cli.py 检查缓存时传入），默认重新计算
+    """
+    file_path = os.path.join(output_dir(), OUTPUT_FILE)
+    fingerprint = fingerprint or spec_fingerprint("combined")
+    if not pending_outputs("combined", fingerprint):
+        return
+
+    data = load_shared_data()
+    if data is None:
+        return
+    sheets = build_report_sheets(data)
+    if not sheets:
+        print("无有效数据，无法导出")
+        return
+
+    try:
+        with stage("write_sheets", rows_in=sum(len(df) for _, df, _ in sheets)):
+            write_sheets(file_path, sheets)
+        print(f"汇总报表已保存至：{file_path}（工作表：{'、'.join(name for name, _, _ in sheets)}）")
+        store_cached(fingerprint, file_path)
+    except Exception as e:
+        print(f"导出失败：{e}")
+
+
+if __name__ == "__main__":
+    main()
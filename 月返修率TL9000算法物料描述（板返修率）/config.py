@@ -7,6 +7,7 @@
 
 # 修改 config.py
 """项目配置参数"""
+import os
 
 # 数据库配置（合并连接参数和表名）
 DB_CONFIG = {
@@ -30,4 +31,99 @@ EXCEL_CONFIG = {
     "path": r"C:\Users\admin\Desktop\三江\核心产品返修率-20250611外发wqt.xlsx",
     "material_sheet": "改善统计",  # 物料数据所在工作表
     "repair_sheet": "返修"  # 返修数据所在工作表
-}
\ No newline at end of file
+}
+
+# TL9000返修率配置
+TL9000_CONFIG = {
+    "windows": [1, 6, 12],  # 装机基数窗口（月），1为当月返修÷当月入库
+    "highlight_font": 1,  # 返修率(%)大于该值显示红色字体
+    "highlight_fill": 3  # 返修率(%)大于该值显示红色背景
+}
+
+# 报表统计区间（"年-月"，闭区间；也可用 cli.py 的 --start/--end 指定）
+PERIOD_CONFIG = {
+    "start": "2023-01",  # 起始月份，之前的数据不读取（业务需求：关注近期返修情况）；为空时不限
+    "end": ""  # 结束月份，为空时到最新月份
+}
+
+# 历史数据归档配置（archive.py）
+ARCHIVE_CONFIG = {
+    "cutoff": "",  # 归档月份（"年-月"）：早于该月的返修、入库明细移入压缩归档表并保留月度汇总；为空时不归档。
+                   # 修改后需重新运行归档；报表按实际完成归档的月份（archive_state）合并月度汇总
+    "batch": 5000  # 每批移动的行数（每批一个事务）
+}
+
+# 报表输出缓存配置（源表指纹不变时直接复用上次生成的报表）
+CACHE_CONFIG = {
+    # 缓存目录，每个指纹一个子目录；清理时只删除指纹目录，快照等放在 .report_cache 下的其他子目录
+    "dir": os.path.join(os.path.expanduser("~"), ".report_cache", "outputs"),
+    "checksum": True,  # 指纹是否包含 CHECKSUM TABLE（大表上需全表扫描，可关闭只比较行数和导入时间）
+    "keep": 10  # 保留最近使用的指纹数
+}
+
+# 报表流式读取配置（快照不可用时，大表按块读取并逐块按月累加）
+STREAM_CONFIG = {
+    "chunksize": 50000  # 每块行数（MySQL 使用服务器端游标），为0时一次读入全部明细
+}
+
+# 报表数据快照配置（snapshot.py，需安装 pyarrow）
+SNAPSHOT_CONFIG = {
+    "enabled": True,  # 导入后写出 Arrow IPC 快照，报表在源表未变化时内存映射读取快照，否则查询数据库
+    "dir": os.path.join(os.path.expanduser("~"), ".report_cache", "snapshots")  # 快照目录
+}
+
+# 报表导出配置
+OUTPUT_CONFIG = {
+    "dir": "",  # 输出目录，为空时使用用户主目录下的Desktop（也可用环境变量REPORT_OUTPUT_DIR指定）
+    "formats": ["xlsx"]  # 导出格式：xlsx/parquet/arrow/csv.gz，供BI工具读取时可加上列式格式
+}
+
+# 返修率查询服务配置（rate_service.py）
+SERVICE_CONFIG = {
+    "host": "127.0.0.1",  # 监听地址，仅本机访问
+    "port": 8765,  # 监听端口
+    "refresh_seconds": 60,  # 检查源表是否有新导入的间隔（秒）
+    "sqlite_path": ""  # 不为空时读取该 sqlite 数据库文件（嵌入式库），否则连接 DB_CONFIG1 的 MySQL
+}
+
+# 共享目录自动导入配置（watch_folder.py）
+WATCH_CONFIG = {
+    "dir": "",  # 监视的共享目录（也可在命令行指定）
+    "poll_seconds": 10,  # 扫描间隔（秒）
+    "settle_seconds": 20,  # 文件大小和修改时间连续多少秒不变才导入（防止读取写了一半的文件）
+    "ledger": os.path.join(os.path.expanduser("~"), ".report_cache", "imported_files.json")  # 已导入文件台账
+}
+
+# 分阶段耗时统计配置（common/instrumentation.py）
+INSTRUMENT_CONFIG = {
+    "enabled": True,  # 程序退出时是否打印各阶段耗时并写出JSON
+    "memory": False,  # 是否统计各阶段内存峰值（tracemalloc，程序会变慢；也可设置环境变量 REPORT_TRACE_MEMORY=1）
+    "memory_top": 10,  # 每个阶段记录新增内存最多的代码行数
+    "memory_frames": 25,  # 每次分配记录的调用栈深度（用于将第三方库内的分配归到项目代码行）
+    "memory_depth": 2,  # 只对嵌套深度小于该值的阶段拍内存快照（快照本身较慢）
+    "dir": os.path.join(os.path.expanduser("~"), ".report_runs")  # JSON输出目录，每次运行一个文件；不放在 .report_cache 下，避免被缓存清理删除
+}
+
+# 常驻任务进程配置（worker.py，仅 Linux/macOS）
+WORKER_CONFIG = {
+    "socket": os.path.join(os.path.expanduser("~"), ".report_cache", "worker.sock"),  # 本地 Unix socket 路径
+    "sheet_cache": 8  # 最多缓存的已解析工作表数（同一工作簿重复导入时不再解析）
+}
+
+# 全流程规模基准测试配置（benchmark_pipeline.py）
+BENCH_CONFIG = {
+    "database": "三江_bench",  # 测试专用数据库，每个规模测试前删除重建，与 DB_CONFIG/DB_CONFIG1 同名时拒绝运行
+    "sizes": [1000, 10000, 100000, 1000000],  # 默认返修行数（也可在命令行指定，如 10000000）
+    # 模拟工作簿、日志、报表输出及各阶段的缓存/快照/慢查询日志目录（不放在报表缓存目录下，避免被缓存清理删除）
+    "work_dir": os.path.join(os.path.expanduser("~"), ".report_bench")
+}
+
+# 查询记录配置（db_utils.run_query）
+QUERY_LOG_CONFIG = {
+    "enabled": True,  # 是否记录每条查询的耗时和行数
+    "bytes": False,  # 是否同时记录传输字节数（每条查询前后各多一次 SHOW SESSION STATUS 往返，排查传输量时再开启）
+    "slow_ms": 1000,  # 耗时超过该值（毫秒）的查询写入慢查询日志
+    "explain": True,  # 慢查询是否同时记录执行计划（EXPLAIN）
+    "max_param_chars": 200,  # 日志中查询参数最多保留的字符数
+    "slow_log": os.path.join(os.path.expanduser("~"), ".report_cache", "slow_queries.jsonl")  # 慢查询日志，每行一条JSON
+}
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : data_loader.py
+# @Description :
+
+"""报表数据加载模块
+按表声明字段类型（TABLE_SCHEMAS），读取后立即转换：
+    code:     物料/单板代码，所有报表数据共用同一套 category 取值，关联时直接比较整数编码；
+              空值和空白代码保持为 NaN（不参与关联，也不会变成 'None' 之类的代码）
+    category: 描述等重复度高的文本，转为 category
+    int:      数量、年份、月份，压缩为能容纳取值的最小整数类型
+    date:     日期，转为 datetime64
+明细较多的查询可用 read_monthly_chunks 流式读取：每块读入后立即按月汇总，只保留各块的汇总结果，
+全部读完后合并一次，明细不会整体留在内存中。
+"""
+import numpy as np
+import pandas as pd
+from db_utils import read_sql, read_sql_chunks
+from common.instrumentation import timed_stage
+
+# 各表字段类型声明（只需列出报表会读取的字段）
+TABLE_SCHEMAS = {
+    "material_stock": {"material_code": "code", "date": "date", "quantity": "int"},
+    "material_info": {"material_code": "code", "material_desc": "category"},
+    "material_stats": {"material_code": "code", "material_desc": "category", "board_code": "code"},
+    "repair_stats": {"board_code": "code", "count": "int", "year": "int", "month": "int"},
+}
+# 所有声明为 code 的字段名
+CODE_COLUMNS = {col for schema in TABLE_SCHEMAS.values() for col, kind in schema.items() if kind == "code"}
+
+
+def downcast_int(series):
+    """
+    数值列压缩为最小整数类型；含空值时无法用整数表示，压缩为最小浮点类型
+
+    参数:
+        series (pd.Series): 数值列
+
+    返回:
+        pd.Series: 压缩后的列
+    """
+    series = pd.to_numeric(series, errors='coerce')
+    if series.isna().any():
+        return pd.to_numeric(series, downcast='float')
+    return pd.to_numeric(series, downcast='integer')
+
+
+def clean_codes(series):
+    """
+    代码列去除首尾空格，空值和空白代码统一为 NaN
+
+    参数:
+        series (pd.Series): 代码列（字符串/category，可含空值）
+
+    返回:
+        pd.Series: object 类型的代码列
+    """
+    values = series.astype(object)
+    present = values.notna()
+    values = values.where(~present, values[present].astype(str).str.strip())
+    return values.where(values != "", np.nan)
+
+
+def apply_schema(df, tables):
+    """
+    按表结构声明转换字段类型（code 字段只去除首尾空格，共享编码由 share_code_categories 统一）
+
+    参数:
+        df (pd.DataFrame): read_sql 读取的原始数据
+        tables (list): 查询涉及的表名，按顺序合并各表的字段声明
+
+    返回:
+        pd.DataFrame: 转换后的数据
+    """
+    schema = {}
+    for table in tables:
+        schema.update(TABLE_SCHEMAS[table])
+
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == "code":
+            df[col] = clean_codes(df[col])
+        elif kind == "category":
+            df[col] = df[col].astype("category")
+        elif kind == "int":
+            df[col] = downcast_int(df[col])
+        elif kind == "date":
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def share_code_categories(frames):
+    """
+    所有数据中的物料/单板代码共用同一个 category 取值集合，
+    不同表之间按代码关联时只比较整数编码
+
+    参数:
+        frames (list): DataFrame 列表（原地修改）
+    """
+    code_cols = [(df, col) for df in frames for col in df.columns if col in CODE_COLUMNS]
+    if not code_cols:
+        return
+    # 取值集合只由非空代码构成（to_numpy(dtype=str) 遇到空值会把整列截断为最短的宽度）
+    categories = pd.Index(np.unique(np.concatenate(
+        [df[col].dropna().to_numpy(dtype=object) for df, col in code_cols]
+    ).astype(str)))
+    dtype = pd.CategoricalDtype(categories)
+    for df, col in code_cols:
+        df[col] = df[col].astype(dtype)
+
+
+@timed_stage()
+def read_typed_sql(conn, sql, tables):
+    """
+    执行查询并按表结构声明转换字段类型
+
+    参数:
+        conn: 数据库连接对象
+        sql (str): 查询语句
+        tables (list): 查询涉及的表名
+
+    返回:
+        pd.DataFrame: 类型转换后的数据
+    """
+    return apply_schema(read_sql(conn, sql), tables)
+
+
+@timed_stage()
+def read_monthly_chunks(conn, sql, tables, keys, value, chunksize):
+    """
+    流式读取查询结果，逐块按 分组字段 汇总 value，各块的汇总读完后合并并再分组求和一次，
+    返回与查询结果字段相同的按月汇总（日期字段截断为当月1日后参与分组，下游按月份键统计的结果与读取明细相同）
+
+    参数:
+        conn: 数据库连接对象
+        sql (str): 查询语句
+        tables (list): 查询涉及的表名
+        keys (list): 分组字段，如 ['board_code', 'year', 'month']、['material_code', 'material_desc', 'date']
+        value (str): 累加的数量字段
+        chunksize (int): 每块行数
+
+    返回:
+        pd.DataFrame: 类型转换后的月度汇总；无数据时为空表
+    """
+    parts = []
+    columns = keys + [value]
+    for chunk in read_sql_chunks(conn, sql, chunksize):
+        columns = list(chunk.columns)
+        chunk = apply_schema(chunk, tables)
+        for col in keys:
+            if pd.api.types.is_datetime64_any_dtype(chunk[col]):
+                chunk[col] = chunk[col].dt.to_period('M').dt.to_timestamp()
+        parts.append(chunk.groupby(keys, observed=True, dropna=False)[value].sum())
+    if not parts:
+        return apply_schema(pd.DataFrame(columns=columns), tables)
+    # 只合并一次：每块合并到累计汇总再分组，总耗时随块数平方增长
+    totals = pd.concat(parts).groupby(level=keys, dropna=False).sum()
+    return apply_schema(totals.reset_index()[columns], tables)
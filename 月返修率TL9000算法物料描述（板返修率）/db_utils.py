@@ -5,8 +5,41 @@
 # @File : db_utils.py
 # @Description : 
 
+import os
+import sys
 import pymysql
 from pymysql import MySQLError
+from config import QUERY_LOG_CONFIG
+
+# 仓库根目录加入搜索路径：各目录共用的 common 包按包名导入（from common.code_dict import ...），
+# 不会与本目录的同名模块混淆；脚本先导入本模块再导入 common
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from common.query_log import QueryLog, bytes_sent, explain_query  # noqa: E402
+
+# SQL执行器（按本目录的 QUERY_LOG_CONFIG 记录查询，实现见仓库根目录 common/query_log.py）
+_query_log = QueryLog(QUERY_LOG_CONFIG)
+# 本次运行执行过的查询记录（按执行顺序；常驻进程只保留最近的记录）
+QUERY_LOG = _query_log.records
+log_slow_query = _query_log.log_slow_query
+run_query = _query_log.run_query
+execute_query = _query_log.execute_query
+read_sql = _query_log.read_sql
+read_sql_chunks = _query_log.read_sql_chunks
+
+# 连接池（常驻进程 worker.py 中通过 enable_pooling 启用）：(主机, 用户, 库名) → 空闲连接列表，
+# 以及借出中的连接 id → 所属的键
+_pool = None
+_borrowed = {}
+
+
+def enable_pooling():
+    """启用连接池：之后 close_db_connection 不再关闭连接，而是放回池中供下次 create_db_connection 复用"""
+    global _pool
+    if _pool is None:
+        _pool = {}
 
 def create_db_connection(host, user, password, database):
     """
@@ -21,6 +54,16 @@ def create_db_connection(host, user, password, database):
     返回:
         pymysql.connections.Connection: 数据库连接对象，失败则返回None
     """
+    key = (host, user, database)
+    if _pool is not None:
+        while _pool.get(key):
+            conn = _pool[key].pop()
+            try:
+                conn.ping(reconnect=True)  # 空闲期间可能被服务器断开
+            except MySQLError:
+                continue
+            _borrowed[id(conn)] = key
+            return conn
     try:
         conn = pymysql.connect(
             host=host,
@@ -30,6 +73,8 @@ def create_db_connection(host, user, password, database):
             charset="utf8mb4"
         )
         print("数据库连接成功")
+        if _pool is not None:
+            _borrowed[id(conn)] = key
         return conn
     except MySQLError as e:
         print(f"连接失败: {e}")
@@ -37,26 +82,6 @@ def create_db_connection(host, user, password, database):
     
 
 
-def execute_query(conn, query):
-    """
-    执行SQL查询并返回游标（用于获取查询结果）
-    参数:
-        conn: 数据库连接对象（已建立的连接）
-        query (str): 要执行的SQL查询语句
-    返回:
-        cursor: 执行查询后的游标对象（含查询结果），若失败则返回None
-    """
-    try:
-        # 创建游标对象（用于执行查询和获取结果）
-        cursor = conn.cursor()
-        # 执行SQL查询
-        cursor.execute(query)
-        # 返回游标（后续可通过cursor.fetchall()获取数据）
-        return cursor
-    except Exception as e:
-        print(f"查询执行失败: {e}")
-        return None
-
 def close_db_connection(conn):
     """
     关闭数据库连接
@@ -64,6 +89,16 @@ def close_db_connection(conn):
     参数:
         conn (pymysql.connections.Connection): 数据库连接对象
     """
-    if conn:
-        conn.close()
-        print("数据库连接已关闭")
\ No newline at end of file
+    if not conn:
+        return
+    key = _borrowed.pop(id(conn), None) if _pool is not None else None
+    if key is not None:
+        try:
+            # 结束连接上未提交的事务：否则下次复用时仍停留在旧的一致性读快照，看不到新导入的数据
+            conn.rollback()
+            _pool.setdefault(key, []).append(conn)
+            return
+        except MySQLError:
+            pass
+    conn.close()
+    print("数据库连接已关闭")
\ No newline at end of file
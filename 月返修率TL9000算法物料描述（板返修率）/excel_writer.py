@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : excel_writer.py
+# @Description :
+
+"""流式Excel报表写出模块
+报表按行分块逐行写出，不在内存中构建完整工作簿，内存占用与报表大小无关：
+    已安装 xlsxwriter 时使用其 constant_memory 模式；
+    否则使用 openpyxl 的 write_only 模式（requirements 已包含 openpyxl）。
+表头、合计行加粗，返修率高亮以Excel条件格式写入，两种模式效果一致。
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+try:
+    import xlsxwriter  # 可选依赖：constant_memory 模式写出更快
+except ImportError:
+    xlsxwriter = None
+
+# 每次从DataFrame取出转换为Python对象的行数
+CHUNK_ROWS = 10000
+# 高亮颜色：红色字体、浅红色背景
+HIGHLIGHT_FONT_COLOR = "FF0000"
+HIGHLIGHT_FILL_COLOR = "FFC7CE"
+
+
+def iter_rows(report_df, chunk_rows=CHUNK_ROWS):
+    """
+    按块将报表转为Python值的行元组（空值转为None，写出为空单元格）
+
+    参数:
+        report_df (pd.DataFrame): 报表
+        chunk_rows (int): 每块行数
+
+    返回:
+        generator: 逐行产出的值元组
+    """
+    for start in range(0, len(report_df), chunk_rows):
+        chunk = report_df.iloc[start:start + chunk_rows]
+        columns = [
+            chunk[col].astype(object).where(chunk[col].notna(), None).tolist()
+            for col in chunk.columns
+        ]
+        yield from zip(*columns)
+
+
+def _write_sheet_xlsxwriter(workbook, sheet_name, report_df, label_cols, total_row, highlight):
+    """xlsxwriter constant_memory 模式写出单个工作表（行必须按顺序写入）"""
+    ws = workbook.add_worksheet(sheet_name)
+    bold = workbook.add_format({'bold': True})
+    n_rows = len(report_df)
+
+    ws.write_row(0, 0, [str(col) for col in report_df.columns], bold)
+    for i, row in enumerate(iter_rows(report_df), start=1):
+        ws.write_row(i, 0, row, bold if total_row and i == n_rows else None)
+
+    if highlight and n_rows and len(report_df.columns) > label_cols:
+        font_threshold, fill_threshold = highlight
+        last_col = len(report_df.columns) - 1
+        ws.conditional_format(1, label_cols, n_rows, last_col, {
+            'type': 'cell', 'criteria': '>', 'value': font_threshold,
+            'format': workbook.add_format({'font_color': '#' + HIGHLIGHT_FONT_COLOR}),
+        })
+        ws.conditional_format(1, label_cols, n_rows, last_col, {
+            'type': 'cell', 'criteria': '>', 'value': fill_threshold,
+            'format': workbook.add_format({'bg_color': '#' + HIGHLIGHT_FILL_COLOR}),
+        })
+
+
+def _write_sheet_openpyxl(workbook, sheet_name, report_df, label_cols, total_row, highlight):
+    """openpyxl write_only 模式写出单个工作表（行写入临时文件，保存时再拼接）"""
+    ws = workbook.create_sheet(sheet_name)
+    bold = Font(bold=True)
+    n_rows = len(report_df)
+
+    def styled(values):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = bold
+            cells.append(cell)
+        return cells
+
+    ws.append(styled(str(col) for col in report_df.columns))
+    for i, row in enumerate(iter_rows(report_df), start=1):
+        ws.append(styled(row) if total_row and i == n_rows else row)
+
+    if highlight and n_rows and len(report_df.columns) > label_cols:
+        font_threshold, fill_threshold = highlight
+        cell_range = (f"{get_column_letter(label_cols + 1)}2:"
+                      f"{get_column_letter(len(report_df.columns))}{n_rows + 1}")
+        ws.conditional_formatting.add(cell_range, CellIsRule(
+            operator='greaterThan', formula=[str(font_threshold)],
+            font=Font(color=HIGHLIGHT_FONT_COLOR)
+        ))
+        ws.conditional_formatting.add(cell_range, CellIsRule(
+            operator='greaterThan', formula=[str(fill_threshold)],
+            fill=PatternFill(start_color=HIGHLIGHT_FILL_COLOR, end_color=HIGHLIGHT_FILL_COLOR, fill_type="solid")
+        ))
+
+
+def write_sheets(file_path, sheets):
+    """
+    流式写出多个工作表到一个Excel文件
+
+    参数:
+        file_path (str): 输出文件路径
+        sheets (list): 工作表列表，每项为 (工作表名, 报表DataFrame, 选项dict)，选项包括：
+            label_cols (int): 前几列为行标签，其余为数值列，默认2
+            total_row (bool): 最后一行是否为合计行（加粗），默认True
+            highlight (tuple): (红色字体阈值, 红色背景阈值)，数值列大于阈值时高亮；默认None不高亮
+    """
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
+        for sheet_name, report_df, options in sheets:
+            _write_sheet_xlsxwriter(
+                workbook, sheet_name, report_df, options.get('label_cols', 2),
+                options.get('total_row', True), options.get('highlight')
+            )
+        workbook.close()
+    else:
+        workbook = Workbook(write_only=True)
+        for sheet_name, report_df, options in sheets:
+            _write_sheet_openpyxl(
+                workbook, sheet_name, report_df, options.get('label_cols', 2),
+                options.get('total_row', True), options.get('highlight')
+            )
+        workbook.save(file_path)
+
+
+def write_report(report_df, file_path, sheet_name='Sheet1', **options):
+    """
+    流式写出单个报表到Excel文件（选项同 write_sheets）
+
+    参数:
+        report_df (pd.DataFrame): 报表
+        file_path (str): 输出文件路径
+        sheet_name (str): 工作表名
+    """
+    write_sheets(file_path, [(sheet_name, report_df, options)])
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : exporters.py
+# @Description :
+
+"""报表导出模块
+按格式名注册导出函数（EXPORTERS），同一份报表可同时导出多种格式：
+    xlsx:   Excel（流式写出，带合计行加粗和高亮，供人阅读）
+    parquet: 列式存储，供BI工具读取（需安装 pyarrow）
+    arrow:  Arrow IPC（Feather v2）文件，可内存映射直接读取（需安装 pyarrow）
+    csv.gz: gzip 压缩的CSV，无额外依赖
+输出目录由 OUTPUT_CONFIG 配置，未配置时使用用户主目录下的 Desktop（Windows/Linux 均可用）。
+Excel写出模块（openpyxl）在导出时才导入，只计算输出路径（检查缓存）时不加载。
+"""
+import os
+from config import OUTPUT_CONFIG
+
+
+def output_dir():
+    """
+    报表输出目录：环境变量 REPORT_OUTPUT_DIR > OUTPUT_CONFIG["dir"] > 用户主目录下的 Desktop，
+    目录不存在时自动创建
+
+    返回:
+        str: 输出目录
+    """
+    path = os.environ.get("REPORT_OUTPUT_DIR") or OUTPUT_CONFIG["dir"] \
+        or os.path.join(os.path.expanduser("~"), "Desktop")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def columnar_frame(report_df):
+    """
+    列式格式要求列名为字符串、每列类型一致：标签列统一转为字符串（合计行标签为空字符串）
+
+    参数:
+        report_df (pd.DataFrame): 报表
+
+    返回:
+        pd.DataFrame: 可写出为列式格式的报表
+    """
+    report_df = report_df.copy()
+    report_df.columns = [str(col) for col in report_df.columns]
+    for col in report_df.columns:
+        if report_df[col].dtype == object:
+            report_df[col] = report_df[col].fillna('').astype(str)
+    return report_df
+
+
+def export_xlsx(report_df, file_path, **options):
+    """Excel格式（选项同 excel_writer.write_sheets）"""
+    from excel_writer import write_report
+    write_report(report_df, file_path, **options)
+
+
+def export_parquet(report_df, file_path, **options):
+    """Parquet格式"""
+    columnar_frame(report_df).to_parquet(file_path, index=False)
+
+
+def export_arrow(report_df, file_path, **options):
+    """Arrow IPC（Feather v2，不压缩，便于内存映射读取）"""
+    columnar_frame(report_df).to_feather(file_path, compression='uncompressed')
+
+
+def export_csv_gz(report_df, file_path, **options):
+    """gzip 压缩的CSV（utf-8-sig，Excel可直接打开解压后的文件）"""
+    report_df.to_csv(file_path, index=False, encoding='utf-8-sig', compression='gzip')
+
+
+# 格式名 → 导出函数，格式名同时作为文件扩展名
+EXPORTERS = {
+    "xlsx": export_xlsx,
+    "parquet": export_parquet,
+    "arrow": export_arrow,
+    "csv.gz": export_csv_gz,
+}
+
+
+def report_path(base_name, fmt):
+    """
+    报表在输出目录中的路径
+
+    参数:
+        base_name (str): 不含扩展名的文件名
+        fmt (str): 格式名（EXPORTERS 的键）
+
+    返回:
+        str: 完整路径
+    """
+    return os.path.join(output_dir(), f"{base_name}.{fmt}")
+
+
+def export_formats(report_df, base_name, formats=None, **options):
+    """
+    按多种格式导出同一份报表，单个格式失败不影响其他格式
+
+    参数:
+        report_df (pd.DataFrame): 报表
+        base_name (str): 不含扩展名的文件名
+        formats (list): 格式名列表，默认使用 OUTPUT_CONFIG["formats"]
+        **options: 传给各导出函数的选项（xlsx 使用 label_cols/total_row/highlight）
+
+    返回:
+        list: 导出成功的文件路径
+    """
+    written = []
+    for fmt in formats or OUTPUT_CONFIG["formats"]:
+        if fmt not in EXPORTERS:
+            print(f"不支持的导出格式：{fmt}（可选：{'、'.join(EXPORTERS)}）")
+            continue
+        file_path = report_path(base_name, fmt)
+        try:
+            EXPORTERS[fmt](report_df, file_path, **options)
+            written.append(file_path)
+        except ImportError as e:
+            print(f"导出{fmt}格式缺少依赖库，已跳过：{e}")
+        except Exception as e:
+            print(f"导出{fmt}格式失败：{e}")
+    return written
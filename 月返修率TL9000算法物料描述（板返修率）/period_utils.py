@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : period_utils.py
+# @Description :
+
+"""月份键工具模块
+各报表统一用整数月份键（年×12 + 月 - 1）分组、关联、过滤和排序，相邻月份相差1；
+"2023-05"、"Jan-23" 等显示标签只在导出时生成，计算过程中不再解析日期字符串。
+报表统计区间（PERIOD_CONFIG 或 cli.py --start/--end）转为查询条件下推到 SQL，区间外的行不从数据库读出。
+numpy/pandas 在用到时才导入（cli.py 检查报表缓存时需要统计区间，但不加载数据处理库）
+"""
+from config import PERIOD_CONFIG
+
+# 本次运行指定的统计区间（"年-月"标签），为None时使用 PERIOD_CONFIG
+_period_override = None
+
+
+def month_key(year, month):
+    """
+    年、月转为整数月份键
+
+    参数:
+        year: 年份（整数、数组或Series）
+        month: 月份（1~12）
+
+    返回:
+        与输入同形状的整数月份键
+    """
+    return year * 12 + month - 1
+
+
+def month_key_from_dates(dates):
+    """
+    日期列转为整数月份键
+
+    参数:
+        dates (pd.Series): 日期列（date/datetime/日期字符串均可）
+
+    返回:
+        np.ndarray: 整数月份键
+    """
+    import pandas as pd
+    dates = pd.to_datetime(dates)
+    return month_key(dates.dt.year, dates.dt.month).to_numpy()
+
+
+def month_key_from_label(label):
+    """
+    "2023-05" 格式的月份标签转为整数月份键（用于解析查询参数）
+
+    参数:
+        label (str): 年-月标签
+
+    返回:
+        int: 整数月份键
+    """
+    year, month = str(label).strip().split('-')[:2]
+    if not 1 <= int(month) <= 12:
+        raise ValueError(f"月份应为1~12：{label}")
+    return month_key(int(year), int(month))
+
+
+def period_labels(keys, fmt='%Y-%m'):
+    """
+    整数月份键转为显示用的月份标签（仅在导出时调用）
+
+    参数:
+        keys (np.ndarray): 整数月份键
+        fmt (str): strftime 格式，如 '%Y-%m'（2023-01）或 '%b-%y'（Jan-23）
+
+    返回:
+        list: 月份标签字符串列表
+    """
+    import numpy as np
+    import pandas as pd
+    keys = np.asarray(keys, dtype=np.int64)
+    dates = pd.to_datetime(pd.DataFrame({'year': keys // 12, 'month': keys % 12 + 1, 'day': 1}))
+    return dates.dt.strftime(fmt).tolist()
+
+
+def month_start_date(key):
+    """整数月份键转为该月1日的日期字符串，如 "2023-05-01"（用于日期字段的区间条件）"""
+    return f"{key // 12:04d}-{key % 12 + 1:02d}-01"
+
+
+def set_report_period(start=None, end=None):
+    """
+    指定本次运行的报表统计区间（cli.py --start/--end），未指定的一端使用 PERIOD_CONFIG
+
+    参数:
+        start (str): 起始月份（"2023-01"格式）
+        end (str): 结束月份（"2023-12"格式）
+    """
+    global _period_override
+    _period_override = (start, end)
+
+
+def report_period():
+    """
+    当前报表统计区间
+
+    返回:
+        tuple: (start, end) 整数月份键（闭区间），不限的一端为None
+    """
+    start, end = _period_override or (None, None)
+    start = start or PERIOD_CONFIG["start"]
+    end = end or PERIOD_CONFIG["end"]
+    start = month_key_from_label(start) if start else None
+    end = month_key_from_label(end) if end else None
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"统计区间起始月份晚于结束月份：{month_start_date(start)[:7]} ~ {month_start_date(end)[:7]}")
+    return start, end
+
+
+def period_condition(year_col, month_col, start, end):
+    """
+    年、月字段的区间条件（WHERE 子句片段）。表达式与 repair_stats 的 period_key 生成列定义相同，
+    MySQL 会改用该列上的 idx_period 索引做范围扫描；没有该列的库（如 sqlite）上同样可以执行
+
+    参数:
+        year_col (str): 年份字段，如 "year" 或 "rs.year"
+        month_col (str): 月份字段
+        start (int): 起始月份键，None 表示不限
+        end (int): 结束月份键，None 表示不限
+
+    返回:
+        str: 查询条件（月份键为整数，直接写入 SQL），不限区间时为 "1 = 1"
+    """
+    expr = f"{year_col} * 12 + {month_col} - 1"
+    conditions = []
+    if start is not None:
+        conditions.append(f"{expr} >= {int(start)}")
+    if end is not None:
+        conditions.append(f"{expr} <= {int(end)}")
+    return " AND ".join(conditions) or "1 = 1"
+
+
+def date_condition(date_col, start, end):
+    """
+    日期字段的区间条件：[起始月1日, 结束月的下月1日)，可直接使用日期字段上的索引
+
+    参数:
+        date_col (str): 日期字段，如 "ms.date"
+        start (int): 起始月份键，None 表示不限
+        end (int): 结束月份键，None 表示不限
+
+    返回:
+        str: 查询条件，不限区间时为 "1 = 1"
+    """
+    conditions = []
+    if start is not None:
+        conditions.append(f"{date_col} >= '{month_start_date(int(start))}'")
+    if end is not None:
+        conditions.append(f"{date_col} < '{month_start_date(int(end) + 1)}'")
+    return " AND ".join(conditions) or "1 = 1"
@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : rate_service.py
+# @Description :
+
+"""返修率本地查询服务
+常驻进程，在内存中保存 物料 × 月份 稠密矩阵及各装机基数窗口的返修率，以JSON回答查询，
+无需每次重跑 月返修率.py 再打开Excel：
+    GET /rates?material=物料代码&board=单板料号&start=2023-01&end=2024-06&window=1
+        指定物料/单板（可逗号分隔多个）在月份区间内的逐月返修率，附全局返修率
+    GET /top?n=10&start=2023-01&end=2024-06&window=1
+        区间返修率（区间返修量 ÷ 区间装机基数之和）最高的n个物料
+    GET /status    当前快照的加载时间、源表版本和规模
+    GET /refresh   立即重新加载
+后台线程每 SERVICE_CONFIG["refresh_seconds"] 秒检查源表行数和 MAX(import_time)，
+有新导入时重新加载，新快照构建完成后整体替换，查询不会读到一半更新的数据。
+SERVICE_CONFIG["sqlite_path"] 不为空时读取本地 sqlite 数据库（表结构与MySQL相同）。
+
+    python rate_service.py
+"""
+import json
+import sqlite3
+import threading
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from db_utils import create_db_connection, close_db_connection
+from config import DB_CONFIG1, TL9000_CONFIG, SERVICE_CONFIG
+from combined_report import read_shared_data
+from 月返修率 import summarize_monthly, build_rate_matrix, compute_rates, calc_rate
+from period_utils import month_key_from_label, period_labels
+from report_cache import table_fingerprint
+
+# 服务读取的源表（用于判断是否有新导入）
+SOURCE_TABLES = ["material_stock", "material_info", "material_stats", "repair_stats"]
+
+
+@dataclass
+class RateSnapshot:
+    """
+    某一时刻源数据的返修率快照（只读，刷新时整体替换）
+
+    属性:
+        matrix: 物料 × 月份稠密矩阵（inbound_qty、repair_qty）
+        rates (dict): 窗口（月）→ compute_rates 的计算结果
+        material_rows (dict): 物料代码 → 行号列表
+        board_rows (dict): 单板料号 → 行号列表（按 material_stats 的对照关系）
+        version (str): 源表版本（行数和最近导入时间）
+        loaded_at (str): 加载时间
+    """
+    matrix: object
+    rates: dict
+    material_rows: dict
+    board_rows: dict
+    version: str
+    loaded_at: str = field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def connect():
+    """按配置连接 sqlite 数据库文件或 MySQL"""
+    if SERVICE_CONFIG["sqlite_path"]:
+        return sqlite3.connect(SERVICE_CONFIG["sqlite_path"])
+    return create_db_connection(**DB_CONFIG1)
+
+
+def source_version(conn):
+    """
+    源表版本：各表行数和 MAX(import_time)（不做 CHECKSUM TABLE，检查足够轻量，可频繁执行）
+
+    参数:
+        conn: 数据库连接对象
+
+    返回:
+        str: 版本字符串，源表有新导入时改变
+    """
+    version = {table: table_fingerprint(conn, table, checksum=False) for table in SOURCE_TABLES}
+    return json.dumps(version, sort_keys=True, default=str)
+
+
+def build_snapshot(data, version):
+    """
+    在明细数据上构建返修率快照
+
+    参数:
+        data (dict): read_shared_data 的返回值
+        version (str): 源表版本
+
+    返回:
+        RateSnapshot: 快照；无有效数据时返回None
+    """
+    stock_monthly, repair_monthly = summarize_monthly(data["stock"], data["repair"])
+    matrix, unmatched_repairs = build_rate_matrix(stock_monthly, repair_monthly)
+    if matrix is None:
+        return None
+    rates = {window: compute_rates(matrix, unmatched_repairs, window) for window in TL9000_CONFIG["windows"]}
+
+    material_rows = {}
+    for row, code in enumerate(matrix.labels['material_code']):
+        material_rows.setdefault(str(code), []).append(row)
+    board_rows = {}
+    for code, board in zip(data["material"]['material_code'], data["material"]['board_code']):
+        board_rows.setdefault(str(board), []).extend(material_rows.get(str(code), []))
+    return RateSnapshot(matrix, rates, material_rows, board_rows, version)
+
+
+def load_snapshot():
+    """
+    连接数据库读取明细并构建快照
+
+    返回:
+        RateSnapshot: 快照；连接失败、读取或构建失败、无数据时返回None
+    """
+    conn = connect()
+    if conn is None:
+        return None
+    try:
+        version = source_version(conn)
+        data = read_shared_data(conn)
+    except Exception as e:
+        print(f"数据加载失败: {e}")
+        return None
+    finally:
+        close_db_connection(conn)
+    try:
+        return build_snapshot(data, version)
+    except Exception as e:
+        # 后台刷新线程中抛出会使线程退出，之后不再刷新
+        print(f"构建返修率快照失败: {e}")
+        traceback.print_exc()
+        return None
+
+
+def period_slice(snapshot, start=None, end=None):
+    """
+    "2023-01" 格式的起止月份转为矩阵列切片（闭区间，超出范围时截断到已有月份）
+
+    参数:
+        snapshot (RateSnapshot): 快照
+        start (str): 起始月份，为空时从第一个月开始
+        end (str): 结束月份，为空时到最后一个月
+
+    返回:
+        slice: 列切片
+    """
+    matrix = snapshot.matrix
+    lo = 0 if not start else max(month_key_from_label(start) - matrix.start, 0)
+    hi = matrix.n_periods if not end else min(month_key_from_label(end) - matrix.start + 1, matrix.n_periods)
+    if lo >= hi:
+        raise ValueError(f"月份区间 {start or '最早'}~{end or '最新'} 内没有数据")
+    return slice(lo, hi)
+
+
+def window_rates(snapshot, window):
+    """取指定窗口的返修率计算结果，窗口未预先计算时报错"""
+    if window not in snapshot.rates:
+        raise ValueError(f"不支持的窗口 {window}，可选：{sorted(snapshot.rates)}")
+    return snapshot.rates[window]
+
+
+def query_rates(snapshot, materials=(), boards=(), start=None, end=None, window=1):
+    """
+    查询物料/单板在月份区间内的逐月返修率
+
+    参数:
+        snapshot (RateSnapshot): 快照
+        materials (list): 物料代码
+        boards (list): 单板料号
+        start, end (str): 起止月份（"2023-01"格式）
+        window (int): 装机基数窗口（月）
+
+    返回:
+        dict: periods（月份标签）、rows（每个物料的逐月返修量、装机基数、返修率）、global（全局返修率）
+    """
+    cols = period_slice(snapshot, start, end)
+    result = window_rates(snapshot, window)
+    matrix = snapshot.matrix
+
+    rows = []
+    for code in materials:
+        rows.extend(snapshot.material_rows.get(code, []))
+    for board in boards:
+        rows.extend(snapshot.board_rows.get(board, []))
+    rows = sorted(set(rows))
+
+    return {
+        "window": window,
+        "periods": period_labels(matrix.period_keys[cols]),
+        "rows": [
+            {
+                "material_code": str(matrix.labels['material_code'][row]),
+                "material_desc": str(matrix.labels['material_desc'][row]),
+                "repair_qty": matrix.data['repair_qty'][row, cols].tolist(),
+                "installed_base": result['installed_base'][row, cols].tolist(),
+                "rate": result['rates'][row, cols].tolist(),
+            }
+            for row in rows
+        ],
+        "global": result['global_rates'][cols].tolist(),
+    }
+
+
+def query_top(snapshot, n=10, start=None, end=None, window=1):
+    """
+    区间返修率最高的n个物料（区间返修量 ÷ 区间装机基数之和，无装机基数的物料不参与排名）
+
+    参数:
+        snapshot (RateSnapshot): 快照
+        n (int): 返回的物料数
+        start, end (str): 起止月份（"2023-01"格式）
+        window (int): 装机基数窗口（月）
+
+    返回:
+        dict: periods（区间起止月份）、rows（按区间返修率从高到低）
+    """
+    cols = period_slice(snapshot, start, end)
+    result = window_rates(snapshot, window)
+    matrix = snapshot.matrix
+
+    repairs = matrix.data['repair_qty'][:, cols].sum(axis=1)
+    base = result['installed_base'][:, cols].sum(axis=1)
+    range_rates = calc_rate(repairs, base)
+    candidates = np.flatnonzero(base > 0)
+    n = min(n, len(candidates))
+    # argpartition 只取前n个，再对这n个排序
+    top = candidates[np.argpartition(-range_rates[candidates], n - 1)[:n]] if n > 0 else candidates[:0]
+    top = top[np.argsort(-range_rates[top], kind='stable')]
+
+    labels = period_labels(matrix.period_keys[cols])
+    return {
+        "window": window,
+        "periods": [labels[0], labels[-1]],
+        "rows": [
+            {
+                "material_code": str(matrix.labels['material_code'][row]),
+                "material_desc": str(matrix.labels['material_desc'][row]),
+                "repair_qty": float(repairs[row]),
+                "installed_base": float(base[row]),
+                "rate": float(range_rates[row]),
+            }
+            for row in top
+        ],
+    }
+
+
+class RateRequestHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理：解析查询参数，从服务器当前快照计算结果并返回JSON"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        snapshot = self.server.snapshot
+        try:
+            if url.path == "/refresh":
+                refresh(self.server, force=True)
+                snapshot = self.server.snapshot
+            if url.path in ("/status", "/refresh"):
+                body = {"loaded": snapshot is not None}
+                if snapshot is not None:
+                    body.update(loaded_at=snapshot.loaded_at, version=json.loads(snapshot.version),
+                                materials=snapshot.matrix.n_rows, periods=snapshot.matrix.n_periods,
+                                windows=sorted(snapshot.rates))
+                return self.send_json(200, body)
+            if snapshot is None:
+                return self.send_json(503, {"error": "数据尚未加载"})
+
+            window = int(params.get("window", 1))
+            if url.path == "/rates":
+                body = query_rates(
+                    snapshot,
+                    materials=[c for c in params.get("material", "").split(",") if c],
+                    boards=[c for c in params.get("board", "").split(",") if c],
+                    start=params.get("start"), end=params.get("end"), window=window
+                )
+            elif url.path == "/top":
+                body = query_top(snapshot, int(params.get("n", 10)), params.get("start"), params.get("end"), window)
+            else:
+                return self.send_json(404, {"error": f"未知路径 {url.path}"})
+            self.send_json(200, body)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            # 数据库、快照计算等内部错误：记录堆栈，客户端收到JSON错误而不是断开的连接
+            print(f"处理请求 {self.path} 失败: {e}")
+            traceback.print_exc()
+            self.send_json(500, {"error": f"服务内部错误: {type(e).__name__}: {e}"})
+
+    def send_json(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def refresh(server, force=False):
+    """
+    检查源表版本，有新导入（或强制刷新）时重新加载并替换快照
+
+    参数:
+        server: HTTP服务器对象（snapshot 属性保存当前快照）
+        force (bool): 是否跳过版本比较直接重新加载
+    """
+    with server.refresh_lock:
+        current = server.snapshot
+        if not force and current is not None:
+            conn = connect()
+            if conn is None:
+                return
+            try:
+                if source_version(conn) == current.version:
+                    return
+            except Exception as e:
+                print(f"检查源表版本失败: {e}")
+                return
+            finally:
+                close_db_connection(conn)
+        snapshot = load_snapshot()
+        if snapshot is not None:
+            server.snapshot = snapshot
+            print(f"返修率快照已更新：{snapshot.matrix.n_rows} 个物料 × {snapshot.matrix.n_periods} 个月")
+
+
+def refresh_loop(server, stop_event):
+    """后台线程：按配置间隔检查并刷新快照"""
+    while not stop_event.wait(SERVICE_CONFIG["refresh_seconds"]):
+        refresh(server)
+
+
+def main():
+    """加载初始快照→启动后台刷新线程→启动HTTP服务"""
+    server = ThreadingHTTPServer((SERVICE_CONFIG["host"], SERVICE_CONFIG["port"]), RateRequestHandler)
+    server.snapshot = None
+    server.refresh_lock = threading.Lock()
+    refresh(server, force=True)
+
+    stop_event = threading.Event()
+    threading.Thread(target=refresh_loop, args=(server, stop_event), daemon=True).start()
+    print(f"返修率查询服务已启动：http://{SERVICE_CONFIG['host']}:{SERVICE_CONFIG['port']}/status")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
+        print("返修率查询服务已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : report_cache.py
+# @Description :
+
+"""报表输出缓存模块
+按报表读取的源表计算输入指纹：每张表的 行数、MAX(import_time)、CHECKSUM TABLE，
+加上报表名和参数，取 sha256。输出文件按指纹存入缓存目录：
+    指纹未变 → 直接复制缓存文件到输出位置，跳过查询、计算和写Excel；
+    指纹变化 → 正常生成报表，再存入缓存。
+数据未更新时，定时任务几乎不做任何工作。
+"""
+import os
+import json
+import shutil
+import string
+import hashlib
+from db_utils import create_db_connection, close_db_connection, run_query
+from config import DB_CONFIG1, CACHE_CONFIG
+
+
+def table_fingerprint(conn, table, checksum=None):
+    """
+    单张源表的指纹信息
+
+    参数:
+        conn: 数据库连接对象
+        table (str): 表名
+        checksum (bool): 是否计算 CHECKSUM TABLE，默认使用 CACHE_CONFIG["checksum"]
+
+    返回:
+        list: [行数, 最近导入时间, 表校验和]（未启用校验和时为None）
+    """
+    # sqlite 游标不支持 with 语句，逐个关闭
+    cursor = run_query(conn, f"SELECT COUNT(*), MAX(import_time) FROM `{table}`")
+    row_count, last_import = cursor.fetchone()
+    cursor.close()
+    if checksum is None:
+        checksum = CACHE_CONFIG["checksum"]
+    if not checksum:
+        return [row_count, str(last_import), None]
+    cursor = run_query(conn, f"CHECKSUM TABLE `{table}`")
+    table_checksum = cursor.fetchone()[1]
+    cursor.close()
+    return [row_count, str(last_import), table_checksum]
+
+
+def report_fingerprint(tables, params):
+    """
+    计算报表的输入指纹
+
+    参数:
+        tables (list): 报表读取的源表名
+        params (dict): 报表名和影响输出的参数（需可JSON序列化）
+
+    返回:
+        str: sha256 十六进制指纹；数据库不可用时返回None（不使用缓存）
+    """
+    conn = create_db_connection(**DB_CONFIG1)
+    if conn is None:
+        return None
+    try:
+        source = {table: table_fingerprint(conn, table) for table in sorted(tables)}
+    except Exception as e:
+        print(f"计算报表指纹失败，本次不使用缓存: {e}")
+        return None
+    finally:
+        close_db_connection(conn)
+    payload = json.dumps({"tables": source, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_file(fingerprint, file_path):
+    """缓存目录中与指纹、输出文件名对应的路径"""
+    return os.path.join(CACHE_CONFIG["dir"], fingerprint, os.path.basename(file_path))
+
+
+def has_cached(fingerprint, file_path):
+    """是否存在指纹对应的缓存输出（只检查，不复制、不更新使用时间）"""
+    return fingerprint is not None and os.path.exists(cached_file(fingerprint, file_path))
+
+
+def restore_cached(fingerprint, file_path):
+    """
+    若存在指纹对应的缓存输出，复制到输出位置
+
+    参数:
+        fingerprint (str): report_fingerprint 的返回值（None 表示不使用缓存）
+        file_path (str): 报表输出路径
+
+    返回:
+        bool: 命中缓存返回True
+    """
+    if fingerprint is None:
+        return False
+    cached = cached_file(fingerprint, file_path)
+    if not os.path.exists(cached):
+        return False
+    shutil.copyfile(cached, file_path)
+    # 更新目录时间，清理旧缓存时按最近使用排序
+    os.utime(os.path.dirname(cached))
+    print(f"源数据未变化，已使用缓存报表：{file_path}")
+    return True
+
+
+def store_cached(fingerprint, file_path):
+    """
+    将新生成的报表存入缓存（先写临时文件再改名，中断时不会留下不完整的缓存），
+    并清理超出保留数量的旧指纹目录
+
+    参数:
+        fingerprint (str): report_fingerprint 的返回值（None 时不缓存）
+        file_path (str): 已生成的报表路径
+    """
+    if fingerprint is None or not os.path.exists(file_path):
+        return
+    cached = cached_file(fingerprint, file_path)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    tmp_path = cached + ".tmp"
+    shutil.copyfile(file_path, tmp_path)
+    os.replace(tmp_path, cached)
+    prune_cache()
+
+
+def is_fingerprint_dir(path):
+    """是否为缓存的指纹目录（目录名为64位十六进制 sha256）"""
+    name = os.path.basename(path)
+    return len(name) == 64 and all(c in string.hexdigits for c in name) and os.path.isdir(path)
+
+
+def prune_cache():
+    """
+    只保留最近使用的 CACHE_CONFIG["keep"] 个指纹目录；缓存目录中的其他目录和文件
+    （如旧版本放在同一目录下的快照、运行记录）不删除
+    """
+    cache_dir = CACHE_CONFIG["dir"]
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+    entries = sorted((p for p in entries if is_fingerprint_dir(p)), key=os.path.getmtime, reverse=True)
+    for path in entries[CACHE_CONFIG["keep"]:]:
+        shutil.rmtree(path, ignore_errors=True)
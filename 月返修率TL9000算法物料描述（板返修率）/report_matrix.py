@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : report_matrix.py
+# @Description :
+
+"""报表核心数据结构：物料 × 月份 稠密矩阵
+物料按整数行号编码，月份用连续整数键（见 period_utils），入库量、返修量、返修率等指标
+均为 (物料数 × 月份数) 的二维 NumPy 数组，行标签通过字典查找。
+透视、合计、排序、滚动窗口都直接在数组上完成，仅在导出时才生成 DataFrame。
+"""
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from rolling_window import dense_matrix, rolling_sum
+from period_utils import period_labels
+
+
+@dataclass
+class ReportMatrix:
+    """
+    物料 × 月份 稠密矩阵
+
+    属性:
+        label_cols (list): 行标签列名，如 ['material_code', 'material_desc']
+        labels (dict): 行标签列名 → 按行号排列的标签数组
+        start (int): 第一列的整数月份键，各列月份连续
+        data (dict): 指标名 → 二维数组（行：物料，列：月份）
+        row_index (dict): 行标签元组 → 行号
+    """
+    label_cols: list
+    labels: dict
+    start: int
+    data: dict
+    row_index: dict = field(default_factory=dict)
+
+    @property
+    def n_rows(self):
+        return len(self.labels[self.label_cols[0]])
+
+    @property
+    def n_periods(self):
+        return next(iter(self.data.values())).shape[1]
+
+    @property
+    def period_keys(self):
+        """各列对应的整数月份键"""
+        return np.arange(self.start, self.start + self.n_periods)
+
+    def period_position(self, keys):
+        """
+        整数月份键转为列号，超出矩阵月份范围的返回-1
+
+        参数:
+            keys (np.ndarray): 整数月份键
+
+        返回:
+            np.ndarray: 列号
+        """
+        pos = np.asarray(keys, dtype=np.int64) - self.start
+        return np.where((pos >= 0) & (pos < self.n_periods), pos, -1)
+
+    def totals(self, name):
+        """
+        指标按月合计（所有物料之和）
+
+        参数:
+            name (str): 指标名
+
+        返回:
+            np.ndarray: 长度为月份数的一维数组
+        """
+        return self.data[name].sum(axis=0)
+
+    def rolling(self, name, window):
+        """
+        指标的尾随窗口和（近window个月之和）
+
+        参数:
+            name (str): 指标名
+            window (int): 窗口长度（月）
+
+        返回:
+            np.ndarray: 与原指标同形状的窗口和矩阵
+        """
+        return rolling_sum(self.data[name], window)
+
+    def to_frame(self, values, total_label=None, total_values=None, fmt='%Y-%m', cols=slice(None)):
+        """
+        导出为宽表 DataFrame（行标签列 + 每月一列），可在末尾追加合计行
+
+        参数:
+            values (np.ndarray): 要导出的二维数组（行：物料，列：月份）
+            total_label (tuple): 合计行的行标签，与 label_cols 一一对应；为None时不加合计行
+            total_values (np.ndarray): 合计行各月的值
+            fmt (str): 月份列标签格式
+            cols (slice): 导出的月份列，默认全部
+
+        返回:
+            pd.DataFrame: 报表宽表
+        """
+        columns = period_labels(self.period_keys[cols], fmt)
+        labels = {col: list(self.labels[col]) for col in self.label_cols}
+        values = np.asarray(values)[:, cols]
+        if total_label is not None:
+            values = np.vstack([values, np.asarray(total_values)[cols].reshape(1, -1)])
+            for col, label in zip(self.label_cols, total_label):
+                labels[col].append(label)
+
+        frame = pd.DataFrame(values, columns=columns)
+        for i, col in enumerate(self.label_cols):
+            frame.insert(i, col, labels[col])
+        return frame
+
+
+def build_matrix(records, label_cols, key_col, value_cols, dtype=np.int32):
+    """
+    将长表（每行一个物料一个月的数值）累加为稠密矩阵，行按标签排序，月份从最小到最大连续
+
+    参数:
+        records (pd.DataFrame): 长表
+        label_cols (list): 行标签列名；任一标签为空的记录会被丢弃（与 pivot_table 一致）
+        key_col (str): 整数月份键列名
+        value_cols (list): 需要累加的数值列名，每列生成一个同名指标
+        dtype: 指标数组的数据类型（计数用 int32）
+
+    返回:
+        ReportMatrix: 稠密矩阵；records 为空时返回None
+    """
+    records = records.dropna(subset=label_cols)
+    if records.empty:
+        return None
+
+    grouper = records.groupby(label_cols, sort=True, observed=True)
+    row_codes = grouper.ngroup().to_numpy()
+    row_labels = grouper.size().index.to_frame(index=False)
+    keys = records[key_col].to_numpy(dtype=np.int64)
+    start = int(keys.min())
+    period_idx = keys - start
+    n_rows = len(row_labels)
+    n_periods = int(period_idx.max()) + 1
+
+    data = {
+        col: dense_matrix(
+            row_codes, period_idx, records[col].fillna(0).to_numpy(dtype=np.float64), n_rows, n_periods
+        ).astype(dtype)
+        for col in value_cols
+    }
+    labels = {col: row_labels[col].to_numpy() for col in label_cols}
+    row_index = {label: row for row, label in enumerate(row_labels.itertuples(index=False, name=None))}
+    return ReportMatrix(label_cols, labels, start, data, row_index)
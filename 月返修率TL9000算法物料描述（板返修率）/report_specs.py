@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : report_specs.py
+# @Description :
+
+"""报表清单模块
+各报表读取的源表、影响输出的参数和输出文件路径。只依赖标准库和 config，
+不导入 pandas/openpyxl，cli.py 检查缓存时无需加载数据处理库。
+"""
+import os
+from config import TL9000_CONFIG, OUTPUT_CONFIG
+from exporters import output_dir, report_path
+from report_cache import report_fingerprint, has_cached, restore_cached
+from period_utils import report_period
+
+# 返修数量报表文件名（不含扩展名，不含时间戳）
+REPORT_NAME = "月返修率返修统计"
+# 汇总报表文件名
+OUTPUT_FILE = "返修报表汇总.xlsx"
+
+# 报表名 → 读取的源表和影响输出的参数（参与指纹计算，统计区间由 spec_fingerprint 统一加入）
+REPORT_SPECS = {
+    "rate": {
+        "tables": ["material_stock", "material_info", "repair_stats"],
+        "params": {"report": "月返修率", "config": TL9000_CONFIG},
+    },
+    "count": {
+        "tables": ["material_stats", "repair_stats"],
+        "params": {"report": "返修统计"},
+    },
+    "combined": {
+        "tables": ["material_stock", "material_info", "material_stats", "repair_stats"],
+        "params": {"report": "汇总报表", "config": TL9000_CONFIG},
+    },
+}
+
+
+def report_base_name(window=1):
+    """
+    返修率报表的文件名（不含扩展名），窗口大于1时文件名带窗口长度
+
+    参数:
+        window: 装机基数窗口（月）
+
+    返回:
+        str: 文件名
+    """
+    return "月返修率百分比统计" if window <= 1 else f"月返修率百分比统计_{window}个月窗口"
+
+
+def report_outputs(name):
+    """
+    报表的输出文件，按可单独生成的部分分组（返修率报表每个窗口一组）
+
+    参数:
+        name (str): 报表名（REPORT_SPECS 的键）
+
+    返回:
+        dict: 分组 → 输出文件路径列表
+    """
+    if name == "rate":
+        return {
+            window: [report_path(report_base_name(window), fmt) for fmt in OUTPUT_CONFIG["formats"]]
+            for window in TL9000_CONFIG["windows"]
+        }
+    if name == "count":
+        return {name: [report_path(REPORT_NAME, fmt) for fmt in OUTPUT_CONFIG["formats"]]}
+    return {name: [os.path.join(output_dir(), OUTPUT_FILE)]}
+
+
+def spec_fingerprint(name):
+    """
+    报表当前的输入指纹
+
+    参数:
+        name (str): 报表名（REPORT_SPECS 的键）
+
+    返回:
+        str: 指纹，数据库不可用时返回None
+    """
+    spec = REPORT_SPECS[name]
+    return report_fingerprint(spec["tables"], {**spec["params"], "period": report_period()})
+
+
+def restore_outputs(fingerprint, paths):
+    """
+    一组输出文件是否全部有缓存（有则复制到输出位置）
+
+    参数:
+        fingerprint (str): 输入指纹
+        paths (list): 输出文件路径
+
+    返回:
+        bool: 全部命中缓存时为True
+    """
+    return all(restore_cached(fingerprint, file_path) for file_path in paths)
+
+
+def all_cached(name, fingerprint):
+    """
+    报表的全部输出是否都有缓存（只检查，不恢复文件，供 cli.py --check 使用）
+
+    参数:
+        name (str): 报表名
+        fingerprint (str): 输入指纹
+
+    返回:
+        bool: 全部有缓存时为True
+    """
+    return all(has_cached(fingerprint, file_path) for paths in report_outputs(name).values() for file_path in paths)
+
+
+def pending_outputs(name, fingerprint):
+    """
+    恢复有缓存的输出，返回仍需生成的分组
+
+    参数:
+        name (str): 报表名
+        fingerprint (str): 输入指纹
+
+    返回:
+        list: 需要重新生成的分组（为空表示全部命中缓存）
+    """
+    return [group for group, paths in report_outputs(name).items() if not restore_outputs(fingerprint, paths)]
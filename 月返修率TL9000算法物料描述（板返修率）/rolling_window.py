@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : rolling_window.py
+# @Description :
+
+"""滚动窗口计算模块
+将 (行号, 月份列号, 数值) 累加为稠密矩阵（月份连续，缺失月份补0），
+用累计和相减求任意窗口长度的尾随窗口和，复杂度 O(物料数 × 月份数)，与窗口长度无关
+"""
+import numpy as np
+
+
+def dense_matrix(row_codes, period_idx, values, n_rows, n_periods):
+    """
+    将 (行号, 月份序号, 数值) 三元组累加为稠密矩阵
+
+    参数:
+        row_codes (np.ndarray): 行号（0 ~ n_rows-1）
+        period_idx (np.ndarray): 月份列号（0 ~ n_periods-1）
+        values (np.ndarray): 数值
+        n_rows (int): 行数
+        n_periods (int): 列数
+
+    返回:
+        np.ndarray: 形状为 (n_rows, n_periods) 的 float64 矩阵
+    """
+    flat = np.bincount(
+        row_codes * n_periods + period_idx,
+        weights=values,
+        minlength=n_rows * n_periods
+    )
+    return flat.reshape(n_rows, n_periods)
+
+
+def rolling_sum(matrix, window):
+    """
+    沿月份方向求尾随窗口和：第 j 列 = 第 j-window+1 列到第 j 列之和（不足窗口时取已有月份）
+
+    参数:
+        matrix (np.ndarray): 二维矩阵（行：物料，列：连续月份）
+        window (int): 窗口长度（月）
+
+    返回:
+        np.ndarray: 与 matrix 同形状的窗口和矩阵
+    """
+    if window <= 1:
+        return matrix.copy()
+    csum = np.cumsum(matrix, axis=1)
+    result = csum.copy()
+    result[:, window:] -= csum[:, :-window]
+    return result
+
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : sheet_cache.py
+# @Description :
+
+"""工作表解析缓存
+常驻进程（worker.py）中启用后，按 文件路径、修改时间、大小和读取参数 缓存 pd.read_excel 的结果，
+同一工作簿被多个导入任务读取（物料、返修导入读同一个文件）或重复提交时只解析一次；
+文件被修改后修改时间变化，自动重新解析。未启用时直接调用 pd.read_excel。
+"""
+import os
+from collections import OrderedDict
+import pandas as pd
+
+# 最多缓存的工作表数，0 表示不缓存
+_capacity = 0
+# 缓存键 → DataFrame，按最近使用排序
+_cache = OrderedDict()
+
+
+def enable(capacity):
+    """
+    启用缓存
+
+    参数:
+        capacity (int): 最多缓存的工作表数
+    """
+    global _capacity
+    _capacity = capacity
+
+
+def read_excel(path, **kwargs):
+    """
+    读取工作表，参数同 pd.read_excel；启用缓存时命中则返回缓存结果的副本（调用方可以修改）
+
+    参数:
+        path (str): Excel文件路径
+        **kwargs: 传给 pd.read_excel 的参数
+
+    返回:
+        pd.DataFrame: 工作表数据
+    """
+    if not _capacity:
+        return pd.read_excel(path, **kwargs)
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, repr(sorted(kwargs.items())))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key].copy()
+    df = pd.read_excel(path, **kwargs)
+    _cache[key] = df
+    while len(_cache) > _capacity:
+        _cache.popitem(last=False)
+    return df.copy()
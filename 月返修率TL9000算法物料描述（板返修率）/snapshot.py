@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : snapshot.py
+# @Description :
+
+"""报表数据快照模块
+每次导入后（cli.py import-*、watch_folder.py 或 python snapshot.py）将报表读取的三份数据
+写成 Arrow IPC 文件（SNAPSHOT_CONFIG["dir"] 下，不压缩，可直接内存映射）：
+    repair_stats     返修数据（board_code, count, year, month）
+    material_stock   入库数据（关联物料信息表，material_code, material_desc, date, quantity）
+    material_stats   物料主数据（material_code, material_desc, board_code）
+快照中保存写入时源表的指纹（行数、最近导入时间；与 rate_service.source_version 相同，不做 CHECKSUM TABLE，
+每次读取都要计算，不能全表扫描，sqlite 上也可执行）。报表读取时先比较指纹：
+    一致 → 内存映射快照文件，按统计区间过滤，不再经 pymysql 逐行传输和构造 Python 对象；
+    不一致（快照之后又有导入）、文件不存在或未安装 pyarrow → 照常执行 SQL。
+快照不含统计区间（全部数据），区间在读取时过滤，与 SQL 下推的结果相同。
+快照不可用时，返修和入库数据按 STREAM_CONFIG["chunksize"] 流式读取并逐块按月累加（见 data_loader.read_monthly_chunks）。
+"""
+import os
+import json
+import hashlib
+import importlib.util
+import numpy as np
+from db_utils import create_db_connection, close_db_connection
+from config import DB_CONFIG1, SNAPSHOT_CONFIG, STREAM_CONFIG
+from period_utils import month_key, month_key_from_dates
+from archive import archived_cutoff, repair_rows_sql, stock_rows_sql
+from data_loader import read_typed_sql, read_monthly_chunks
+from report_cache import table_fingerprint
+from common.instrumentation import timed_stage
+
+# 快照名 → (源表（第一个为明细热表）, 查询语句生成函数(起始月份键, 结束月份键, 已归档的月份键), 统计区间的过滤方式)
+SNAPSHOT_SOURCES = {
+    "repair_stats": (["repair_stats"], repair_rows_sql, "year_month"),
+    "material_stock": (["material_stock", "material_info"], stock_rows_sql, "date"),
+    "material_stats": (
+        ["material_stats"],
+        lambda start, end, archived: "SELECT material_code, material_desc, board_code FROM material_stats",
+        None,
+    ),
+}
+# 流式读取时的按月汇总方式：(分组字段, 累加字段)，物料主数据行数少，不分块读取
+MONTHLY_KEYS = {
+    "repair_stats": (["board_code", "year", "month"], "count"),
+    "material_stock": (["material_code", "material_desc", "date"], "quantity"),
+}
+# 已归档时，查询还会合并月度汇总表（archive.py），汇总表的变化和归档月份同样使快照失效
+ARCHIVE_SOURCES = {
+    "repair_stats": ["repair_stats_monthly"],
+    "material_stock": ["material_stock_monthly"],
+}
+
+
+def snapshot_path(name):
+    """快照文件路径"""
+    return os.path.join(SNAPSHOT_CONFIG["dir"], f"{name}.arrow")
+
+
+def source_fingerprint(conn, name):
+    """
+    快照对应源表的当前指纹（各表行数和最近导入时间）
+
+    参数:
+        conn: 数据库连接对象
+        name (str): 快照名（SNAPSHOT_SOURCES 的键）
+
+    返回:
+        str: sha256 十六进制指纹
+    """
+    tables = SNAPSHOT_SOURCES[name][0]
+    cutoff = archived_cutoff(conn, tables[0])
+    if cutoff is not None:
+        tables = tables + ARCHIVE_SOURCES.get(name, [])
+    source = {table: table_fingerprint(conn, table, checksum=False) for table in sorted(tables)}
+    payload = json.dumps({"tables": source, "cutoff": cutoff}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@timed_stage()
+def write_snapshot(conn, name):
+    """
+    读取全部数据写成 Arrow IPC 快照（先写临时文件再替换，读报表的进程不会读到一半的文件）
+
+    参数:
+        conn: 数据库连接对象
+        name (str): 快照名
+
+    返回:
+        int: 写入的行数
+    """
+    import pyarrow as pa
+    tables, build_sql, _ = SNAPSHOT_SOURCES[name]
+    # 指纹在读数据之前计算：读取期间若有新的导入，快照的指纹偏旧，下次读取时判定为过期，不会误用
+    fingerprint = source_fingerprint(conn, name)
+    df = read_typed_sql(conn, build_sql(None, None, archived_cutoff(conn, tables[0])), tables)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, b"fingerprint": fingerprint.encode()})
+
+    os.makedirs(SNAPSHOT_CONFIG["dir"], exist_ok=True)
+    path = snapshot_path(name)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    return len(df)
+
+
+def load_snapshot(conn, name):
+    """
+    快照未过期时内存映射读取
+
+    参数:
+        conn: 数据库连接对象
+        name (str): 快照名
+
+    返回:
+        pd.DataFrame: 快照数据；未启用、未安装 pyarrow、文件不存在或已过期时返回None
+    """
+    path = snapshot_path(name)
+    if not SNAPSHOT_CONFIG["enabled"] or not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        if reader.schema.metadata.get(b"fingerprint", b"").decode() != source_fingerprint(conn, name):
+            print(f"快照 {name} 已过期，改为查询数据库")
+            return None
+        # 数值列直接引用映射的文件内容，split_blocks 避免合并成二维块时再复制一次
+        return reader.read_all().to_pandas(split_blocks=True)
+    except Exception as e:
+        print(f"读取快照 {name} 失败，改为查询数据库: {e}")
+        return None
+
+
+def filter_period(df, kind, start, end):
+    """
+    快照数据按统计区间过滤（与 period_condition/date_condition 的条件相同）
+
+    参数:
+        df (pd.DataFrame): 快照数据
+        kind (str): "year_month"（年、月字段）、"date"（日期字段）或None（不按区间过滤）
+        start (int): 起始月份键，None 表示不限
+        end (int): 结束月份键，None 表示不限
+
+    返回:
+        pd.DataFrame: 区间内的行
+    """
+    if kind is None or (start is None and end is None):
+        return df
+    if kind == "year_month":
+        keys = month_key(df["year"].to_numpy(dtype=np.int64), df["month"].to_numpy(dtype=np.int64))
+    else:
+        keys = month_key_from_dates(df["date"])
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= keys >= start
+    if end is not None:
+        mask &= keys <= end
+    df = df[mask].reset_index(drop=True)
+    # 与按区间查询的结果一致：描述等 category 字段只保留区间内出现的取值
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+@timed_stage()
+def read_rows(conn, name, start=None, end=None):
+    """
+    报表读取数据的入口：快照有效时读快照，否则执行 SQL（区间条件下推）
+
+    参数:
+        conn: 数据库连接对象
+        name (str): 快照名
+        start (int): 起始月份键，None 表示不限
+        end (int): 结束月份键，None 表示不限
+
+    返回:
+        pd.DataFrame: 类型转换后的数据（字段同 SQL 查询结果；流式读取时为按月汇总，报表按月统计的结果不变）
+    """
+    tables, build_sql, kind = SNAPSHOT_SOURCES[name]
+    df = load_snapshot(conn, name)
+    if df is not None:
+        return filter_period(df, kind, start, end)
+    sql = build_sql(start, end, archived_cutoff(conn, tables[0]))
+    if STREAM_CONFIG["chunksize"] and name in MONTHLY_KEYS:
+        keys, value = MONTHLY_KEYS[name]
+        return read_monthly_chunks(conn, sql, tables, keys, value, STREAM_CONFIG["chunksize"])
+    return read_typed_sql(conn, sql, tables)
+
+
+def main():
+    """导入完成后调用：重新写出全部快照（未启用或未安装 pyarrow 时跳过）"""
+    if not SNAPSHOT_CONFIG["enabled"]:
+        return
+    if importlib.util.find_spec("pyarrow") is None:
+        print("未安装 pyarrow，跳过数据快照，报表将直接查询数据库")
+        return
+    conn = create_db_connection(**DB_CONFIG1)
+    if not conn:
+        return
+    try:
+        for name in SNAPSHOT_SOURCES:
+            rows = write_snapshot(conn, name)
+            print(f"已写出数据快照 {name}（{rows} 行）")
+    except Exception as e:
+        print(f"写出数据快照失败，报表将直接查询数据库: {e}")
+    finally:
+        close_db_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
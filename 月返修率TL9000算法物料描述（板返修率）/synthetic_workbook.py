@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : synthetic_workbook.py
+# @Description :
+
+"""模拟数据工作簿生成程序
+按导入脚本读取的列位置生成与客户工作簿结构一致的模拟数据，无需真实数据即可做规模测试：
+    改善统计：A 物料代码、B 物料描述（生产入库数据）、C 单板料号
+    返修：    第12列 数量、第13/14列 年/月、第15列 返修日期（ERI导入）、
+              第16/17列 年/月（TL9000导入）、第23列 单板料号，其余列留空
+    板子入库：A 物料代码、B 物料描述，H~AJ 列表头为月份日期、单元格为入库数量
+同一组参数（返修行数、物料数、随机种子）生成的数据完全相同。
+Excel 单个工作表最多 1048576 行，返修行数超过上限时不写工作簿，由基准测试直接写入数据库。
+
+    python synthetic_workbook.py 输出路径 返修行数 [物料数]
+"""
+import sys
+import numpy as np
+import pandas as pd
+from excel_writer import write_sheets
+from period_utils import month_key, period_labels
+
+# Excel 单个工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+# 板子入库工作表的月份列：H~AJ 共29列，从2023-01开始
+STOCK_FIRST_COL = 8
+STOCK_MONTHS = 29
+# 返修工作表共23列，各字段所在列（从0开始）
+REPAIR_COLUMNS = {
+    11: "数量", 12: "年", 13: "月", 14: "返修日期", 15: "年份", 16: "月份", 22: "单板料号"
+}
+
+
+def default_materials(n_repairs):
+    """返修行数对应的默认物料数（约每物料200条返修，100~50000之间）"""
+    return int(min(max(n_repairs // 200, 100), 50000))
+
+
+def generate_frames(n_repairs, n_materials=None, seed=0):
+    """
+    生成模拟的物料、返修、入库数据
+
+    参数:
+        n_repairs (int): 返修记录行数
+        n_materials (int): 物料数，默认按返修行数估算
+        seed (int): 随机种子
+
+    返回:
+        dict: material（物料代码/描述/单板料号）、repair（返修明细）、stock（物料 × 月份入库数量）
+    """
+    rng = np.random.default_rng(seed)
+    n_materials = n_materials or default_materials(n_repairs)
+    codes = np.array([f"M{i:07d}" for i in range(n_materials)])
+    descs = np.array([f"模拟物料{i}" for i in range(n_materials)])
+    # 单板料号与物料代码一致（与 月返修率.py 的关联假设相同）
+    material = pd.DataFrame({"material_code": codes, "material_desc": descs, "board_code": codes})
+
+    # 返修日期分布在入库月份范围内，少量返修集中的物料用 Zipf 分布模拟
+    start = pd.Timestamp(2023, 1, 1)
+    days = rng.integers(0, STOCK_MONTHS * 30, n_repairs)
+    dates = start + pd.to_timedelta(days, unit="D")
+    boards = (rng.zipf(1.3, n_repairs) - 1) % n_materials
+    repair = pd.DataFrame({
+        "board_code": pd.Categorical.from_codes(boards, categories=codes),
+        "count": rng.integers(1, 6, n_repairs),
+        "year": dates.year,
+        "month": dates.month,
+        "repair_date": dates.strftime("%Y-%m-%d"),
+    })
+
+    stock = pd.DataFrame(
+        rng.integers(0, 500, (n_materials, STOCK_MONTHS)),
+        columns=period_labels(month_key(2023, 1) + np.arange(STOCK_MONTHS), fmt="%Y-%m-%d"),
+    )
+    stock.insert(0, "material_desc", descs)
+    stock.insert(0, "material_code", codes)
+    return {"material": material, "repair": repair, "stock": stock}
+
+
+def material_sheet(frames):
+    """改善统计工作表：A~C列"""
+    return frames["material"].rename(columns={
+        "material_code": "物料代码", "material_desc": "物料描述（生产入库数据）", "board_code": "单板料号"
+    })
+
+
+def repair_sheet(frames):
+    """返修工作表：23列，导入脚本读取的列按位置填入，其余列留空"""
+    repair = frames["repair"]
+    values = {
+        11: repair["count"], 12: repair["year"], 13: repair["month"], 14: repair["repair_date"],
+        15: repair["year"], 16: repair["month"], 22: repair["board_code"].astype(str),
+    }
+    return pd.DataFrame({
+        REPAIR_COLUMNS.get(i, f"列{i + 1}"): values[i].to_numpy() if i in values else None
+        for i in range(23)
+    })
+
+
+def stock_sheet(frames):
+    """板子入库工作表：A、B列为物料代码和描述，C~G列留空，H列起为各月入库数量"""
+    stock = frames["stock"]
+    sheet = pd.DataFrame({"物料代码": stock["material_code"], "物料描述": stock["material_desc"]})
+    for i in range(3, STOCK_FIRST_COL):
+        sheet[f"列{i}"] = None
+    return pd.concat([sheet, stock.iloc[:, 2:]], axis=1)
+
+
+def write_workbook(path, frames):
+    """
+    流式写出三个工作表
+
+    参数:
+        path (str): 输出路径
+        frames (dict): generate_frames 的返回值
+
+    返回:
+        bool: 是否写出（返修行数超过 Excel 上限时不写出）
+    """
+    if len(frames["repair"]) + 1 > EXCEL_MAX_ROWS:
+        print(f"返修 {len(frames['repair'])} 行超过 Excel 单表上限 {EXCEL_MAX_ROWS - 1} 行，不生成工作簿")
+        return False
+    options = {"total_row": False}
+    write_sheets(path, [
+        ("改善统计", material_sheet(frames), options),
+        ("返修", repair_sheet(frames), options),
+        ("板子入库", stock_sheet(frames), options),
+    ])
+    return True
+
+
+def main():
+    """命令行入口：生成数据并写出工作簿"""
+    if len(sys.argv) < 3:
+        print("用法：python synthetic_workbook.py 输出路径 返修行数 [物料数]")
+        return
+    path, n_repairs = sys.argv[1], int(sys.argv[2])
+    n_materials = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    frames = generate_frames(n_repairs, n_materials)
+    if write_workbook(path, frames):
+        print(f"模拟工作簿已保存至：{path}（{len(frames['material'])} 个物料，{n_repairs} 条返修）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : table_swap.py
+# @Description :
+
+"""影子表全量重载
+全量重载时不直接写正式表（读报表会看到一半的数据，并与长时间的写事务争用）：
+    1. create_shadow：按正式表结构建影子表（{表名}_shadow），删除二级索引，只保留主键
+    2. 导入脚本将数据批量写入影子表（无二级索引，写入最快）
+    3. swap_in：在影子表上重建二级索引，RENAME TABLE 原子替换正式表，删除旧表
+导入失败时 drop_shadow 删除影子表，正式表保持不变。
+只能按列重建普通索引和唯一索引；正式表有全文索引、空间索引或函数索引时拒绝全量重载（正式表不变），
+需改用追加导入。
+"""
+import re
+from pymysql import MySQLError
+
+
+def shadow_name(table):
+    """影子表名"""
+    return f"{table}_shadow"
+
+
+def secondary_indexes(conn, table):
+    """
+    表的二级索引定义
+
+    参数:
+        conn: 数据库连接对象
+        table (str): 表名
+
+    返回:
+        list: ALTER TABLE 中重建索引的子句，如 "ADD INDEX `idx` (`a`, `b`(20))"；
+            有无法按此方式重建的索引（全文、空间、函数索引）时返回None
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"SHOW INDEX FROM `{table}`")
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    indexes = {}
+    for row in sorted(rows, key=lambda r: (r["Key_name"], r["Seq_in_index"])):
+        if row["Key_name"] == "PRIMARY":
+            continue
+        # 函数索引（MySQL 8.0.13+）的 Column_name 为空，定义在 Expression 中
+        if row.get("Index_type") in ("FULLTEXT", "SPATIAL") or row["Column_name"] is None:
+            kind = "函数" if row["Column_name"] is None else row["Index_type"]
+            print(f"表 `{table}` 的索引 `{row['Key_name']}` 为{kind}索引，无法在影子表上重建")
+            return None
+        index = indexes.setdefault(row["Key_name"], {"unique": not row["Non_unique"], "columns": []})
+        prefix = f"({row['Sub_part']})" if row["Sub_part"] else ""
+        index["columns"].append(f"`{row['Column_name']}`{prefix}")
+    return [
+        f"ADD {'UNIQUE ' if index['unique'] else ''}INDEX `{name}` ({', '.join(index['columns'])})"
+        for name, index in indexes.items()
+    ]
+
+
+def create_shadow(conn, table):
+    """
+    按正式表结构新建空的影子表，并删除其二级索引
+
+    参数:
+        conn: 数据库连接对象
+        table (str): 正式表名（需已存在）
+
+    返回:
+        list: 被删除的二级索引定义（swap_in 时重建），建表失败或有无法重建的索引时返回None
+    """
+    shadow = shadow_name(table)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS `{shadow}`")
+            cursor.execute(f"CREATE TABLE `{shadow}` LIKE `{table}`")
+            # CREATE TABLE LIKE 不复制自增计数器：沿用正式表的计数，替换后新行的id不与旧行
+            # （包括已移入归档表、仍按id引用的行）重复
+            cursor.execute(f"SHOW CREATE TABLE `{table}`")
+            counter = re.search(r"\) .*AUTO_INCREMENT=(\d+)", cursor.fetchone()[1])
+            if counter:
+                cursor.execute(f"ALTER TABLE `{shadow}` AUTO_INCREMENT = {int(counter.group(1))}")
+        indexes = secondary_indexes(conn, shadow)
+        if indexes is None:
+            drop_shadow(conn, table)
+            print(f"`{table}` 不支持全量重载，保持不变")
+            return None
+        if indexes:
+            drops = ", ".join(f"DROP INDEX `{clause.split('`')[1]}`" for clause in indexes)
+            with conn.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE `{shadow}` {drops}")
+    except MySQLError as e:
+        print(f"创建影子表失败: {e}")
+        return None
+    print(f"已创建影子表 `{shadow}`（二级索引{len(indexes)}个，导入完成后重建）")
+    return indexes
+
+
+def swap_in(conn, table, indexes):
+    """
+    在影子表上重建二级索引，原子替换正式表并删除旧表
+
+    参数:
+        conn: 数据库连接对象
+        table (str): 正式表名
+        indexes (list): create_shadow 返回的索引定义
+
+    返回:
+        bool: 是否替换成功（失败时正式表不变）
+    """
+    shadow = shadow_name(table)
+    old = f"{table}_old"
+    try:
+        with conn.cursor() as cursor:
+            if indexes:
+                cursor.execute(f"ALTER TABLE `{shadow}` {', '.join(indexes)}")
+            cursor.execute(f"DROP TABLE IF EXISTS `{old}`")
+            # 两个改名在同一条语句中原子完成，读报表的查询只会看到旧表或新表
+            cursor.execute(f"RENAME TABLE `{table}` TO `{old}`, `{shadow}` TO `{table}`")
+            cursor.execute(f"DROP TABLE `{old}`")
+        print(f"已用影子表替换 `{table}`")
+        return True
+    except MySQLError as e:
+        print(f"替换正式表失败，`{table}` 保持不变: {e}")
+        return False
+
+
+def drop_shadow(conn, table):
+    """删除影子表（导入失败时调用；删除失败只打印提示，下次 create_shadow 时会先删除残留的影子表）"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS `{shadow_name(table)}`")
+    except MySQLError as e:
+        print(f"删除影子表失败: {e}")
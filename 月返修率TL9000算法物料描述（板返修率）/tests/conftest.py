@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : conftest.py
+# @Description :
+
+"""测试公共夹具
+报表模块按 MySQL 编写，但读取用的 SQL 均为标准 SQL，需要数据库的测试在 sqlite 库上执行
+（小数据集或 synthetic_workbook 生成的数据）
+（cd 月返修率TL9000算法物料描述（板返修率） && python -m pytest -q）
+"""
+import os
+import sys
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config  # noqa: E402
+
+# 测试进程不写出阶段耗时 JSON
+config.INSTRUMENT_CONFIG["enabled"] = False
+
+from synthetic_workbook import generate_frames  # noqa: E402
+
+IMPORT_TIME = "2024-06-01 00:00:00"
+
+
+def create_sample_tables(conn):
+    """
+    按正式库的表结构写入两个物料、两个月的小数据集（代码id 已回填：A=1，B=2）
+
+    参数:
+        conn (sqlite3.Connection): 数据库连接
+    """
+    conn.executescript(f"""
+        CREATE TABLE code_dict (id INTEGER PRIMARY KEY, code TEXT);
+        INSERT INTO code_dict VALUES (1, 'A'), (2, 'B');
+        CREATE TABLE material_info (material_code TEXT, material_id INT, material_desc TEXT, import_time TEXT);
+        INSERT INTO material_info VALUES ('A', 1, '板A', '{IMPORT_TIME}'), ('B', 2, '板B', '{IMPORT_TIME}');
+        CREATE TABLE material_stats (material_code TEXT, material_desc TEXT, board_code TEXT, import_time TEXT);
+        INSERT INTO material_stats VALUES ('A', '板A', 'A', '{IMPORT_TIME}'), ('B', '板B', 'B', '{IMPORT_TIME}');
+        CREATE TABLE material_stock (
+            id INTEGER PRIMARY KEY, material_code TEXT, material_id INT, date TEXT, quantity INT, import_time TEXT
+        );
+        INSERT INTO material_stock (material_code, material_id, date, quantity, import_time) VALUES
+            ('A', 1, '2023-01-05', 10, '{IMPORT_TIME}'), ('A', 1, '2023-02-10', 20, '{IMPORT_TIME}'),
+            ('B', 2, '2023-01-20', 5, '{IMPORT_TIME}'), ('B', 2, '2023-02-01', 5, '{IMPORT_TIME}');
+        CREATE TABLE repair_stats (
+            id INTEGER PRIMARY KEY, board_code TEXT, board_id INT, count INT, year INT, month INT, import_time TEXT
+        );
+        INSERT INTO repair_stats (board_code, board_id, count, year, month, import_time) VALUES
+            ('A', 1, 1, 2023, 1, '{IMPORT_TIME}'), ('B', 2, 2, 2023, 2, '{IMPORT_TIME}'),
+            ('A', 1, 3, 2023, 2, '{IMPORT_TIME}');
+    """)
+    conn.commit()
+
+
+@pytest.fixture
+def sample_db(tmp_path):
+    """小数据集 sqlite 数据库文件路径"""
+    path = str(tmp_path / "sample.db")
+    conn = sqlite3.connect(path)
+    create_sample_tables(conn)
+    conn.close()
+    return path
+
+
+def load_frames(conn, frames):
+    """
+    将 generate_frames 生成的数据按正式库的表结构写入 sqlite（代码id 已回填）
+
+    参数:
+        conn (sqlite3.Connection): 数据库连接
+        frames (dict): generate_frames 的返回值
+    """
+    import pandas as pd
+    codes = frames["material"]["material_code"].tolist()
+    ids = {code: i + 1 for i, code in enumerate(codes)}
+    pd.DataFrame({"id": list(ids.values()), "code": codes}).to_sql("code_dict", conn, index=False)
+
+    material = frames["material"].assign(import_time=IMPORT_TIME)
+    material.to_sql("material_stats", conn, index=False)
+    material[["material_code", "material_desc"]].assign(
+        material_id=material["material_code"].map(ids), import_time=IMPORT_TIME
+    ).to_sql("material_info", conn, index=False)
+
+    repair = frames["repair"].assign(board_code=lambda df: df["board_code"].astype(str))
+    repair.assign(
+        id=range(1, len(repair) + 1), board_id=repair["board_code"].map(ids), import_time=IMPORT_TIME
+    )[["id", "board_code", "board_id", "count", "year", "month", "import_time"]].to_sql(
+        "repair_stats", conn, index=False
+    )
+
+    stock = frames["stock"].melt(
+        id_vars=["material_code", "material_desc"], var_name="date", value_name="quantity"
+    )
+    stock = stock[stock["quantity"] != 0]
+    stock.assign(
+        id=range(1, len(stock) + 1), material_id=stock["material_code"].map(ids), import_time=IMPORT_TIME
+    )[["id", "material_code", "material_id", "date", "quantity", "import_time"]].to_sql(
+        "material_stock", conn, index=False
+    )
+
+
+@pytest.fixture
+def report_db():
+    """按模拟工作簿数据建好的内存 sqlite 库"""
+    conn = sqlite3.connect(":memory:")
+    load_frames(conn, generate_frames(3000, 40, seed=1))
+    yield conn
+    conn.close()
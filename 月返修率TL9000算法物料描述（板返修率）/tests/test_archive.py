@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_archive.py
+# @Description :
+
+"""归档后报表读取：合并月度汇总，不重复统计归档后重新导入的早期明细
+（archive_table 的 ON DUPLICATE KEY 只能在 MySQL 上执行，这里按相同结果直接写出汇总表和归档状态）
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from archive import STATE_TABLE, archived_cutoff, hot_start, repair_rows_sql, stock_rows_sql
+from data_loader import read_typed_sql
+from period_utils import month_key, month_start_date
+
+
+def archive_rows(conn, cutoff):
+    """早于 cutoff 的明细按代码id和月份汇总写入月度汇总表后从热表删除，并记录归档状态"""
+    conn.execute(f"""
+        CREATE TABLE repair_stats_monthly AS
+        SELECT board_id, year, month, SUM(count) AS repair_qty FROM repair_stats
+        WHERE year * 12 + month - 1 < {cutoff} GROUP BY board_id, year, month
+    """)
+    conn.execute(f"DELETE FROM repair_stats WHERE year * 12 + month - 1 < {cutoff}")
+    conn.execute(f"""
+        CREATE TABLE material_stock_monthly AS
+        SELECT material_id, substr(date, 1, 7) || '-01' AS month, SUM(quantity) AS inbound_qty FROM material_stock
+        WHERE date < '{month_start_date(cutoff)}' GROUP BY material_id, substr(date, 1, 7)
+    """)
+    conn.execute(f"DELETE FROM material_stock WHERE date < '{month_start_date(cutoff)}'")
+    conn.execute(f"CREATE TABLE {STATE_TABLE} (table_name TEXT PRIMARY KEY, cutoff_key INT)")
+    conn.executemany(f"INSERT INTO {STATE_TABLE} VALUES (?, ?)", [("repair_stats", cutoff), ("material_stock", cutoff)])
+    conn.commit()
+
+
+def repair_totals(conn, start, end, archived):
+    df = read_typed_sql(conn, repair_rows_sql(start, end, archived), ["repair_stats"])
+    df["board_code"] = df["board_code"].astype(object)
+    return df.groupby(["board_code", "year", "month"])["count"].sum().astype(np.int64).sort_index()
+
+
+def stock_totals(conn, start, end, archived):
+    df = read_typed_sql(conn, stock_rows_sql(start, end, archived), ["material_stock", "material_info"])
+    df["material_code"] = df["material_code"].astype(object)
+    df["date"] = df["date"].dt.to_period("M")
+    return df.groupby(["material_code", "date"])["quantity"].sum().astype(np.int64).sort_index()
+
+
+def test_hot_start():
+    assert hot_start(None, None) is None
+    assert hot_start(5, None) == 5
+    assert hot_start(None, 10) == 10
+    assert hot_start(5, 10) == 10
+    assert hot_start(12, 10) == 12
+
+
+def test_unarchived_reads_only_hot_tables(report_db):
+    assert archived_cutoff(report_db, "repair_stats") is None
+    assert "UNION" not in repair_rows_sql(None, None, None)
+    assert "UNION" not in stock_rows_sql(None, None, None)
+
+
+@pytest.mark.parametrize("period", [(None, None), (month_key(2023, 3), month_key(2024, 2))])
+def test_archive_union_matches_pre_archive_totals(report_db, period):
+    start, end = period
+    cutoff = month_key(2023, 7)
+    before_repair = repair_totals(report_db, start, end, None)
+    before_stock = stock_totals(report_db, start, end, None)
+
+    archive_rows(report_db, cutoff)
+    assert archived_cutoff(report_db, "repair_stats") == cutoff
+    assert archived_cutoff(report_db, "material_stats") is None
+
+    # 归档后又重新导入了一份已归档月份的数据：热表中的这些行不再参与统计
+    board_code, board_id = report_db.execute("SELECT code, id FROM code_dict LIMIT 1").fetchone()
+    report_db.execute(
+        "INSERT INTO repair_stats (board_code, board_id, count, year, month) VALUES (?, ?, 50, 2023, 6)",
+        (board_code, board_id),
+    )
+    report_db.execute(
+        "INSERT INTO material_stock (material_code, material_id, date, quantity) VALUES (?, ?, '2023-06-15', 50)",
+        (board_code, board_id),
+    )
+
+    archived = archived_cutoff(report_db, "repair_stats")
+    pd.testing.assert_series_equal(repair_totals(report_db, start, end, archived), before_repair)
+    pd.testing.assert_series_equal(stock_totals(report_db, start, end, archived), before_stock)
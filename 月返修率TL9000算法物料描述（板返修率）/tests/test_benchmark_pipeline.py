@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_benchmark_pipeline.py
+# @Description :
+
+"""全流程基准测试的隔离：不删除正式库，各阶段的输出、缓存、快照和慢查询日志都写到本次测试目录"""
+import os
+import json
+import subprocess
+import sys
+import pytest
+import config
+import benchmark_pipeline
+
+
+@pytest.mark.parametrize("key", ["DB_CONFIG", "DB_CONFIG1"])
+def test_reset_database_refuses_production_database(key, monkeypatch):
+    def connect(**kwargs):
+        raise AssertionError("不应连接数据库")
+
+    monkeypatch.setattr(benchmark_pipeline.pymysql, "connect", connect)
+    with pytest.raises(ValueError):
+        benchmark_pipeline.reset_database(getattr(config, key)["database"])
+
+
+def test_main_refuses_production_database(monkeypatch, tmp_path, capsys):
+    monkeypatch.setitem(config.BENCH_CONFIG, "database", config.DB_CONFIG1["database"])
+    monkeypatch.setitem(config.BENCH_CONFIG, "work_dir", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["benchmark_pipeline.py", "1000"])
+    benchmark_pipeline.main()
+    assert "拒绝运行" in capsys.readouterr().out
+    assert os.listdir(tmp_path) == []
+
+
+def test_work_dir_outside_report_cache():
+    cache_root = os.path.dirname(config.CACHE_CONFIG["dir"])
+    assert not os.path.abspath(config.BENCH_CONFIG["work_dir"]).startswith(os.path.abspath(cache_root) + os.sep)
+
+
+@pytest.mark.parametrize("preamble, cwd, keys", [
+    ("tl", benchmark_pipeline.CURRENT_DIR,
+     [("CACHE_CONFIG", "dir"), ("SNAPSHOT_CONFIG", "dir"), ("OUTPUT_CONFIG", "dir"), ("QUERY_LOG_CONFIG", "slow_log")]),
+    ("eri", benchmark_pipeline.ERI_DIR, [("QUERY_LOG_CONFIG", "slow_log")]),
+])
+def test_preamble_redirects_paths(preamble, cwd, keys, tmp_path):
+    work_dir = str(tmp_path)
+    source = benchmark_pipeline.PREAMBLE[preamble].format(database="bench_db", work_dir=work_dir) + (
+        "import json\n"
+        f"print(json.dumps([config.DB_CONFIG['database']] + [getattr(config, a)[b] for a, b in {keys!r}]))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", source], cwd=cwd, capture_output=True, text=True, check=True)
+    database, *paths = json.loads(result.stdout)
+    assert database == "bench_db"
+    assert all(path.startswith(work_dir) for path in paths)
+
+
+@pytest.mark.parametrize("preamble, cwd", [
+    ("tl", benchmark_pipeline.CURRENT_DIR),
+    ("eri", benchmark_pipeline.ERI_DIR),
+    ("stock", benchmark_pipeline.STOCK_DIR),
+])
+def test_preamble_disables_run_records(preamble, cwd, tmp_path):
+    source = benchmark_pipeline.PREAMBLE[preamble].format(database="bench_db", work_dir=str(tmp_path)) + (
+        "import db_utils\n"
+        "from common.instrumentation import INSTRUMENT_CONFIG\n"
+        "print(INSTRUMENT_CONFIG['enabled'])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", source], cwd=cwd, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_cli.py
+# @Description :
+
+"""命令行入口：延迟导入和缓存检查"""
+import os
+import sys
+import subprocess
+import pytest
+import cli
+import report_specs
+
+TL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parser_does_not_load_data_libraries():
+    code = ("import sys, cli\n"
+            "cli.build_parser().parse_args(['report-rate', '--check'])\n"
+            "print(sorted(m for m in ('pandas', 'numpy', 'openpyxl') if m in sys.modules))\n")
+    result = subprocess.run([sys.executable, "-c", code], cwd=TL_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.fixture
+def report_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(report_specs, "spec_fingerprint", lambda name: "f" * 64)
+    monkeypatch.setitem(sys.modules, "输出数据", type(sys)("输出数据"))
+    sys.modules["输出数据"].main = lambda fingerprint: calls.append(fingerprint)
+    return calls
+
+
+def test_cache_hit_skips_report_module(report_calls, monkeypatch):
+    monkeypatch.setattr(report_specs, "pending_outputs", lambda name, fingerprint: [])
+    args = cli.build_parser().parse_args(["report-count"])
+    assert cli.run_report(args) == 0
+    assert report_calls == []
+
+
+def test_check_does_not_restore_or_generate(report_calls, monkeypatch):
+    restored = []
+    monkeypatch.setattr(report_specs, "pending_outputs", lambda name, fingerprint: restored.append(name) or [name])
+    monkeypatch.setattr(report_specs, "all_cached", lambda name, fingerprint: False)
+    assert cli.run_report(cli.build_parser().parse_args(["report-count", "--check"])) == 1
+    monkeypatch.setattr(report_specs, "all_cached", lambda name, fingerprint: True)
+    assert cli.run_report(cli.build_parser().parse_args(["report-count", "--check"])) == 0
+    # --check 不复制缓存文件，也不生成报表
+    assert restored == [] and report_calls == []
+    assert cli.run_report(cli.build_parser().parse_args(["report-count"])) == 0
+    assert restored == ["count"] and report_calls == ["f" * 64]
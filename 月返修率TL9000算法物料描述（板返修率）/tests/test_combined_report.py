@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_combined_report.py
+# @Description :
+
+"""一次加载生成的各工作表与单独脚本的结果一致"""
+import pandas as pd
+from data_loader import apply_schema, share_code_categories
+from combined_report import build_report_sheets
+from 月返修率 import summarize_monthly, calculate_repair_rate
+from 输出数据 import generate_pivot_report
+
+
+def shared_data():
+    """与 load_shared_data 返回值结构相同的小数据集"""
+    stock = apply_schema(pd.DataFrame({
+        "material_code": ["A", "A", "B", "B"],
+        "material_desc": ["板A", "板A", "板B", "板B"],
+        "date": ["2023-01-05", "2023-02-10", "2023-01-20", "2023-02-01"],
+        "quantity": [10, 20, 5, 5],
+    }), ["material_stock", "material_info"])
+    material = apply_schema(pd.DataFrame({
+        "material_code": ["A", "B"], "material_desc": ["板A", "板B"], "board_code": ["A", "B"],
+    }), ["material_stats"])
+    repair = apply_schema(pd.DataFrame({
+        "board_code": ["A", "B", "A", "B"], "count": [1, 2, 3, 4], "year": [2023, 2023, 2023, 2023], "month": [1, 1, 2, 2],
+    }), ["repair_stats"])
+    share_code_categories([stock, material, repair])
+    return {"stock": stock, "material": material, "repair": repair}
+
+
+def test_build_report_sheets_matches_standalone_reports():
+    sheets = {name: df for name, df, _ in build_report_sheets(shared_data())}
+    assert list(sheets) == ["返修数量", "返修率", "返修率_6个月窗口", "返修率_12个月窗口", "返修统计", "入库数量"]
+
+    data = shared_data()
+    pd.testing.assert_frame_equal(sheets["返修数量"], generate_pivot_report(data["material"], data["repair"]))
+    stock_monthly, repair_monthly = summarize_monthly(data["stock"], data["repair"])
+    pd.testing.assert_frame_equal(sheets["返修率_6个月窗口"], calculate_repair_rate(stock_monthly, repair_monthly, 6))
+
+    # 合计行为各月之和（统计区间外的返修已在 SQL 中过滤）
+    assert sheets["返修数量"].iloc[-1].tolist()[2:] == [3, 7]
+    assert sheets["入库数量"].iloc[-1].tolist() == ["月度合计", "", 15, 25]
+    assert list(sheets["返修统计"].columns[3:]) == ["Jan-23", "Feb-23"]
+
+
+def test_summarize_monthly_leaves_inputs_unchanged():
+    data = shared_data()
+    stock_columns, repair_columns = list(data["stock"].columns), list(data["repair"].columns)
+    stock_monthly, repair_monthly = summarize_monthly(data["stock"], data["repair"])
+    assert list(data["stock"].columns) == stock_columns
+    assert list(data["repair"].columns) == repair_columns
+    assert repair_monthly["repair_qty"].sum() == data["repair"]["count"].sum()
+    assert stock_monthly["inbound_qty"].sum() == data["stock"]["quantity"].sum()
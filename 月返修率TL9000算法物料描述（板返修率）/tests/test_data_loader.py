@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_data_loader.py
+# @Description :
+
+"""字段类型压缩、代码清洗和流式按月汇总"""
+import numpy as np
+import pandas as pd
+from data_loader import downcast_int, clean_codes, apply_schema, share_code_categories, read_typed_sql, read_monthly_chunks
+from archive import repair_rows_sql, stock_rows_sql
+
+
+def test_downcast_int():
+    assert downcast_int(pd.Series([1, 2, 300])).dtype == np.int16
+    assert downcast_int(pd.Series([1, 2, 3])).dtype == np.int8
+    # 含空值时不能用整数表示
+    with_null = downcast_int(pd.Series([1, None, 3]))
+    assert with_null.dtype == np.float32
+    assert with_null.isna().sum() == 1
+
+
+def test_clean_codes_keeps_nulls_as_nan():
+    codes = clean_codes(pd.Series([" A1 ", None, "", "   ", "B2", np.nan]))
+    assert codes.iloc[0] == "A1"
+    assert codes.iloc[4] == "B2"
+    assert codes.isna().tolist() == [False, True, True, True, False, True]
+    assert "None" not in codes.dropna().tolist()
+
+
+def test_apply_schema():
+    df = apply_schema(pd.DataFrame({
+        "material_code": [" M1", "M2 "],
+        "material_desc": ["板A", "板A"],
+        "date": ["2024-01-05", "2024-02-10"],
+        "quantity": [5, 700],
+    }), ["material_stock", "material_info"])
+    assert df["material_code"].tolist() == ["M1", "M2"]
+    assert isinstance(df["material_desc"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df["quantity"].dtype == np.int16
+
+
+def test_share_code_categories():
+    stock = pd.DataFrame({"material_code": ["M2", "M10", None]})
+    repair = pd.DataFrame({"board_code": ["M10", "LONGCODE1", np.nan]})
+    share_code_categories([stock, repair])
+    assert stock["material_code"].dtype == repair["board_code"].dtype
+    assert list(stock["material_code"].cat.categories) == ["LONGCODE1", "M10", "M2"]
+    # 相同代码编码相同，空值保持为空（不会被截断或转成 "nan"）
+    assert stock["material_code"].cat.codes[1] == repair["board_code"].cat.codes[0]
+    assert stock["material_code"].isna().tolist() == [False, False, True]
+    assert repair["board_code"].isna().tolist() == [False, False, True]
+
+
+def monthly_totals(df, keys, value):
+    """按分组字段汇总并排序，便于比较"""
+    df = df.copy()
+    for col in keys:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.to_period("M").dt.to_timestamp()
+        else:
+            df[col] = df[col].astype(object)
+    result = df.groupby(keys, dropna=False)[value].sum().reset_index()
+    return result.sort_values(keys, ignore_index=True).astype({value: np.int64})
+
+
+def test_read_monthly_chunks_matches_full_read(report_db):
+    cases = [
+        (repair_rows_sql(None, None), ["repair_stats"], ["board_code", "year", "month"], "count"),
+        (stock_rows_sql(None, None), ["material_stock", "material_info"], ["material_code", "material_desc", "date"], "quantity"),
+    ]
+    for sql, tables, keys, value in cases:
+        full = read_typed_sql(report_db, sql, tables)
+        chunks = read_monthly_chunks(report_db, sql, tables, keys, value, 97)
+        assert len(full) > 97
+        pd.testing.assert_frame_equal(monthly_totals(chunks, keys, value), monthly_totals(full, keys, value))
+
+
+def test_read_monthly_chunks_empty_result(report_db):
+    sql = f"SELECT * FROM ({repair_rows_sql(None, None)}) t WHERE 1 = 0"
+    df = read_monthly_chunks(report_db, sql, ["repair_stats"], ["board_code", "year", "month"], "count", 50)
+    assert df.empty
+    assert set(df.columns) == {"board_code", "count", "year", "month"}
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_db_utils.py
+# @Description :
+
+"""查询记录（sqlite）"""
+import json
+import sqlite3
+import pytest
+import config
+from db_utils import run_query, execute_query, read_sql, read_sql_chunks, QUERY_LOG
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (code TEXT, n INT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [("A", 1), ("B", 2), ("C", 3)])
+    yield conn
+    conn.close()
+
+
+def test_run_query_records_sql_and_params(conn):
+    cursor = run_query(conn, "SELECT code\n  FROM t WHERE n >= ?", (2,))
+    assert [row[0] for row in cursor.fetchall()] == ["B", "C"]
+    record = QUERY_LOG[-1]
+    assert record["sql"] == "SELECT code FROM t WHERE n >= ?"
+    assert record["params"] == "(2,)"
+    assert record["bytes"] is None
+
+
+def test_read_sql_returns_frame(conn):
+    df = read_sql(conn, "SELECT code, n FROM t ORDER BY n DESC")
+    assert list(df.columns) == ["code", "n"]
+    assert df["code"].tolist() == ["C", "B", "A"]
+
+
+def test_read_sql_chunks_splits_rows(conn):
+    chunks = list(read_sql_chunks(conn, "SELECT code, n FROM t ORDER BY n", 2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[1].values.tolist() == [["C", 3]]
+    assert list(read_sql_chunks(conn, "SELECT code FROM t WHERE n > 5", 2)) == []
+
+
+def test_read_sql_chunks_logs_fetched_rows(conn):
+    for _ in read_sql_chunks(conn, "SELECT code FROM t", 2):
+        pass
+    assert QUERY_LOG[-1]["sql"] == "SELECT code FROM t"
+    assert QUERY_LOG[-1]["rows"] == 3
+
+
+def test_execute_query_returns_none_on_error(conn, capsys):
+    assert execute_query(conn, "SELECT * FROM missing") is None
+    assert "查询执行失败" in capsys.readouterr().out
+    with pytest.raises(sqlite3.OperationalError):
+        read_sql(conn, "SELECT * FROM missing")
+
+
+def test_slow_query_written_to_log(conn, tmp_path, monkeypatch):
+    log = tmp_path / "slow.jsonl"
+    monkeypatch.setitem(config.QUERY_LOG_CONFIG, "slow_ms", 0)
+    monkeypatch.setitem(config.QUERY_LOG_CONFIG, "slow_log", str(log))
+    run_query(conn, "SELECT COUNT(*) FROM t").close()
+    record = json.loads(log.read_text(encoding="utf-8").splitlines()[-1])
+    assert record["sql"] == "SELECT COUNT(*) FROM t"
+    assert "explain" not in record
+
+
+def test_disabled_log_skips_recording(conn, monkeypatch):
+    monkeypatch.setitem(config.QUERY_LOG_CONFIG, "enabled", False)
+    before = len(QUERY_LOG)
+    run_query(conn, "SELECT 1").close()
+    assert len(QUERY_LOG) == before
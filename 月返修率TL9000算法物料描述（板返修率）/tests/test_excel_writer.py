@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_excel_writer.py
+# @Description :
+
+"""流式 Excel 写出：内容、合计行加粗和条件格式"""
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+import excel_writer
+
+
+@pytest.fixture(params=["openpyxl", "xlsxwriter"])
+def backend(request, monkeypatch):
+    if request.param == "xlsxwriter":
+        monkeypatch.setattr(excel_writer, "xlsxwriter", pytest.importorskip("xlsxwriter"))
+    else:
+        monkeypatch.setattr(excel_writer, "xlsxwriter", None)
+    return request.param
+
+
+def test_write_report_round_trips(tmp_path, backend, monkeypatch):
+    # 分块边界落在报表中间
+    monkeypatch.setattr(excel_writer, "CHUNK_ROWS", 2)
+    report = pd.DataFrame({
+        "material_code": ["A", "B", "C", ""],
+        "material_desc": ["板A", "板B", None, "当月全局总计"],
+        "2024-01": [0.5, 2.0, np.nan, 1.25],
+        "2024-02": [4.0, 0.0, 1.5, 2.5],
+    })
+    path = tmp_path / "report.xlsx"
+    excel_writer.write_report(report, str(path), "返修率", highlight=(1, 3))
+
+    ws = load_workbook(path)["返修率"]
+    rows = [list(row) for row in ws.iter_rows(values_only=True)]
+    assert rows[0] == list(report.columns)
+    assert rows[1] == ["A", "板A", 0.5, 4]
+    assert rows[3] == ["C", None, None, 1.5]
+    assert rows[4][1:] == ["当月全局总计", 1.25, 2.5]
+    assert ws["B5"].font.b and not ws["B4"].font.b
+
+    rules = {str(rng.sqref): [rule.formula for rule in rng.rules] for rng in ws.conditional_formatting}
+    assert rules == {"C2:D5": [["1"], ["3"]]}
+
+
+def test_write_sheets_multiple(tmp_path, backend):
+    path = tmp_path / "sheets.xlsx"
+    frame = pd.DataFrame({"code": ["A"], "2024-01": [1]})
+    excel_writer.write_sheets(str(path), [("一", frame, {"label_cols": 1}), ("二", frame, {"total_row": False})])
+    assert load_workbook(path).sheetnames == ["一", "二"]
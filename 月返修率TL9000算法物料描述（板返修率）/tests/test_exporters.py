@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_exporters.py
+# @Description :
+
+"""多格式导出"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import exporters
+
+
+@pytest.fixture
+def report():
+    return pd.DataFrame({
+        "material_code": pd.Series(["A", "B", None], dtype=object),
+        "material_desc": ["板A", "板B", "月度合计"],
+        "2024-01": [1.5, 0.0, 1.5],
+        "2024-02": [np.nan, 2.0, 2.0],
+    })
+
+
+@pytest.fixture
+def out_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPORT_OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_export_formats(report, out_dir):
+    formats = ["xlsx", "csv.gz", "unknown"]
+    written = exporters.export_formats(report, "返修率", formats)
+    assert [os.path.basename(p) for p in written] == ["返修率.xlsx", "返修率.csv.gz"]
+    csv = pd.read_csv(out_dir / "返修率.csv.gz", encoding="utf-8-sig")
+    assert csv["2024-02"].tolist()[1:] == [2.0, 2.0]
+
+
+def test_export_columnar_formats(report, out_dir):
+    pytest.importorskip("pyarrow")
+    written = exporters.export_formats(report, "返修率", ["parquet", "arrow"])
+    assert len(written) == 2
+    for path in written:
+        frame = pd.read_parquet(path) if path.endswith("parquet") else pd.read_feather(path)
+        # 标签列统一为字符串，空标签写为空字符串
+        assert frame["material_code"].tolist() == ["A", "B", ""]
+        np.testing.assert_array_equal(frame["2024-01"], report["2024-01"])
+
+
+def test_missing_dependency_names_module(report, out_dir, monkeypatch, capsys):
+    def missing(report_df, file_path, **options):
+        raise ModuleNotFoundError("No module named 'xlsxwriter'")
+
+    monkeypatch.setitem(exporters.EXPORTERS, "xlsx", missing)
+    assert exporters.export_formats(report, "返修率", ["xlsx"]) == []
+    assert "xlsxwriter" in capsys.readouterr().out
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_instrumentation.py
+# @Description :
+
+"""分阶段耗时统计"""
+import os
+import json
+import threading
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+import config
+from common import instrumentation
+from common.instrumentation import stage, timed_stage, set_rows
+
+
+def new_records(before):
+    return list(instrumentation._records)[before:]
+
+
+def test_nested_stages_record_depth_and_rows():
+    before = len(instrumentation._records)
+
+    @timed_stage()
+    def transform(df):
+        set_rows(rows_in=99)
+        return df.head(2)
+
+    with stage("外层", rows_in=5) as record:
+        transform(pd.DataFrame({"a": range(4)}))
+        record["rows_out"] = 3
+
+    inner, outer = new_records(before)
+    assert (inner["stage"], inner["depth"], inner["rows_in"], inner["rows_out"]) == ("transform", 1, 99, 2)
+    assert (outer["stage"], outer["depth"], outer["rows_in"], outer["rows_out"]) == ("外层", 0, 5, 3)
+    assert outer["wall_s"] >= inner["wall_s"]
+
+
+def test_failed_stage_is_recorded():
+    before = len(instrumentation._records)
+    with pytest.raises(KeyError):
+        with stage("失败"):
+            raise KeyError("x")
+    assert new_records(before)[0]["error"] is True
+    # 不在任何阶段内时忽略
+    set_rows(rows_in=1)
+
+
+def test_write_summary(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.INSTRUMENT_CONFIG, "enabled", True)
+    monkeypatch.setitem(config.INSTRUMENT_CONFIG, "dir", str(tmp_path))
+    with stage("写出"):
+        pass
+    path = instrumentation.write_summary()
+    with open(path, encoding="utf-8") as f:
+        run = json.load(f)
+    assert run["stages"][-1]["stage"] == "写出"
+
+
+def test_run_records_outside_report_cache():
+    # 共用模块使用本目录 config 中的配置；运行记录不放在缓存目录下，缓存清理不会删除
+    assert instrumentation.INSTRUMENT_CONFIG is config.INSTRUMENT_CONFIG
+    cache_root = os.path.abspath(os.path.dirname(config.CACHE_CONFIG["dir"]))
+    for settings in (config.INSTRUMENT_CONFIG, instrumentation.DEFAULT_CONFIG):
+        assert not os.path.abspath(settings["dir"]).startswith(cache_root + os.sep)
+
+
+def test_frame_bytes_sums_containers():
+    df = pd.DataFrame({"a": np.arange(100, dtype="int64")})
+    expected = int(df.memory_usage(deep=True).sum())
+    assert instrumentation.frame_bytes(df) == expected
+    assert instrumentation.frame_bytes((df, {"x": np.zeros(10)}, "label")) == expected + 80
+    assert instrumentation.frame_bytes("label") is None
+
+
+def test_memory_stage_records_peak_and_output(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_memory", True)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(5)
+    try:
+        before = len(instrumentation._records)
+
+        @timed_stage("分配")
+        def allocate():
+            instrumentation.note_frame("tmp", pd.DataFrame({"a": range(10)}))
+            return np.ones(2_000_000)
+
+        with stage("外层"):
+            allocate()
+        inner, outer = new_records(before)
+    finally:
+        if started:
+            tracemalloc.stop()
+    assert inner["output_mb"] == 15.3
+    assert inner["peak_mb"] >= 15 and outer["peak_mb"] >= inner["peak_mb"]
+    assert "tmp" in inner["frames"]
+    assert "top_allocations" in outer
+
+
+def test_threads_keep_separate_stage_stacks():
+    before = len(instrumentation._records)
+    inside = threading.Barrier(2)
+
+    def run(name):
+        with stage(name):
+            # 两个线程的阶段同时处于执行中
+            inside.wait(timeout=5)
+            with stage(name + "内层"):
+                pass
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("甲", "乙")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    depths = {r["stage"]: r["depth"] for r in new_records(before)}
+    assert depths == {"甲": 0, "甲内层": 1, "乙": 0, "乙内层": 1}
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_period_utils.py
+# @Description :
+
+"""整数月份键与区间条件"""
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+import config
+import period_utils
+from period_utils import (
+    month_key, month_key_from_label, month_key_from_dates, month_start_date, period_labels,
+    period_condition, date_condition, report_period, set_report_period,
+)
+
+
+def test_month_key_is_consecutive_across_years():
+    assert month_key(2023, 12) + 1 == month_key(2024, 1)
+    keys = month_key(np.array([2023, 2024]), np.array([11, 1]))
+    assert keys.tolist() == [month_key(2023, 11), month_key(2024, 1)]
+    assert month_key_from_label("2024-01") == month_key(2024, 1)
+    assert month_key_from_label(" 2024-03-15 ") == month_key(2024, 3)
+
+
+def test_month_key_from_label_rejects_bad_month():
+    with pytest.raises(ValueError):
+        month_key_from_label("2024-13")
+
+
+def test_month_key_round_trips():
+    keys = np.arange(month_key(2022, 11), month_key(2024, 3))
+    assert [month_key_from_label(month_start_date(int(k))) for k in keys] == keys.tolist()
+    assert period_labels(keys[:3]) == ["2022-11", "2022-12", "2023-01"]
+    assert period_labels(keys[:1], "%b-%y") == ["Nov-22"]
+
+
+def test_month_key_from_dates():
+    dates = pd.Series(["2023-01-31", "2023-02-01", "2024-12-15"])
+    expected = [month_key(2023, 1), month_key(2023, 2), month_key(2024, 12)]
+    assert month_key_from_dates(dates).tolist() == expected
+
+
+def test_conditions_select_closed_month_range():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (year INT, month INT, date TEXT)")
+    rows = [(y, m, f"{y:04d}-{m:02d}-{d:02d}") for y in (2023, 2024) for m in range(1, 13) for d in (1, 28)]
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+    start, end = month_key(2023, 11), month_key(2024, 2)
+
+    by_month = conn.execute(f"SELECT COUNT(*) FROM t WHERE {period_condition('year', 'month', start, end)}")
+    by_date = conn.execute(f"SELECT COUNT(*) FROM t WHERE {date_condition('date', start, end)}")
+    # 2023-11 ~ 2024-02 共4个月，每月2行
+    assert by_month.fetchone()[0] == 8
+    assert by_date.fetchone()[0] == 8
+    assert period_condition("year", "month", None, None) == "1 = 1"
+    assert date_condition("date", None, None) == "1 = 1"
+    conn.close()
+
+
+def test_report_period_override(monkeypatch):
+    monkeypatch.setitem(config.PERIOD_CONFIG, "start", "2023-01")
+    monkeypatch.setitem(config.PERIOD_CONFIG, "end", "")
+    monkeypatch.setattr(period_utils, "_period_override", None)
+    assert report_period() == (month_key(2023, 1), None)
+    set_report_period(end="2023-06")
+    assert report_period() == (month_key(2023, 1), month_key(2023, 6))
+    set_report_period("2024-01", "2023-06")
+    with pytest.raises(ValueError):
+        report_period()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_rate_service.py
+# @Description :
+
+"""返修率查询服务（读取 sqlite 数据库，在随机端口上启动）"""
+import json
+import sqlite3
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+import pymysql
+import pytest
+import config
+import rate_service
+
+
+@pytest.fixture
+def server(sample_db, monkeypatch):
+    monkeypatch.setitem(config.SERVICE_CONFIG, "sqlite_path", sample_db)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), rate_service.RateRequestHandler)
+    server.snapshot = None
+    server.refresh_lock = threading.Lock()
+    rate_service.refresh(server, force=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path):
+    """请求服务，返回 (状态码, JSON)"""
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    try:
+        with urlopen(url, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_rates_and_top(server):
+    status, body = get(server, "/status")
+    assert status == 200 and body["loaded"] and body["materials"] == 2
+
+    status, body = get(server, "/rates?material=A&board=B&window=1")
+    assert status == 200
+    assert body["periods"] == ["2023-01", "2023-02"]
+    assert [row["material_code"] for row in body["rows"]] == ["A", "B"]
+    assert body["rows"][0]["rate"] == [10.0, 15.0]
+    assert body["rows"][1]["rate"] == [0.0, 40.0]
+    # 全局：1/15、5/25
+    assert body["global"] == [6.67, 20.0]
+
+    status, body = get(server, "/top?n=1&start=2023-01&end=2023-02")
+    assert status == 200
+    assert [row["material_code"] for row in body["rows"]] == ["B"]
+    assert body["rows"][0]["rate"] == 20.0
+
+
+def test_bad_requests(server):
+    assert get(server, "/rates?start=2023-13")[0] == 400
+    assert get(server, "/rates?window=5")[0] == 400
+    assert get(server, "/rates?start=2030-01")[0] == 400
+    assert get(server, "/unknown")[0] == 404
+
+
+def test_refresh_reloads_after_import(server, sample_db):
+    conn = sqlite3.connect(sample_db)
+    conn.execute("INSERT INTO repair_stats (board_code, board_id, count, year, month, import_time) VALUES ('B', 2, 1, 2023, 1, '2024-07-01')")
+    conn.commit()
+    conn.close()
+    rate_service.refresh(server)
+    status, body = get(server, "/rates?material=B")
+    assert body["rows"][0]["rate"] == [20.0, 40.0]
+
+
+def test_internal_errors_return_json_500(server, monkeypatch, capsys):
+    def broken(*args, **kwargs):
+        raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+
+    monkeypatch.setattr(rate_service, "query_rates", broken)
+    status, body = get(server, "/rates?material=A")
+    assert status == 500
+    assert "Lost connection" in body["error"]
+    assert "处理请求 /rates?material=A 失败" in capsys.readouterr().out
+    # 出错后服务继续响应
+    assert get(server, "/top?n=1")[0] == 200
+
+
+def test_failed_rebuild_keeps_previous_snapshot(server, monkeypatch):
+    previous = server.snapshot
+    monkeypatch.setattr(rate_service, "build_snapshot", lambda data, version: 1 / 0)
+    status, body = get(server, "/refresh")
+    assert status == 200 and body["loaded"]
+    assert server.snapshot is previous
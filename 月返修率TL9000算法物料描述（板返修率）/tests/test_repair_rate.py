@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_repair_rate.py
+# @Description :
+
+"""向量化返修率计算与逐行写法结果一致"""
+import numpy as np
+import pandas as pd
+import pytest
+from 月返修率 import calc_rate
+from benchmark_repair_rate import make_monthly_data, legacy_rate_stage, vectorized_rate_stage
+
+
+def test_calc_rate():
+    rate = calc_rate(pd.Series([1, 0, 3, 2]), np.array([3, 5, 0, 400]))
+    assert rate.tolist() == [33.33, 0.0, 0.0, 0.5]
+
+
+def test_vectorized_rate_matches_row_by_row():
+    stock_monthly, repair_monthly = make_monthly_data(50, 14, seed=3)
+    merged = pd.merge(
+        stock_monthly,
+        repair_monthly.rename(columns={'board_code': 'material_code'}),
+        on=['material_code', 'period'],
+        how='left'
+    ).fillna({'repair_qty': 0})
+    monthly_global = merged.groupby('period')[['inbound_qty', 'repair_qty']].sum().reset_index()
+    months = sorted(monthly_global['period'])
+
+    legacy_rates, legacy_total = legacy_rate_stage(merged.copy(), monthly_global.copy(), months)
+    new_rates, new_total = vectorized_rate_stage(merged.copy(), monthly_global.copy(), months)
+    np.testing.assert_allclose(new_rates, legacy_rates)
+    assert new_total == pytest.approx(legacy_total)
+
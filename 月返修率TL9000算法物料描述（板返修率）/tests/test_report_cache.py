@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_report_cache.py
+# @Description :
+
+"""报表输出缓存：指纹、存取与清理"""
+import os
+import sqlite3
+import pytest
+import config
+import report_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CACHE_CONFIG, "dir", str(tmp_path / "cache"))
+    monkeypatch.setitem(config.CACHE_CONFIG, "checksum", False)
+    return tmp_path / "cache"
+
+
+def test_table_fingerprint_changes_after_import(cache_dir):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE repair_stats (count INT, import_time TEXT)")
+    conn.execute("INSERT INTO repair_stats VALUES (1, '2024-01-01 00:00:00')")
+    before = report_cache.table_fingerprint(conn, "repair_stats")
+    assert before == [1, "2024-01-01 00:00:00", None]
+    assert report_cache.table_fingerprint(conn, "repair_stats") == before
+    conn.execute("INSERT INTO repair_stats VALUES (1, '2024-02-01 00:00:00')")
+    assert report_cache.table_fingerprint(conn, "repair_stats") != before
+    conn.close()
+
+
+def test_store_and_restore(cache_dir, tmp_path):
+    output = tmp_path / "report.xlsx"
+    output.write_bytes(b"report v1")
+    assert not report_cache.restore_cached(None, str(output))
+    assert not report_cache.restore_cached("a" * 64, str(output))
+
+    report_cache.store_cached("a" * 64, str(output))
+    output.unlink()
+    # has_cached 只检查，不复制
+    assert report_cache.has_cached("a" * 64, str(output))
+    assert not output.exists()
+    assert report_cache.restore_cached("a" * 64, str(output))
+    assert output.read_bytes() == b"report v1"
+
+
+def test_prune_keeps_most_recent(cache_dir, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CACHE_CONFIG, "keep", 2)
+    output = tmp_path / "report.xlsx"
+    output.write_bytes(b"x")
+    for i, fingerprint in enumerate(["a" * 64, "b" * 64, "c" * 64]):
+        report_cache.store_cached(fingerprint, str(output))
+        path = cache_dir / fingerprint
+        os.utime(path, (1000 + i, 1000 + i))
+    report_cache.prune_cache()
+    assert sorted(os.listdir(cache_dir)) == ["b" * 64, "c" * 64]
+
+
+def test_prune_only_removes_fingerprint_dirs(cache_dir, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CACHE_CONFIG, "keep", 1)
+    # 旧版本缓存目录与快照、运行记录等目录共用
+    for name in ["snapshots", "runs", "bench", "f" * 63, "g" * 64]:
+        (cache_dir / name).mkdir(parents=True)
+        os.utime(cache_dir / name, (0, 0))
+    (cache_dir / "imported_files.json").write_text("{}")
+    output = tmp_path / "report.xlsx"
+    output.write_bytes(b"x")
+    for i, fingerprint in enumerate(["a" * 64, "b" * 64]):
+        report_cache.store_cached(fingerprint, str(output))
+        os.utime(cache_dir / fingerprint, (1000 + i, 1000 + i))
+    report_cache.prune_cache()
+    assert sorted(os.listdir(cache_dir)) == sorted(
+        ["b" * 64, "snapshots", "runs", "bench", "f" * 63, "g" * 64, "imported_files.json"]
+    )
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_report_matrix.py
+# @Description :
+
+"""物料 × 月份 稠密矩阵"""
+import numpy as np
+import pandas as pd
+from report_matrix import build_matrix
+from period_utils import month_key
+
+
+def test_build_matrix():
+    records = pd.DataFrame({
+        "material_code": ["B", "A", "A", "B", None],
+        "material_desc": ["板B", "板A", "板A", "板B", "板C"],
+        "key": [month_key(2024, 1), month_key(2023, 11), month_key(2023, 11), month_key(2023, 12), month_key(2024, 1)],
+        "qty": [4, 1, 2, np.nan, 9],
+    })
+    matrix = build_matrix(records, ["material_code", "material_desc"], "key", ["qty"])
+
+    # 标签为空的记录丢弃，行按标签排序，月份从最小到最大连续，缺失月份补0
+    assert matrix.start == month_key(2023, 11)
+    assert matrix.labels["material_code"].tolist() == ["A", "B"]
+    assert matrix.row_index == {("A", "板A"): 0, ("B", "板B"): 1}
+    assert matrix.data["qty"].dtype == np.int32
+    assert matrix.data["qty"].tolist() == [[3, 0, 0], [0, 0, 4]]
+    assert matrix.totals("qty").tolist() == [3, 0, 4]
+    assert matrix.rolling("qty", 2).tolist() == [[3, 3, 0], [0, 0, 4]]
+    assert matrix.period_position([month_key(2023, 10), month_key(2023, 12), month_key(2024, 2)]).tolist() == [-1, 1, -1]
+
+    frame = matrix.to_frame(matrix.data["qty"], ("合计", ""), matrix.totals("qty"))
+    assert list(frame.columns) == ["material_code", "material_desc", "2023-11", "2023-12", "2024-01"]
+    assert frame.iloc[-1].tolist() == ["合计", "", 3, 0, 4]
+
+
+def test_build_matrix_empty():
+    records = pd.DataFrame({"material_code": [None], "key": [1], "qty": [1]})
+    assert build_matrix(records, ["material_code"], "key", ["qty"]) is None
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_rolling_window.py
+# @Description :
+
+"""稠密矩阵与尾随窗口和"""
+import numpy as np
+import pytest
+from rolling_window import dense_matrix, rolling_sum
+
+
+def test_dense_matrix_accumulates_duplicates():
+    matrix = dense_matrix(np.array([0, 0, 1, 0]), np.array([1, 1, 0, 2]), np.array([2.0, 3.0, 4.0, 1.0]), 2, 3)
+    assert matrix.tolist() == [[0, 5, 1], [4, 0, 0]]
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 12, 30])
+def test_rolling_sum_matches_naive_loop(window):
+    matrix = np.random.default_rng(window).integers(0, 100, size=(7, 25)).astype(np.float64)
+    expected = np.array([
+        [row[max(0, j - window + 1):j + 1].sum() for j in range(matrix.shape[1])] for row in matrix
+    ])
+    np.testing.assert_array_equal(rolling_sum(matrix, window), expected)
+
+
+def test_rolling_sum_does_not_alias_input():
+    matrix = np.ones((2, 3))
+    result = rolling_sum(matrix, 1)
+    result[0, 0] = 5
+    assert matrix[0, 0] == 1
+
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_snapshot.py
+# @Description :
+
+"""快照读取与 SQL 读取结果一致，源表变化后快照失效"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import config  # noqa: E402
+import snapshot  # noqa: E402
+from period_utils import month_key  # noqa: E402
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.SNAPSHOT_CONFIG, "dir", str(tmp_path))
+    monkeypatch.setitem(config.SNAPSHOT_CONFIG, "enabled", True)
+    # 报表缓存开启 CHECKSUM TABLE 时快照指纹也不执行（sqlite 上无此语句）
+    monkeypatch.setitem(config.CACHE_CONFIG, "checksum", True)
+    monkeypatch.setitem(config.STREAM_CONFIG, "chunksize", 0)
+    return tmp_path
+
+
+def normalized(df):
+    """category 字段转回普通值后排序，只比较数据本身"""
+    df = df.astype({col: object for col in df.select_dtypes("category").columns})
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+
+@pytest.mark.parametrize("period", [(None, None), (month_key(2023, 5), month_key(2024, 2))])
+def test_snapshot_matches_sql(report_db, snapshot_dir, monkeypatch, period):
+    for name in snapshot.SNAPSHOT_SOURCES:
+        assert snapshot.write_snapshot(report_db, name) > 0
+        assert snapshot.load_snapshot(report_db, name) is not None
+
+        from_snapshot = snapshot.read_rows(report_db, name, *period)
+        monkeypatch.setitem(config.SNAPSHOT_CONFIG, "enabled", False)
+        from_sql = snapshot.read_rows(report_db, name, *period)
+        monkeypatch.setitem(config.SNAPSHOT_CONFIG, "enabled", True)
+
+        pd.testing.assert_frame_equal(normalized(from_snapshot), normalized(from_sql), check_dtype=False)
+
+
+def test_snapshot_expires_after_import(report_db, snapshot_dir):
+    snapshot.write_snapshot(report_db, "repair_stats")
+    report_db.execute(
+        "INSERT INTO repair_stats (board_code, board_id, count, year, month, import_time) "
+        "VALUES ('M0000000', 1, 1, 2024, 1, '2024-07-01 00:00:00')"
+    )
+    assert snapshot.load_snapshot(report_db, "repair_stats") is None
+    rows = snapshot.read_rows(report_db, "repair_stats")
+    assert np.int64(rows["count"].sum()) == report_db.execute("SELECT SUM(count) FROM repair_stats").fetchone()[0]
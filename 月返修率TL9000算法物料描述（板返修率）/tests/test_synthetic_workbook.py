@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_synthetic_workbook.py
+# @Description :
+
+"""模拟工作簿：可复现，且列位置与导入脚本读取的位置一致"""
+import pandas as pd
+import synthetic_workbook
+from synthetic_workbook import generate_frames, write_workbook, STOCK_FIRST_COL, STOCK_MONTHS
+
+
+def test_generate_frames_is_deterministic():
+    first, second = generate_frames(500, 20, seed=7), generate_frames(500, 20, seed=7)
+    for name in ["material", "repair", "stock"]:
+        pd.testing.assert_frame_equal(first[name], second[name])
+    assert len(first["repair"]) == 500
+    assert first["stock"].shape == (20, 2 + STOCK_MONTHS)
+    assert set(first["repair"]["board_code"]) <= set(first["material"]["material_code"])
+
+
+def test_write_workbook_column_positions(tmp_path):
+    frames = generate_frames(50, 5, seed=1)
+    path = tmp_path / "模拟.xlsx"
+    assert write_workbook(str(path), frames)
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == ["改善统计", "返修", "板子入库"]
+    repair = sheets["返修"]
+    assert repair.shape == (50, 23)
+    assert repair.iloc[:, 22].tolist() == frames["repair"]["board_code"].astype(str).tolist()
+    assert repair.iloc[:, 11].tolist() == frames["repair"]["count"].tolist()
+    stock = sheets["板子入库"]
+    assert stock.iloc[:, STOCK_FIRST_COL - 1].tolist() == frames["stock"].iloc[:, 2].tolist()
+
+
+def test_write_workbook_refuses_oversized_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic_workbook, "EXCEL_MAX_ROWS", 10)
+    path = tmp_path / "big.xlsx"
+    assert not write_workbook(str(path), generate_frames(10, 5))
+    assert not path.exists()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_table_swap.py
+# @Description :
+
+"""影子表重载：索引定义和语句顺序（MySQL 专有语句，用记录语句的连接代替）"""
+import pytest
+from pymysql import MySQLError
+import table_swap
+
+INDEX_COLUMNS = ("Table", "Non_unique", "Key_name", "Seq_in_index", "Column_name", "Sub_part", "Index_type")
+
+
+class RecordingConnection:
+    """记录执行的语句；SHOW INDEX 返回给定的索引行，SHOW CREATE TABLE 返回给定的建表语句，fail_on 中的语句抛出 MySQLError"""
+
+    def __init__(self, index_rows=(), fail_on=(), create_sql="CREATE TABLE `t` (`id` INT) ENGINE=InnoDB AUTO_INCREMENT=42"):
+        self.index_rows = list(index_rows)
+        self.fail_on = fail_on
+        self.create_sql = create_sql
+        self.statements = []
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.statements.append(query)
+        if any(query.startswith(prefix) for prefix in self.conn.fail_on):
+            raise MySQLError("失败")
+        if query.startswith("SHOW INDEX"):
+            self.description = [(name,) for name in INDEX_COLUMNS]
+            self.rows = self.conn.index_rows
+        elif query.startswith("SHOW CREATE TABLE"):
+            self.rows = [("t", self.conn.create_sql)]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0]
+
+
+def index_rows():
+    return [
+        ("t_shadow", 0, "PRIMARY", 1, "id", None, "BTREE"),
+        ("t_shadow", 1, "idx_code_time", 2, "import_time", None, "BTREE"),
+        ("t_shadow", 1, "idx_code_time", 1, "board_code", 20, "BTREE"),
+        ("t_shadow", 0, "uk_code", 1, "material_code", None, "BTREE"),
+    ]
+
+
+def test_secondary_indexes_skip_primary_and_keep_order():
+    conn = RecordingConnection(index_rows())
+    assert table_swap.secondary_indexes(conn, "t_shadow") == [
+        "ADD INDEX `idx_code_time` (`board_code`(20), `import_time`)",
+        "ADD UNIQUE INDEX `uk_code` (`material_code`)",
+    ]
+
+
+def test_create_shadow_drops_secondary_indexes():
+    conn = RecordingConnection(index_rows())
+    indexes = table_swap.create_shadow(conn, "t")
+    assert len(indexes) == 2
+    assert conn.statements[:2] == ["DROP TABLE IF EXISTS `t_shadow`", "CREATE TABLE `t_shadow` LIKE `t`"]
+    # 沿用正式表的自增计数器
+    assert "ALTER TABLE `t_shadow` AUTO_INCREMENT = 42" in conn.statements
+    assert conn.statements[-1] == "ALTER TABLE `t_shadow` DROP INDEX `idx_code_time`, DROP INDEX `uk_code`"
+
+
+def test_swap_in_rebuilds_indexes_before_rename():
+    conn = RecordingConnection()
+    assert table_swap.swap_in(conn, "t", ["ADD INDEX `i` (`a`)"])
+    assert conn.statements == [
+        "ALTER TABLE `t_shadow` ADD INDEX `i` (`a`)",
+        "DROP TABLE IF EXISTS `t_old`",
+        "RENAME TABLE `t` TO `t_old`, `t_shadow` TO `t`",
+        "DROP TABLE `t_old`",
+    ]
+
+
+def test_failed_index_rebuild_leaves_live_table():
+    conn = RecordingConnection(fail_on=("ALTER",))
+    assert not table_swap.swap_in(conn, "t", ["ADD INDEX `i` (`a`)"])
+    assert not any(statement.startswith("RENAME") for statement in conn.statements)
+
+
+@pytest.mark.parametrize("row", [
+    ("t_shadow", 1, "ft_desc", 1, "material_desc", None, "FULLTEXT"),
+    ("t_shadow", 1, "idx_expr", 1, None, None, "BTREE"),
+])
+def test_create_shadow_refuses_indexes_it_cannot_rebuild(row):
+    conn = RecordingConnection(index_rows() + [row])
+    assert table_swap.create_shadow(conn, "t") is None
+    assert conn.statements[-1] == "DROP TABLE IF EXISTS `t_shadow`"
+    assert not any("DROP INDEX" in statement for statement in conn.statements)
+
+
+def test_drop_shadow_reports_errors(capsys):
+    table_swap.drop_shadow(RecordingConnection(fail_on=("DROP",)), "t")
+    assert "删除影子表失败" in capsys.readouterr().out
+
+
+def test_create_shadow_without_auto_increment_counter():
+    conn = RecordingConnection(create_sql="CREATE TABLE `t` (`id` INT) ENGINE=InnoDB")
+    assert table_swap.create_shadow(conn, "t") == []
+    assert not any("AUTO_INCREMENT" in statement for statement in conn.statements)
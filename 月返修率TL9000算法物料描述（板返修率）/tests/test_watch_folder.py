@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_watch_folder.py
+# @Description :
+
+"""共享目录监视：扫描、防抖和按内容去重"""
+import os
+import pytest
+import config
+import watch_folder
+
+
+@pytest.fixture
+def ledger_path(tmp_path, monkeypatch):
+    path = tmp_path / "state" / "imported_files.json"
+    monkeypatch.setitem(config.WATCH_CONFIG, "ledger", str(path))
+    monkeypatch.setitem(config.WATCH_CONFIG, "settle_seconds", 20)
+    return path
+
+
+def test_scan_folder_skips_temp_and_other_files(tmp_path):
+    for name in ["a.xlsx", "B.XLSX", "~$a.xlsx", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"x")
+    assert sorted(os.path.basename(p) for p in watch_folder.scan_folder(str(tmp_path))) == ["B.XLSX", "a.xlsx"]
+
+
+def test_settled_files_waits_for_stable_state(ledger_path):
+    pending = {}
+    assert watch_folder.settled_files({"a": (1, 1.0)}, pending, 100) == []
+    assert watch_folder.settled_files({"a": (1, 1.0)}, pending, 110) == []
+    # 文件仍在写入：重新计时
+    assert watch_folder.settled_files({"a": (2, 2.0)}, pending, 115) == []
+    assert watch_folder.settled_files({"a": (2, 2.0)}, pending, 130) == []
+    assert watch_folder.settled_files({"a": (2, 2.0)}, pending, 135) == ["a"]
+    # 文件被移走后不再跟踪
+    watch_folder.settled_files({}, pending, 140)
+    assert pending == {}
+
+
+def test_process_file_imports_each_content_once(tmp_path, ledger_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(watch_folder, "run_imports", lambda path: calls.append(path) or ({"repair"}, True))
+    first = tmp_path / "first.xlsx"
+    first.write_bytes(b"workbook")
+    copy = tmp_path / "copy.xlsx"
+    copy.write_bytes(b"workbook")
+
+    ledger = watch_folder.load_ledger()
+    assert watch_folder.process_file(str(first), ledger) == {"repair"}
+    # 内容相同的拷贝不再导入，台账已写出
+    assert watch_folder.process_file(str(copy), watch_folder.load_ledger()) == set()
+    assert calls == [str(first)]
+    assert [entry["file"] for entry in watch_folder.load_ledger().values()] == ["first.xlsx"]
+
+
+def test_failed_import_is_not_recorded(tmp_path, ledger_path, monkeypatch):
+    results = [({"material"}, False), ({"material", "repair"}, True)]
+    monkeypatch.setattr(watch_folder, "run_imports", lambda path: results.pop(0))
+    path = tmp_path / "book.xlsx"
+    path.write_bytes(b"workbook")
+
+    # 部分失败：返回已成功的部分用于刷新报表，但不写台账，下次重新导入
+    assert watch_folder.process_file(str(path), watch_folder.load_ledger()) == {"material"}
+    assert watch_folder.load_ledger() == {}
+    assert watch_folder.process_file(str(path), watch_folder.load_ledger()) == {"material", "repair"}
+    assert len(watch_folder.load_ledger()) == 1
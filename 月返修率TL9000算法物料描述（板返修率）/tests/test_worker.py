@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : test_worker.py
+# @Description :
+
+"""常驻进程：工作表缓存、按任务取阶段记录、socket 任务提交"""
+import os
+import sys
+import socket
+import subprocess
+import pandas as pd
+import pytest
+import config
+from common import instrumentation
+import sheet_cache
+import worker
+
+TL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    monkeypatch.setattr(sheet_cache, "_capacity", 2)
+    monkeypatch.setattr(sheet_cache, "_cache", type(sheet_cache._cache)())
+    path = tmp_path / "book.xlsx"
+    pd.DataFrame({"a": [1, 2]}).to_excel(path, index=False)
+    return path
+
+
+def test_sheet_cache_returns_copies_until_file_changes(workbook, monkeypatch):
+    first = sheet_cache.read_excel(workbook)
+    first.loc[0, "a"] = 99
+    calls = []
+    monkeypatch.setattr(pd, "read_excel", lambda path, **kwargs: calls.append(path) or pd.DataFrame({"a": [3]}))
+    assert sheet_cache.read_excel(workbook)["a"].tolist() == [1, 2]
+    assert calls == []
+    os.utime(workbook, ns=(0, os.stat(workbook).st_mtime_ns + 10 ** 9))
+    assert sheet_cache.read_excel(workbook)["a"].tolist() == [3]
+    assert len(calls) == 1
+
+
+def test_records_since_returns_only_new_stages():
+    with instrumentation.stage("之前"):
+        pass
+    mark = instrumentation.stage_mark()
+    assert instrumentation.records_since(mark) == []
+    with instrumentation.stage("之后"):
+        pass
+    assert [r["stage"] for r in instrumentation.records_since(mark)] == ["之后"]
+
+
+# 服务端在子进程中运行：任务执行期间 redirect_stdout 替换的是整个进程的标准输出
+SERVER = """
+import sys, socketserver, report_specs, worker
+report_specs.spec_fingerprint = lambda name: print("检查指纹", name) or "f" * 64
+report_specs.all_cached = lambda name, fingerprint: False
+server = socketserver.UnixStreamServer(sys.argv[1], worker.JobHandler)
+print("ready", flush=True)
+server.serve_forever()
+"""
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix socket")
+def test_submit_streams_output_and_returncode(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "worker.sock")
+    monkeypatch.setitem(config.WORKER_CONFIG, "socket", path)
+    server = subprocess.Popen([sys.executable, "-c", SERVER, path], cwd=TL_DIR,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        assert server.stdout.readline().strip() == "ready"
+        assert worker.submit(["report-count", "--check"]) == 1
+        assert worker.submit(["no-such-command"]) == 2
+    finally:
+        server.kill()
+        server.wait()
+    out = capsys.readouterr().out
+    assert "检查指纹 count" in out
+    assert "任务完成：退出码1" in out
+
+
+def test_submit_without_server(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(config.WORKER_CONFIG, "socket", str(tmp_path / "missing.sock"))
+    assert worker.submit(["report-count"]) == 2
+    assert "常驻进程未启动" in capsys.readouterr().out
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : watch_folder.py
+# @Description :
+
+"""共享目录自动导入程序
+常驻进程，每 WATCH_CONFIG["poll_seconds"] 秒扫描一次共享目录中的 .xlsx 文件：
+    1. 防抖：文件大小和修改时间连续 settle_seconds 秒不变才处理，避免读取写了一半的文件；
+       Excel 打开时生成的 ~$ 临时文件直接忽略
+    2. 去重：按文件内容计算 sha256，已导入过的内容记录在台账中，改名或重复拷贝不会再次导入
+    3. 按工作簿中包含的工作表运行对应导入：物料（改善统计）→ 返修（返修）→ 入库（板子入库）。
+       共享目录中的工作簿是累计数据，物料和返修表以全量重载方式替换（影子表原子替换，见 table_swap.py），
+       入库数据替换工作簿所覆盖的（物料代码, 日期）；同一数据的新版本再次导入不会重复累加。
+       任一导入失败时不写入台账，重启监视或文件再次修改后重新导入
+    4. 只刷新受影响的报表（各报表自带缓存，源表未变化的报表直接复用）
+新文件放入目录后约 poll_seconds + settle_seconds 秒内即可反映到报表中。
+
+    python watch_folder.py [目录]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from datetime import datetime
+from db_utils import create_db_connection, close_db_connection
+from config import DB_CONFIG1, EXCEL_CONFIG, WATCH_CONFIG
+
+# 当前目录及入库数据导入脚本所在目录
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+STOCK_SCRIPT = os.path.join(CURRENT_DIR, "..", "物料描述（生产入库数据）", "入库入库时间和入库数量.py")
+# 入库数据所在工作表
+STOCK_SHEET = "板子入库"
+
+
+def file_sha256(path):
+    """
+    按块计算文件内容的 sha256
+
+    参数:
+        path (str): 文件路径
+
+    返回:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_ledger():
+    """读取已导入文件台账（内容摘要 → 导入记录），不存在时返回空台账"""
+    if not os.path.exists(WATCH_CONFIG["ledger"]):
+        return {}
+    with open(WATCH_CONFIG["ledger"], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_ledger(ledger):
+    """保存台账（先写临时文件再改名，避免中断时台账损坏）"""
+    os.makedirs(os.path.dirname(WATCH_CONFIG["ledger"]), exist_ok=True)
+    tmp_path = WATCH_CONFIG["ledger"] + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(ledger, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, WATCH_CONFIG["ledger"])
+
+
+def scan_folder(folder):
+    """
+    列出目录中的Excel文件及其 (大小, 修改时间)
+
+    参数:
+        folder (str): 共享目录
+
+    返回:
+        dict: 文件路径 → (大小, 修改时间)
+    """
+    files = {}
+    for name in os.listdir(folder):
+        if name.startswith("~$") or not name.lower().endswith(".xlsx"):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # 扫描过程中被移走
+        files[path] = (stat.st_size, stat.st_mtime)
+    return files
+
+
+def settled_files(files, pending, now):
+    """
+    防抖：返回大小和修改时间已连续 settle_seconds 秒未变化的文件
+
+    参数:
+        files (dict): 本次扫描结果（scan_folder 的返回值）
+        pending (dict): 文件路径 → (大小, 修改时间, 首次观察到该状态的时间)，原地更新
+        now (float): 当前时间戳
+
+    返回:
+        list: 可以处理的文件路径
+    """
+    ready = []
+    for path, state in files.items():
+        seen = pending.get(path)
+        if seen is None or seen[:2] != state:
+            pending[path] = (*state, now)
+        elif now - seen[2] >= WATCH_CONFIG["settle_seconds"]:
+            ready.append(path)
+    for path in set(pending) - set(files):
+        del pending[path]
+    return ready
+
+
+def run_imports(path):
+    """
+    按工作簿包含的工作表运行对应的导入（物料需先于返修导入，返修导入按物料表过滤单板料号）
+
+    参数:
+        path (str): Excel文件路径
+
+    返回:
+        tuple: (已导入的数据类型集合（material/repair/stock）, 是否全部导入成功)
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True)
+    sheets = set(workbook.sheetnames)
+    workbook.close()
+
+    imported = set()
+    ok = True
+    if EXCEL_CONFIG["material_sheet"] in sheets:
+        import 入库物料代码和物料描述和转换代码 as material_import
+        if material_import.main(path, full_reload=True):
+            imported.add("material")
+        else:
+            ok = False
+    if EXCEL_CONFIG["repair_sheet"] in sheets:
+        import 入库返修数据 as repair_import
+        if repair_import.main(path, full_reload=True):
+            imported.add("repair")
+        else:
+            ok = False
+    if STOCK_SHEET in sheets:
+        # 入库导入脚本在另一个目录，依赖同名的 db_utils 等模块，在子进程中运行
+        result = subprocess.run([sys.executable, STOCK_SCRIPT, path], cwd=os.path.dirname(STOCK_SCRIPT), check=False)
+        if result.returncode == 0:
+            imported.add("stock")
+        else:
+            ok = False
+    return imported, ok
+
+
+def database_available():
+    """检查数据库能否连接"""
+    conn = create_db_connection(**DB_CONFIG1)
+    if conn is None:
+        return False
+    close_db_connection(conn)
+    return True
+
+
+def refresh_reports(imported):
+    """
+    刷新受影响的报表：返修数量报表只依赖物料和返修数据，返修率和汇总报表还依赖入库数据
+
+    参数:
+        imported (set): 已导入的数据类型（process_file 的返回值）
+    """
+    if not imported:
+        return
+    import snapshot
+    import 月返修率
+    import 输出数据
+    import combined_report
+    # 先写出数据快照，随后的报表直接内存映射读取
+    snapshot.main()
+    if imported & {"material", "repair"}:
+        输出数据.main()
+    月返修率.main()
+    combined_report.main()
+
+
+def process_file(path, ledger):
+    """
+    处理一个已稳定的文件：内容已导入过则跳过，否则导入，全部导入成功后记录到台账
+
+    参数:
+        path (str): Excel文件路径
+        ledger (dict): 台账（原地更新）
+
+    返回:
+        set: 已导入的数据类型（部分失败时也包含已成功的部分，用于刷新报表）
+    """
+    digest = file_sha256(path)
+    if digest in ledger:
+        return set()
+    print(f"发现新文件：{path}")
+    try:
+        imported, ok = run_imports(path)
+    except Exception as e:
+        print(f"导入失败：{path}（{e}）")
+        return set()
+    if not ok:
+        print(f"导入未全部成功，未记录到台账：{path}")
+        return imported
+    ledger[digest] = {
+        "file": os.path.basename(path),
+        "imported": sorted(imported),
+        "imported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    save_ledger(ledger)
+    return imported
+
+
+def watch(folder):
+    """
+    轮询共享目录，处理新文件并刷新报表
+
+    参数:
+        folder (str): 共享目录
+    """
+    ledger = load_ledger()
+    pending = {}
+    # 已处理过的文件及处理时的 (大小, 修改时间)，文件未再修改时不重复计算摘要
+    handled = {}
+    print(f"开始监视目录：{folder}（每{WATCH_CONFIG['poll_seconds']}秒扫描一次）")
+    while True:
+        imported = set()
+        files = scan_folder(folder)
+        ready = [path for path in settled_files(files, pending, time.time()) if handled.get(path) != files[path]]
+        # 导入脚本连接失败时只打印提示，先确认数据库可用，否则本轮不处理（文件下一轮重试）
+        if ready and database_available():
+            for path in ready:
+                imported |= process_file(path, ledger)
+                handled[path] = files[path]
+        # 同一轮导入的多个文件只刷新一次报表
+        refresh_reports(imported)
+        time.sleep(WATCH_CONFIG["poll_seconds"])
+
+
+def main():
+    """程序入口：命令行第一个参数为监视目录，默认使用 WATCH_CONFIG["dir"]"""
+    folder = sys.argv[1] if len(sys.argv) > 1 else WATCH_CONFIG["dir"]
+    if not folder or not os.path.isdir(folder):
+        print(f"监视目录不存在：{folder}")
+        return
+    try:
+        watch(folder)
+    except KeyboardInterrupt:
+        print("已停止监视")
+
+
+if __name__ == "__main__":
+    main()
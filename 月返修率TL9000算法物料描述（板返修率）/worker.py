@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2026.10.19
+# @Author : 王沁桐(3636617336@qq.com)
+# @File : worker.py
+# @Description :
+
+"""常驻任务进程
+定时任务每次启动脚本时，大部分时间花在解释器启动、导入 pandas、连接 MySQL 和解析工作簿上。
+常驻进程启动时导入全部库和脚本模块，之后保持：
+    - 数据库连接池（db_utils.enable_pooling，任务结束时连接放回池中）
+    - 最近解析过的工作表（sheet_cache，文件未修改时不再解析）
+客户端通过本地 Unix socket（WORKER_CONFIG["socket"]）提交任务，子命令与 cli.py 相同，
+任务日志实时转发回客户端，结束时返回退出码和各阶段耗时。任务按提交顺序逐个执行。
+
+    python worker.py serve                  启动常驻进程
+    python worker.py report-rate            提交任务（子命令和参数同 cli.py）
+    python worker.py import-repair 路径
+
+仅 Linux/macOS 可用（Windows 直接使用 cli.py）。入库导入和 ERI 流程依赖其他目录的同名模块，仍在子进程中运行。
+"""
+import os
+import sys
+import json
+import time
+import socket
+import socketserver
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from config import WORKER_CONFIG
+
+# 常驻进程启动时预先导入的脚本模块
+PRELOAD_MODULES = [
+    "入库物料代码和物料描述和转换代码", "入库返修数据", "月返修率", "输出数据", "combined_report",
+]
+
+
+def send_message(wfile, message):
+    """向客户端发送一条消息（每行一条JSON）"""
+    wfile.write((json.dumps(message, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+class StreamWriter:
+    """替换任务执行期间的标准输出，每次写入作为一条 output 消息转发给客户端；客户端断开后丢弃输出，任务继续执行"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+    def write(self, text):
+        if text and not self.closed:
+            try:
+                send_message(self.wfile, {"type": "output", "text": text})
+            except OSError:
+                self.closed = True
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """处理一个客户端连接：读取任务，执行并转发输出，最后返回退出码和各阶段耗时"""
+
+    def handle(self):
+        from cli import build_parser
+        from common.instrumentation import stage_mark, records_since
+
+        request = json.loads(self.rfile.readline() or "{}")
+        argv = request.get("argv", [])
+        writer = StreamWriter(self.wfile)
+        mark = stage_mark()
+        start = time.perf_counter()
+        with redirect_stdout(writer), redirect_stderr(writer):
+            try:
+                args = build_parser().parse_args(argv)
+                returncode = args.handler(args) or 0
+            except SystemExit as e:
+                # 参数错误或 --help
+                returncode = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+        seconds = time.perf_counter() - start
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {' '.join(argv)} → 退出码{returncode}，耗时{seconds:.2f}秒")
+        try:
+            send_message(self.wfile, {
+                "type": "done", "returncode": returncode, "seconds": round(seconds, 3),
+                "stages": records_since(mark),
+            })
+        except OSError:
+            pass
+
+
+def serve():
+    """启动常驻进程：预先导入库和脚本模块，启用连接池和工作表缓存，监听本地 socket"""
+    import db_utils
+    import sheet_cache
+    for module in ["pandas", "numpy", "openpyxl", "cli", *PRELOAD_MODULES]:
+        __import__(module)
+    db_utils.enable_pooling()
+    sheet_cache.enable(WORKER_CONFIG["sheet_cache"])
+
+    path = WORKER_CONFIG["socket"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)  # 上次异常退出留下的 socket 文件
+    # UnixStreamServer 逐个处理连接，任务按提交顺序串行执行
+    with socketserver.UnixStreamServer(path, JobHandler) as server:
+        os.chmod(path, 0o600)
+        print(f"常驻进程已启动：{path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("常驻进程已停止")
+        finally:
+            os.remove(path)
+
+
+def print_job_summary(message):
+    """打印任务结果和各阶段耗时"""
+    stages = message["stages"]
+    if stages:
+        print(f"\n{'阶段':<48}{'墙钟(s)':>10}{'输出行':>12}")
+        for record in stages:
+            label = "  " * record["depth"] + record["stage"]
+            print(f"{label:<48}{record['wall_s']:>10.3f}"
+                  f"{record['rows_out'] if record['rows_out'] is not None else '-':>12}")
+    print(f"任务完成：退出码{message['returncode']}，耗时{message['seconds']:.2f}秒")
+
+
+def submit(argv):
+    """
+    提交任务并实时打印输出
+
+    参数:
+        argv (list): 子命令及参数（同 cli.py）
+
+    返回:
+        int: 任务退出码；常驻进程未启动时返回2
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(WORKER_CONFIG["socket"])
+        except OSError:
+            print(f"常驻进程未启动（{WORKER_CONFIG['socket']}），请先运行：python worker.py serve")
+            return 2
+        sock.sendall((json.dumps({"argv": argv}, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                message = json.loads(line)
+                if message["type"] == "output":
+                    sys.stdout.write(message["text"])
+                    sys.stdout.flush()
+                elif message["type"] == "done":
+                    print_job_summary(message)
+                    return message["returncode"]
+    print("常驻进程连接中断，任务结果未知")
+    return 1
+
+
+def main():
+    """程序入口：serve 启动常驻进程，其他参数作为任务提交"""
+    if not hasattr(socket, "AF_UNIX"):
+        print("当前系统不支持 Unix socket，请直接使用 cli.py")
+        return 1
+    if len(sys.argv) < 2:
+        print("用法：python worker.py serve | python worker.py 子命令 [参数 ...]（子命令同 cli.py）")
+        return 1
+    if sys.argv[1] == "serve":
+        serve()
+        return 0
+    return submit(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,13 @@
 # @File : 入库物料代码和物料描述和转换代码.py
 # @Description : 
 
-import pandas as pd
 from pymysql import MySQLError
 from db_utils import create_db_connection, close_db_connection
 from config import DB_CONFIG, EXCEL_CONFIG
+from common.instrumentation import timed_stage, stage, set_rows, note_frame
+from sheet_cache import read_excel
+from table_swap import shadow_name, create_shadow, swap_in, drop_shadow
+from common.code_dict import ensure_code_columns, sync_code_ids
 
 def create_material_table(conn, table_name):
     """
@@ -32,7 +35,9 @@ def create_material_table(conn, table_name):
         print(f"表 `{table_name}` 已创建（若不存在）")
     except MySQLError as e:
         print(f"建表失败: {e}")
+    ensure_code_columns(conn, table_name)
 
+@timed_stage()
 def insert_material_data(conn, table_name, excel_path, sheet_name):
     """
     从Excel读取物料数据并插入到数据库
@@ -42,16 +47,23 @@ def insert_material_data(conn, table_name, excel_path, sheet_name):
         table_name (str): 目标表名
         excel_path (str): Excel文件路径
         sheet_name (str): 工作表名称
+
+    返回:
+        int: 插入的行数，失败时为0
     """
     try:
         # 读取Excel指定范围（A2~C14，共13行）
-        df = pd.read_excel(
-            excel_path,
-            sheet_name=sheet_name,
-            header=0,      # 第1行作为表头
-            nrows=13,      # 读取13行数据
-            usecols="A:C"  # 仅保留A、B、C列
-        )
+        with stage("read_excel") as record:
+            df = read_excel(
+                excel_path,
+                sheet_name=sheet_name,
+                header=0,      # 第1行作为表头
+                nrows=13,      # 读取13行数据
+                usecols="A:C"  # 仅保留A、B、C列
+            )
+            record["rows_out"] = len(df)
+        set_rows(rows_in=len(df))
+        note_frame("excel_df", df)
         
         # 映射Excel表头到数据库字段
         df = df.rename(columns={
@@ -65,7 +77,13 @@ def insert_material_data(conn, table_name, excel_path, sheet_name):
         
         if df.empty:
             print("无有效物料数据，跳过插入")
-            return
+            return 0
+
+        # 同一物料代码在表格中出现多次时保留最后一行（否则整批插入因主键重复失败）
+        duplicated = df["material_code"].duplicated(keep="last")
+        if duplicated.any():
+            print(f"物料代码重复{duplicated.sum()}行，保留最后出现的一行：{df.loc[duplicated, 'material_code'].tolist()}")
+            df = df[~duplicated]
         
         # 转换为插入数据格式
         records = [tuple(row) for row in df.values]
@@ -75,19 +93,32 @@ def insert_material_data(conn, table_name, excel_path, sheet_name):
         INSERT INTO `{table_name}` (material_code, material_desc, board_code)
         VALUES (%s, %s, %s)
         """
-        with conn.cursor() as cursor:
+        with stage("executemany", rows_in=len(records)), conn.cursor() as cursor:
             cursor.executemany(insert_sql, records)
             conn.commit()
+        set_rows(rows_out=cursor.rowcount)
         print(f"成功插入 {cursor.rowcount} 条物料数据")
+        return cursor.rowcount
     
     except MySQLError as e:
         print(f"插入失败: {e}（提示：material_code不可重复）")
         conn.rollback()
     except Exception as e:
         print(f"Excel处理失败: {e}")
+    return 0
 
-def main():
-    """物料数据处理主函数"""
+def main(excel_path=None, full_reload=False):
+    """
+    物料数据处理主函数
+
+    参数:
+        excel_path (str): Excel文件路径，默认使用EXCEL_CONFIG["path"]
+        full_reload (bool): 全量重载：写入影子表后原子替换物料表（表中原有数据全部被工作簿内容替换），
+            默认追加到物料表
+
+    返回:
+        bool: 导入是否成功（未插入数据、全量重载未完成时为False）
+    """
     # 建立数据库连接
     conn = create_db_connection(
     DB_CONFIG["host"],
@@ -97,18 +128,35 @@ def main():
 )
 
     if not conn:
-        return
+        return False
     
     try:
         # 创建物料表
         create_material_table(conn, DB_CONFIG["material_table"])
-        # 插入物料数据
-        insert_material_data(
+        table = DB_CONFIG["material_table"]
+        indexes = create_shadow(conn, table) if full_reload else None
+        if full_reload and indexes is None:
+            return False
+        # 插入物料数据（全量重载时写入影子表）
+        target = shadow_name(table) if full_reload else table
+        inserted = insert_material_data(
             conn,
-            DB_CONFIG["material_table"],
-            EXCEL_CONFIG["path"],
+            target,
+            excel_path or EXCEL_CONFIG["path"],
             EXCEL_CONFIG["material_sheet"]
         )
+        # 新代码分配整数id并回填（影子表在替换前回填）；回填失败时本次导入失败，
+        # 报表按id关联，未回填的行不会出现在报表中
+        if inserted and sync_code_ids(conn, target, base=table) is None:
+            inserted = 0
+        if full_reload:
+            if inserted and swap_in(conn, table, indexes):
+                ensure_code_columns(conn, table)  # 影子表不含外键，替换后重新添加
+            else:
+                drop_shadow(conn, table)
+                print(f"全量重载未完成，`{table}` 保持不变")
+                return False
+        return bool(inserted)
     finally:
         # 关闭连接
         close_db_connection(conn)
@@ -5,10 +5,19 @@
 # @File : 入库返修数据.py
 # @Description : 
 
-import pandas as pd
 from pymysql import MySQLError
-from db_utils import create_db_connection, close_db_connection
+from db_utils import create_db_connection, close_db_connection, run_query
 from config import DB_CONFIG, EXCEL_CONFIG
+from common.instrumentation import timed_stage, stage, set_rows, note_frame
+from sheet_cache import read_excel
+from table_swap import shadow_name, create_shadow, swap_in, drop_shadow
+from common.code_dict import ensure_code_columns, sync_code_ids
+from archive import archived_cutoff
+
+# 整数月份键生成列（年×12+月-1）及其索引：报表按统计区间查询时，
+# 条件 year * 12 + month - 1 与生成列定义相同，MySQL 自动改用该索引做范围扫描（见 period_utils.period_condition）
+PERIOD_KEY_COLUMN = "`period_key` INT AS (`year` * 12 + `month` - 1) STORED COMMENT '整数月份键'"
+PERIOD_INDEX = "INDEX `idx_period` (`period_key`)"
 
 def create_repair_table(conn, table_name):
     """
@@ -25,15 +34,34 @@ def create_repair_table(conn, table_name):
         `count` INT COMMENT '对应Excel第12列（个数）',
         `year` INT COMMENT '对应Excel第16列（年份）',
         `month` INT COMMENT '对应Excel第17列（月份）',
-        import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        {PERIOD_KEY_COLUMN},
+        import_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        {PERIOD_INDEX}
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """
     try:
         with conn.cursor() as cursor:
             cursor.execute(create_sql)
         print(f"表 `{table_name}` 已创建（若不存在）")
+        add_period_index(conn, table_name)
     except MySQLError as e:
         print(f"建表失败: {e}")
+    ensure_code_columns(conn, table_name)
+
+def add_period_index(conn, table_name):
+    """
+    为旧版本创建的返修表补充 period_key 生成列和索引（已有则跳过）
+
+    参数:
+        conn (pymysql.connections.Connection): 数据库连接对象
+        table_name (str): 表名
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"SHOW COLUMNS FROM `{table_name}` LIKE 'period_key'")
+        if cursor.fetchone():
+            return
+        cursor.execute(f"ALTER TABLE `{table_name}` ADD COLUMN {PERIOD_KEY_COLUMN}, ADD {PERIOD_INDEX}")
+    print(f"表 `{table_name}` 已添加 period_key 列和索引")
 
 def get_valid_board_codes(conn):
     """
@@ -46,8 +74,7 @@ def get_valid_board_codes(conn):
         list: 有效board_code字符串列表（去重去空）
     """
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT board_code FROM material_stats")
+        with run_query(conn, "SELECT board_code FROM material_stats") as cursor:
             # 转换为字符串并去空格，确保格式统一
             valid_codes = [str(row[0]).strip() for row in cursor.fetchall()]
             print(f"从物料表获取到{len(valid_codes)}个有效board_code")
@@ -71,7 +98,8 @@ def safe_int_convert(value):
     except (ValueError, TypeError):
         return None
 
-def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes):
+@timed_stage()
+def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes, archived=None):
     """
     处理并插入返修数据（含数据清洗）
 
@@ -81,17 +109,25 @@ def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes):
         excel_path (str): Excel文件路径
         sheet_name (str): 工作表名称
         valid_codes (list): 有效board_code列表
+        archived (int): 已归档的月份键（archive.archived_cutoff），早于该月的数据已在月度汇总中，跳过不导入
+
+    返回:
+        int: 插入的行数，无有效数据或失败时为0
     """
     try:
         # 读取Excel指定列（第12、16、17、23列，索引11、15、16、22）
-        df = pd.read_excel(
-            excel_path,
-            sheet_name=sheet_name,
-            usecols=[11, 15, 16, 22],
-            header=0
-        )
+        with stage("read_excel") as record:
+            df = read_excel(
+                excel_path,
+                sheet_name=sheet_name,
+                usecols=[11, 15, 16, 22],
+                header=0
+            )
+            record["rows_out"] = len(df)
         df.columns = ["count", "year", "month", "board_code"]
         total_rows = len(df)
+        set_rows(rows_in=total_rows)
+        note_frame("excel_df", df)
         print(f"读取到返修数据共{total_rows}行")
 
         # 数据清洗步骤
@@ -99,7 +135,7 @@ def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes):
         print(f"过滤空值后剩余{len(df)}行")
         if df.empty:
             print("无有效数据，终止处理")
-            return
+            return 0
 
         # 处理board_code格式
         df["board_code"] = df["board_code"].astype(str).str.strip()
@@ -107,7 +143,7 @@ def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes):
         print(f"过滤空board_code后剩余{len(df)}行")
         if df.empty:
             print("无有效board_code数据，终止处理")
-            return
+            return 0
 
         # 转换数值列并过滤无效值
         df["count"] = df["count"].apply(safe_int_convert)
@@ -117,34 +153,56 @@ def insert_repair_data(conn, table_name, excel_path, sheet_name, valid_codes):
         print(f"过滤无效数值后剩余{len(df)}行")
         if df.empty:
             print("无有效数值数据，终止处理")
-            return
+            return 0
+
+        # 跳过已归档月份的数据（报表从月度汇总读取这些月份，再导入会重复统计）
+        if archived is not None:
+            df = df[df["year"] * 12 + df["month"] - 1 >= archived]
+            print(f"跳过已归档月份后剩余{len(df)}行")
+            if df.empty:
+                print("数据均早于归档月份，终止处理")
+                return 0
 
         # 匹配有效board_code
         df = df[df["board_code"].isin(valid_codes)]
         print(f"匹配物料表后剩余{len(df)}行有效数据")
         if df.empty:
             print("无匹配物料表的数据，终止处理")
-            return
+            return 0
 
         # 批量插入数据库
         records = [tuple(row) for row in df[["board_code", "count", "year", "month"]].values]
+        note_frame("clean_df", df)
         insert_sql = f"""
         INSERT INTO `{table_name}` (board_code, count, year, month)
         VALUES (%s, %s, %s, %s)
         """
-        with conn.cursor() as cursor:
+        with stage("executemany", rows_in=len(records)), conn.cursor() as cursor:
             cursor.executemany(insert_sql, records)
             conn.commit()
+        set_rows(rows_out=len(records))
         print(f"成功插入{len(records)}条数据到{table_name}表")
+        return len(records)
 
     except MySQLError as e:
         print(f"数据库操作失败: {e}")
         conn.rollback()
     except Exception as e:
         print(f"数据处理错误: {e}")
+    return 0
 
-def main():
-    """返修数据处理主函数"""
+def main(excel_path=None, full_reload=False):
+    """
+    返修数据处理主函数
+
+    参数:
+        excel_path (str): Excel文件路径，默认使用EXCEL_CONFIG["path"]
+        full_reload (bool): 全量重载：写入影子表后原子替换返修表（表中原有数据全部被工作簿内容替换），
+            默认追加到返修表
+
+    返回:
+        bool: 导入是否成功（未插入数据、全量重载未完成时为False）
+    """
     # 建立数据库连接
     conn = create_db_connection(
         DB_CONFIG["host"],
@@ -153,7 +211,7 @@ def main():
         DB_CONFIG["database"]
     )
     if not conn:
-        return
+        return False
     
     try:
         # 创建返修表
@@ -163,16 +221,34 @@ def main():
         valid_codes = get_valid_board_codes(conn)
         if not valid_codes:
             print("物料表无有效数据，无法继续")
-            return
+            return False
 
-        # 插入返修数据
-        insert_repair_data(
+        # 插入返修数据（全量重载时写入影子表）
+        table = DB_CONFIG["repair_table"]
+        indexes = create_shadow(conn, table) if full_reload else None
+        if full_reload and indexes is None:
+            return False
+        target = shadow_name(table) if full_reload else table
+        inserted = insert_repair_data(
             conn,
-            DB_CONFIG["repair_table"],
-            EXCEL_CONFIG["path"],
+            target,
+            excel_path or EXCEL_CONFIG["path"],
             EXCEL_CONFIG["repair_sheet"],
-            valid_codes
+            valid_codes,
+            archived_cutoff(conn, table)
         )
+        # 新代码分配整数id并回填（影子表在替换前回填）；回填失败时本次导入失败，
+        # 报表按id关联，未回填的行不会出现在报表中
+        if inserted and sync_code_ids(conn, target, base=table) is None:
+            inserted = 0
+        if full_reload:
+            if inserted and swap_in(conn, table, indexes):
+                ensure_code_columns(conn, table)  # 影子表不含外键，替换后重新添加
+            else:
+                drop_shadow(conn, table)
+                print(f"全量重载未完成，`{table}` 保持不变")
+                return False
+        return bool(inserted)
     finally:
         # 关闭连接
         close_db_connection(conn)
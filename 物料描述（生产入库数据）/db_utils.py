@@ -9,9 +9,17 @@
 """数据库操作通用工具模块
 包含数据库连接、关闭、表创建、数据插入等通用功能
 """
+import os
+import sys
 import pymysql
 from typing import Tuple, Optional
 
+# 仓库根目录加入搜索路径：各目录共用的 common 包按包名导入（from common.code_dict import ...），
+# 不会与本目录的同名模块混淆；脚本先导入本模块再导入 common
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
 
 def get_db_connection(db_config: dict) -> Tuple[Optional[pymysql.connections.Connection], 
                                               Optional[pymysql.cursors.Cursor]]:
@@ -109,20 +117,43 @@ def batch_insert_data(conn: pymysql.connections.Connection,
         return 0, len(data_list)
 
 
-def execute_query(conn: pymysql.connections.Connection, query_sql: str) -> Optional[pymysql.cursors.DictCursor]:
+def archived_cutoff(conn: pymysql.connections.Connection, table_name: str) -> Optional[int]:
+    """
+    表已归档到的月份键（年×12+月-1）。归档见 月返修率TL9000算法物料描述（板返修率）/archive.py：
+    早于该月的明细已移入归档表并累加到月度汇总表，报表不再从热表读取这些月份
+    
+    参数:
+        conn: 数据库连接对象
+        table_name: 热表名（如 material_stock）
+        
+    返回:
+        月份键，尚未归档过时返回None
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT cutoff_key FROM archive_state WHERE table_name = %s", (table_name,))
+            row = cursor.fetchone()
+    except pymysql.MySQLError:
+        return None  # 状态表不存在：从未归档
+    return int(row[0]) if row else None
+
+
+def execute_query(conn: pymysql.connections.Connection, query_sql: str,
+                  params: Optional[tuple] = None) -> Optional[pymysql.cursors.DictCursor]:
     """
     执行查询语句
     
     参数:
         conn: 数据库连接对象
         query_sql: 查询SQL语句
+        params: 查询参数（对应SQL中的 %s 占位符）
         
     返回:
         查询结果游标，失败返回None
     """
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        cursor.execute(query_sql)
+        cursor.execute(query_sql, params)
         return cursor
     except pymysql.MySQLError as e:
         print(f"查询执行失败: {str(e)}")
@@ -11,6 +11,8 @@
 """
 import os
 import re
+from datetime import datetime
+from typing import Optional
 
 
 def get_desktop_path() -> str:
@@ -36,4 +38,21 @@ def clean_description(desc: str) -> str:
     if not desc:
         return ""
     # 正则匹配：仅保留中文、英文、数字
-    return re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', str(desc))
\ No newline at end of file
+    return re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', str(desc))
+
+
+def month_key_of(date_str: str) -> Optional[int]:
+    """
+    日期字符串的整数月份键（年×12+月-1，与归档月份的表示相同）
+    
+    参数:
+        date_str: 日期字符串，如 "2025-01-01" 或 "2025-01-01 00:00:00"
+        
+    返回:
+        月份键，无法识别的日期返回None
+    """
+    try:
+        date = datetime.strptime(str(date_str)[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return date.year * 12 + date.month - 1
\ No newline at end of file
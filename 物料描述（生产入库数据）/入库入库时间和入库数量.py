@@ -9,9 +9,12 @@
 """入库信息导入程序
 从Excel读取入库时间和数量信息，导入数据库material_stock表
 """
-from db_utils import get_db_connection, close_db_connection, create_table
-from excel_utils import check_file_exists, load_excel_workbook, get_excel_sheet, read_cell_value
 import os, sys
+from db_utils import get_db_connection, close_db_connection, create_table, archived_cutoff
+from utils import month_key_of
+from excel_utils import check_file_exists, load_excel_workbook, get_excel_sheet, read_cell_value
+from common.code_dict import ensure_code_columns, sync_code_ids
+from common.instrumentation import timed_stage, stage, set_rows
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -26,30 +29,37 @@ DB_CONFIG = {
 target_table = "material_stock" 
 
 
-def main():
+@timed_stage("import_stock")
+def main(excel_file=EXCEL_FILE):
     """
     主函数：执行入库信息导入流程
+
+    参数:
+        excel_file: Excel文件路径，默认EXCEL_FILE；命令行第一个参数可指定其他文件
+
+    返回:
+        bool: 导入是否成功
     """
     # 1. 检查Excel文件
-    if not check_file_exists(EXCEL_FILE):
-        return
+    if not check_file_exists(excel_file):
+        return False
 
     # 2. 加载Excel
-    workbook = load_excel_workbook(EXCEL_FILE)
+    workbook = load_excel_workbook(excel_file)
     if not workbook:
-        return
+        return False
 
     sheet = get_excel_sheet(workbook, SHEET_NAME)
     if not sheet:
         workbook.close()
-        return
+        return False
     print("Excel文件加载成功")
 
     # 3. 连接数据库
     conn, cursor = get_db_connection(DB_CONFIG)
     if not conn or not cursor:
         workbook.close()
-        return
+        return False
 
     try:
         # 4. 创建表
@@ -59,44 +69,70 @@ def main():
             `material_code` VARCHAR(50),
             `date` DATE,
             `quantity` INT,
-            `import_time` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            `import_time` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX `idx_date` (`date`)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
         """
         if not create_table(conn, cursor, target_table, create_table_sql):
-            return
+            return False
+        # 旧版本创建的表没有日期索引（报表按统计区间读取入库数据时使用）
+        cursor.execute(f"SHOW INDEX FROM `{target_table}` WHERE Key_name = 'idx_date'")
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE `{target_table}` ADD INDEX `idx_date` (`date`)")
+            print(f"表 `{target_table}` 已添加日期索引")
+        ensure_code_columns(conn, target_table)
 
-        # 5. 遍历数据并插入
+        # 5. 先删除表格所覆盖的（物料代码, 日期）已有的行，再插入：同一工作簿重复导入
+        #    （共享目录中的新版本、改名后的副本）替换原有数据，不会重复累加
+        # 行范围：2到182行；时间列：H→AJ，列8到36
+        material_codes = [read_cell_value(sheet, row, 1) for row in range(2, 183)]
+        dates = {col: read_cell_value(sheet, 1, col) for col in range(8, 37)}
+        # 已归档月份的入库数据已在月度汇总表中，报表不再读取热表中的这些月份，跳过不导入
+        archived = archived_cutoff(conn, target_table)
+        if archived is not None:
+            dates = {col: date_str for col, date_str in dates.items()
+                     if month_key_of(date_str) is None or month_key_of(date_str) >= archived}
+            print(f"跳过已归档月份后剩余{len(dates)}个日期列")
+            if not dates:
+                return True
+        cursor.execute(
+            f"DELETE FROM `{target_table}` WHERE material_code IN ({', '.join(['%s'] * len(material_codes))}) "
+            f"AND date IN ({', '.join(['%s'] * len(dates))})",
+            material_codes + list(dates.values())
+        )
+        replaced = cursor.rowcount
+
+        # 6. 遍历数据并插入（与删除在同一事务中，全部完成后提交）
         success_count = 0
         fail_count = 0
-        
-        # 行范围：2到182行
-        for row in range(2, 183):
-            # 提取物料代码（A列）和序号（C列）
-            material_code = read_cell_value(sheet, row, 1)
-            
-            
-            # 遍历时间列（H→AJ，列8到36）
-            for col in range(8, 37):
-                quantity = sheet.cell(row=row, column=col).value
-                if quantity == 0:
-                    continue
-                date_str = read_cell_value(sheet, 1, col)
-                
-                try:
-                    sql = f"""
-                    INSERT INTO `{target_table}` 
-                    (material_code, date, quantity)
-                    VALUES (%s, %s, %s)
-                    """
-                    cursor.execute(sql, (material_code, date_str, quantity))
-                    conn.commit()
-                    success_count += 1
-                except Exception as e:
-                    conn.rollback()
-                    fail_count += 1
+        sql = f"""
+        INSERT INTO `{target_table}` 
+        (material_code, date, quantity)
+        VALUES (%s, %s, %s)
+        """
+        with stage("insert", rows_in=len(material_codes) * len(dates)) as record:
+            for row, material_code in enumerate(material_codes, start=2):
+                for col, date_str in dates.items():
+                    quantity = sheet.cell(row=row, column=col).value
+                    if quantity == 0:
+                        continue
+                    try:
+                        cursor.execute(sql, (material_code, date_str, quantity))
+                        success_count += 1
+                    except Exception as e:
+                        fail_count += 1
+            conn.commit()
+            record["rows_out"] = success_count
+        set_rows(rows_out=success_count)
+        print(f"替换已有入库记录{replaced}条，插入{success_count}条，失败{fail_count}条")
+
+        # 新物料代码分配整数id并回填（报表按 material_id 关联物料表，未回填的行不会出现在报表中，视为导入失败）
+        return sync_code_ids(conn, target_table) is not None
 
     except Exception as e:
+        conn.rollback()
         print(f"执行过程出错：{e}")
+        return False
     finally:
         close_db_connection(conn, cursor)
         workbook.close()
@@ -104,4 +140,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # 导入失败时以非零状态退出（watch_folder.py、cli.py 据此判断是否导入成功）
+    sys.exit(0 if main(sys.argv[1] if len(sys.argv) > 1 else EXCEL_FILE) else 1)
\ No newline at end of file
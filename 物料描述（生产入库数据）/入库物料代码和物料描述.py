@@ -10,9 +10,12 @@
 从Excel读取物料代码和描述，清洗后导入数据库material_info表
 """
 import os
+import sys
 from db_utils import get_db_connection, close_db_connection, create_table, batch_insert_data
 from excel_utils import check_file_exists, load_excel_workbook, get_excel_sheet, read_cell_value
 from utils import clean_description
+from common.code_dict import CODE_COLUMNS, ensure_code_columns, sync_code_ids
+from common.instrumentation import timed_stage, stage, set_rows
 
 
 excel_path = r"C:\Users\admin\Desktop\三江\核心产品返修率-20250611外发wqt.xlsx"  
@@ -29,24 +32,28 @@ db_config = {
 target_table = "material_info(month)" # 目标表名
 
 
+@timed_stage("import_material_info")
 def main():
     """
     主函数：执行物料信息导入流程
+
+    返回:
+        bool: 是否导入成功（含代码id回填）
     """
     print(f"starting import from {excel_path} → sheet: {sheet_name}")
     # 1. 检查Excel文件存在性
     if not check_file_exists(excel_path):
-        return
+        return False
 
     # 2. 读取Excel文件
     workbook = load_excel_workbook(excel_path)
     if not workbook:
-        return
+        return False
 
     sheet = get_excel_sheet(workbook, sheet_name)
     if not sheet:
         workbook.close()
-        return
+        return False
     print(f"成功：加载Excel → 共 {sheet.max_row} 行数据")
     
     # 验证表头
@@ -87,7 +94,7 @@ def main():
     conn, cursor = get_db_connection(db_config)
     if not conn or not cursor:
         workbook.close()
-        return
+        return False
 
     try:
         # 创建表
@@ -99,7 +106,7 @@ def main():
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
         """
         if not create_table(conn, cursor, target_table, create_table_sql):
-            return
+            return False
 
         # 插入数据
         if final_data:
@@ -108,13 +115,24 @@ def main():
             VALUES (%s, %s)
             ON DUPLICATE KEY UPDATE material_desc = VALUES(material_desc);
             """
-            success, fail = batch_insert_data(conn, cursor, insert_sql, final_data)
+            with stage("batch_insert", rows_in=len(final_data)) as record:
+                success, fail = batch_insert_data(conn, cursor, insert_sql, final_data)
+                record["rows_out"] = success
+            set_rows(rows_in=sheet.max_row - 1, rows_out=success)
+            # 新物料代码分配整数id并回填（报表按 material_id 关联入库表）
+            if target_table in CODE_COLUMNS:
+                # 未回填的物料在报表按 material_id 关联时会被漏掉，视为导入失败
+                if not ensure_code_columns(conn, target_table) or sync_code_ids(conn, target_table) is None:
+                    print("错误：物料代码id回填失败，入库数据分析将漏掉这些物料，请重新导入")
+                    return False
             
         else:
             print("警告：无有效数据可插入！")
+        return True
 
     except Exception as e:
         print(f"错误：执行过程出错 → {str(e)}")
+        return False
     finally:
         close_db_connection(conn, cursor)
         workbook.close()
@@ -122,5 +140,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
-    print("=== 操作执行完毕 ===")
\ No newline at end of file
+    # 导入失败（含代码id回填失败）时以非零状态退出，调用方据此判断是否导入成功
+    ok = main()
+    print("=== 操作执行完毕 ===")
+    sys.exit(0 if ok else 1)
\ No newline at end of file
@@ -12,9 +12,11 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
 from datetime import datetime
-from db_utils import get_db_connection, close_db_connection, execute_query
+from db_utils import get_db_connection, close_db_connection, execute_query, archived_cutoff
 from utils import get_desktop_path
+from common.instrumentation import timed_stage, stage, set_rows
 
 # 数据库配置（根据实际环境修改）
 DB_CONFIG = {
@@ -25,19 +27,48 @@ DB_CONFIG = {
 }
 TABLE_MATERIAL = "material_info"  # 物料信息表
 TABLE_STOCK = "material_stock"    # 入库信息表
+TABLE_STOCK_MONTHLY = "material_stock_monthly"  # 已归档入库数据的月度汇总表（见 TL9000 目录的 archive.py）
 OUTPUT_FILE = "入库数据分析.xlsx" # 输出文件名
 
 
-def main():
+def date_range_condition(start=None, end=None, date_col="ms.date"):
+    """
+    统计区间转为入库日期的查询条件：[起始月1日, 结束月的下月1日)，使用 material_stock 的日期索引
+
+    参数:
+        start: 起始月份（"2023-01"格式），为空时不限
+        end: 结束月份（含），为空时不限
+        date_col: 日期字段
+
+    返回:
+        tuple: (条件SQL, 参数)
+    """
+    conditions, params = [], []
+    if start:
+        conditions.append(f"{date_col} >= %s")
+        params.append(pd.Period(start, freq="M").start_time.date())
+    if end:
+        conditions.append(f"{date_col} < %s")
+        params.append((pd.Period(end, freq="M") + 1).start_time.date())
+    return " AND ".join(conditions) or "1 = 1", tuple(params)
+
+
+@timed_stage("stock_report")
+def main(start=None, end=None):
     """
     入库数据分析程序
+
+    参数:
+        start: 统计区间起始月份（"2023-01"格式），为空时不限
+        end: 统计区间结束月份（含），为空时到最新月份
     """
     conn, _ = get_db_connection(DB_CONFIG)
     if not conn:
         return
 
     try:
-        # 1. 查询数据（关联物料表和入库表）
+        # 1. 查询统计区间内的数据（关联物料表和入库表，区间条件在数据库中过滤）
+        condition, params = date_range_condition(start, end)
         query = f"""
         SELECT 
             mi.material_code,   -- 物料编码
@@ -46,14 +77,33 @@ def main():
             ms.quantity         -- 入库数量
         FROM `{TABLE_STOCK}` ms
         JOIN `{TABLE_MATERIAL}` mi 
-            ON ms.material_code = mi.material_code;
+            ON ms.material_id = mi.material_id
+        WHERE {condition}
         """
-        cursor = execute_query(conn, query)
-        if not cursor:
-            return
-            
-        # 转换为DataFrame
-        df = pd.DataFrame(cursor.fetchall())
+        # 已归档时：早于归档月份的数据从月度汇总表读取（日期为当月1日），热表只读归档月份及以后的明细，
+        # 归档后重新导入的早期明细不会重复统计
+        archived = archived_cutoff(conn, TABLE_STOCK)
+        if archived is not None:
+            monthly_condition, monthly_params = date_range_condition(start, end, "sm.month")
+            query += f"""
+            AND ms.date >= %s
+        UNION ALL
+        SELECT mi.material_code, mi.material_desc, sm.month AS date, sm.inbound_qty AS quantity
+        FROM `{TABLE_STOCK_MONTHLY}` sm
+        JOIN `{TABLE_MATERIAL}` mi 
+            ON sm.material_id = mi.material_id
+        WHERE {monthly_condition}
+            """
+            params = params + (pd.Period(year=archived // 12, month=archived % 12 + 1, freq="M").start_time.date(),) \
+                + monthly_params
+        with stage("query") as record:
+            cursor = execute_query(conn, query, params)
+            if not cursor:
+                return
+            # 转换为DataFrame
+            df = pd.DataFrame(cursor.fetchall())
+            record["rows_out"] = len(df)
+        set_rows(rows_in=len(df))
         print(f"成功读取 {len(df)} 条入库数据")
 
         # 2. 数据预处理：日期格式化 + 提取月份（2023-01 格式）
@@ -98,8 +148,10 @@ def main():
         desktop = get_desktop_path()
         output_path = os.path.join(desktop, OUTPUT_FILE)
         
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        with stage("write_excel", rows_in=len(pivot_table)), \
+                pd.ExcelWriter(output_path, engine='openpyxl') as writer:
             pivot_table.to_excel(writer, sheet_name='透视表（物料×月份）')  
+        set_rows(rows_out=len(pivot_table))
 
         print(f"\n分析完成！透视表已保存至：\n{output_path}")
         print(f"透视表包含：\n- {len(pivot_table)-1} 个物料行 + 1 个月度合计行\n- {len(pivot_table.columns)} 个月份列")
@@ -111,4 +163,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="入库数据月度透视表")
+    parser.add_argument("--start", help="统计区间起始月份（如 2024-01）")
+    parser.add_argument("--end", help="统计区间结束月份（含）")
+    args = parser.parse_args()
+    main(args.start, args.end)
\ No newline at end of file